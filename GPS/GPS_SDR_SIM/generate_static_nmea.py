@@ -1,4 +1,13 @@
-from datetime import datetime, timedelta, timezone
+import os
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Скрипт запускают и напрямую из каталога GPS_SDR_SIM: корень репозитория нужен для импорта пакета GPS
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from GPS.nmea_writer import write_nmea
 
 
 def generate_static_nmea(
@@ -19,28 +28,9 @@ def generate_static_nmea(
     :param step_sec: интервал между строками (например, 0.1 сек)
     :param filepath: путь к создаваемому файлу
     """
-
-    def to_nmea_latlon(lat, lon):
-        lat_deg = int(abs(lat))
-        lat_min = (abs(lat) - lat_deg) * 60
-        lat_str = f"{lat_deg:02d}{lat_min:07.4f},{'N' if lat >= 0 else 'S'}"
-
-        lon_deg = int(abs(lon))
-        lon_min = (abs(lon) - lon_deg) * 60
-        lon_str = f"{lon_deg:03d}{lon_min:07.4f},{'E' if lon >= 0 else 'W'}"
-        return lat_str, lon_str
-
-    lat_str, lon_str = to_nmea_latlon(lat, lon)
-    start_time = datetime.now(timezone.utc)
-
     num_points = int(duration_sec / step_sec)
-
-    with open(filepath, 'w') as f:
-        for i in range(num_points):
-            t = start_time + timedelta(seconds=i * step_sec)
-            t_str = t.strftime("%H%M%S.%f")[:-4]  # формат HHMMSS.ss
-            line = f"$GPGGA,{t_str},{lat_str},{lon_str},1,08,0.9,{height:.1f},M,0.0,M,,*47\n"
-            f.write(line)
+    llh = np.broadcast_to(np.array([lat, lon, height], dtype=np.float64), (num_points, 3))
+    write_nmea(filepath, np.arange(num_points) * step_sec, llh, datetime.now(timezone.utc))
 
     print(f"[+] Сгенерирован файл статической точки ({num_points} строк, {step_sec:.1f} с шаг): {filepath}")
 
@@ -52,4 +42,4 @@ if __name__ == "__main__":
         height=180.0,
         duration_sec=300,
         filepath="nmea_strings.txt"
-    )
\ No newline at end of file
+    )
@@ -1,11 +1,18 @@
+import io
 import re
 import sys
 import time
 import os
 import subprocess
 import threading
+from collections import deque
 from datetime import datetime, timedelta
 
+from GPS.nmea_stream import NMEAPipe
+
+# Имя файла, означающее stdout gps-sdr-sim (-o -) или stdin hackrf_transfer (-t -)
+STREAM = "-"
+
 
 def get_hackrf_serial_numbers():
     try:
@@ -31,14 +38,18 @@ import time
 
 class GPSProcessRunner:
     def __init__(self, ephemeris_file, nmea_file, bitrate, output_file,
-                 sim_dir="GPS_SDR_SIM", start_time=None):
+                 sim_dir="GPS_SDR_SIM", start_time=None, nmea_source=None, use_stdin=False):
         """
         :param ephemeris_file: Файл эфемерид (например, brdc0430.25n)
-        :param nmea_file: Файл с NMEA-строками
+        :param nmea_file: Файл с NMEA-строками; None, если задан nmea_source
         :param bitrate: Битрейт (например, 8)
-        :param output_file: Имя выходного бинарного файла
+        :param output_file: Имя выходного бинарного файла; STREAM — писать I/Q в stdout
+                            (см. IQStreamPipeline)
         :param sim_dir: Папка, где лежит gps-sdr-sim.exe и входные файлы
         :param start_time: Время начала симуляции в формате 'YYYY/MM/DD,HH:MM:SS'
+        :param nmea_source: итератор блоков NMEA (например, Model.nmea_chunks) — строки
+                            передаются через канал NMEAPipe по мере чтения, без файла
+        :param use_stdin: передавать строки через stdin процесса (-g /dev/stdin, только POSIX)
         """
 
         if getattr(sys, 'frozen', False):
@@ -53,10 +64,17 @@ class GPSProcessRunner:
 
 
         self.ephemeris_file = os.path.join(self.sim_dir, ephemeris_file)
-        self.nmea_file = os.path.join(self.sim_dir, nmea_file)
+        if nmea_file is None and nmea_source is None:
+            raise ValueError("Нужен nmea_file или nmea_source")
+        self.nmea_file = os.path.join(self.sim_dir, nmea_file) if nmea_file is not None else None
         self.bitrate = str(bitrate)
-        self.output_file = os.path.join(self.sim_dir, output_file)
+        self.output_file = output_file if output_file == STREAM else os.path.join(self.sim_dir, output_file)
         self.start_time = start_time  # строка или None
+        self.nmea_source = nmea_source
+        self.use_stdin = use_stdin
+        self.nmea_pipe = None
+        # Последние строки stderr — для сообщения об ошибке
+        self.stderr_tail = deque(maxlen=20)
 
         self.process = None
 
@@ -77,7 +95,8 @@ class GPSProcessRunner:
     def _read_stream(self, stream, label):
         for line in iter(stream.readline, ''):
             if line:
-                pass
+                if label == "STDERR":
+                    self.stderr_tail.append(line.strip())
                 # print(f"[{label}] {line.strip()}")
         stream.close()
 
@@ -85,20 +104,37 @@ class GPSProcessRunner:
         if not os.path.isfile(self.executable):
             raise FileNotFoundError(f"Исполняемый файл не найден: {self.executable}")
 
+        if self.nmea_source is not None:
+            self.nmea_pipe = NMEAPipe(self.nmea_source, use_stdin=self.use_stdin)
+            self.nmea_file = self.nmea_pipe.path
+            if not self.use_stdin:
+                self.nmea_pipe.start()
+
         command = self.build_command()
         print(f"Запуск команды: {' '.join(command)}")
 
-        self.process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=self.sim_dir
-        )
+        # При выводе в stdout там двоичные I/Q: их забирает IQStreamPipeline
+        streaming = self.output_file == STREAM
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE if self.nmea_pipe is not None and self.use_stdin else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=not streaming,
+                cwd=self.sim_dir
+            )
+        except OSError:
+            self._close_nmea_pipe()
+            raise
+        if self.nmea_pipe is not None and self.use_stdin:
+            self.nmea_pipe.start(self.process.stdin if streaming else self.process.stdin.buffer)
 
         # Запускаем чтение вывода в отдельных потоках
-        threading.Thread(target=self._read_stream, args=(self.process.stdout, "STDOUT"), daemon=True).start()
-        threading.Thread(target=self._read_stream, args=(self.process.stderr, "STDERR"), daemon=True).start()
+        stderr = io.TextIOWrapper(self.process.stderr, errors="replace") if streaming else self.process.stderr
+        if not streaming:
+            threading.Thread(target=self._read_stream, args=(self.process.stdout, "STDOUT"), daemon=True).start()
+        threading.Thread(target=self._read_stream, args=(stderr, "STDERR"), daemon=True).start()
 
     def is_running(self):
         return self.process and self.process.poll() is None
@@ -106,6 +142,7 @@ class GPSProcessRunner:
     def wait(self):
         if self.process:
             self.process.wait()
+            self._close_nmea_pipe()
             print(f"Процесс завершен с кодом: {self.process.returncode}")
             return self.process.returncode
         return None
@@ -113,15 +150,21 @@ class GPSProcessRunner:
     def terminate(self):
         if self.process:
             self.process.terminate()
+            self._close_nmea_pipe()
             print("Процесс принудительно завершен.")
 
+    def _close_nmea_pipe(self):
+        if self.nmea_pipe is not None:
+            self.nmea_pipe.close()
+            self.nmea_pipe = None
+
 
 
 
 class HackRFTransferRunner:
     def __init__(self, input_file, frequency=1575420000, sample_rate=2600000, antenna=1, tx_gain=0, working_dir=".", device_number:str = "0"):
         """
-        :param input_file: Бинарный файл (например, nmea_strings.bin)
+        :param input_file: Бинарный файл (например, nmea_strings.bin); STREAM — читать I/Q из stdin
         :param frequency: Частота в Гц (по умолчанию 1575.42 МГц)
         :param sample_rate: Частота дискретизации
         :param antenna: 1 = включить антенну
@@ -132,12 +175,14 @@ class HackRFTransferRunner:
         self.working_dir = os.path.join(self.script_dir, working_dir)
         self.executable = "hackrf_transfer"  # предполагается, что в PATH
 
-        self.input_file = os.path.join(self.working_dir, input_file)
+        self.input_file = input_file if input_file == STREAM else os.path.join(self.working_dir, input_file)
         self.frequency = str(frequency)
         self.sample_rate = str(sample_rate)
         self.antenna = str(antenna)
         self.tx_gain = str(tx_gain)
         self.device_number = str(device_number)
+        # Последние строки stderr — для сообщения об ошибке
+        self.stderr_tail = deque(maxlen=20)
 
         self.process = None
 
@@ -155,27 +200,35 @@ class HackRFTransferRunner:
     def _read_stream(self, stream, label):
         for line in iter(stream.readline, ''):
             if line:
-                pass
+                if label == "STDERR":
+                    self.stderr_tail.append(line.strip())
                 print(f"[{label}] {line.strip()}")
         stream.close()
 
     def start(self):
-        if not os.path.isfile(self.input_file):
+        streaming = self.input_file == STREAM
+        if not streaming and not os.path.isfile(self.input_file):
             raise FileNotFoundError(f"Файл передачи не найден: {self.input_file}")
 
         command = self.build_command()
         print(f"Запуск команды: {' '.join(command)}")
 
+        # При чтении из stdin туда пишет IQStreamPipeline двоичные I/Q
         self.process = subprocess.Popen(
             command,
+            stdin=subprocess.PIPE if streaming else None,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
+            text=not streaming,
             cwd=self.working_dir
         )
 
-        threading.Thread(target=self._read_stream, args=(self.process.stdout, "STDOUT"), daemon=True).start()
-        threading.Thread(target=self._read_stream, args=(self.process.stderr, "STDERR"), daemon=True).start()
+        stdout, stderr = self.process.stdout, self.process.stderr
+        if streaming:
+            stdout = io.TextIOWrapper(stdout, errors="replace")
+            stderr = io.TextIOWrapper(stderr, errors="replace")
+        threading.Thread(target=self._read_stream, args=(stdout, "STDOUT"), daemon=True).start()
+        threading.Thread(target=self._read_stream, args=(stderr, "STDERR"), daemon=True).start()
 
     def is_running(self):
         return self.process and self.process.poll() is None
@@ -7,6 +7,15 @@ a = 6378137.0  # Большая полуось (м)
 e2 = 6.69437999014e-3  # Экспоненциальный эксцентриситет^2
 
 
+# Оси траектории (x — север, y — восток, z — вверх) -> столбцы ENU
+TRAJECTORY_AXES_ENU = [1, 0, 2]
+
+
+def trajectory_to_enu(xyz: np.ndarray) -> np.ndarray:
+    """Точки или скорости (N, 3) в осях траектории -> те же величины в осях ENU."""
+    return np.asarray(xyz)[..., TRAJECTORY_AXES_ENU]
+
+
 class CoordinateSystem:
     def __init__(self):
         # Начальные координаты системы (широта, долгота, высота)
@@ -16,6 +25,10 @@ class CoordinateSystem:
         self.X0 = None
         self.Y0 = None
         self.Z0 = None
+        # Матрица поворота ECEF -> ENU (строки — орты east, north, up) и начало в ECEF;
+        # считаются один раз в set_origin
+        self.R = None
+        self.origin_ecef = None
 
     def set_origin(self, lat, lon, h):
         """Устанавливает начало координат (широта, долгота, высота)."""
@@ -23,6 +36,18 @@ class CoordinateSystem:
         self.lon0 = lon
         self.h0 = h
         self.X0, self.Y0, self.Z0 = self.geodetic_to_ecef(lat, lon, h)
+        self.origin_ecef = np.array([self.X0, self.Y0, self.Z0], dtype=np.float64)
+
+        # Матрица поворота для ENU (East, North, Up) относительно (lat0, lon0)
+        lat0 = radians(lat)
+        lon0 = radians(lon)
+        self.R = np.array([[-sin(lon0), cos(lon0), 0],
+                           [-sin(lat0) * cos(lon0), -sin(lat0) * sin(lon0), cos(lat0)],
+                           [cos(lat0) * cos(lon0), cos(lat0) * sin(lon0), sin(lat0)]])
+
+    def _require_origin(self):
+        if self.R is None:
+            raise ValueError("Начало координат не задано: вызовите set_origin")
 
     def geodetic_to_ecef(self, lat, lon, h):
         """Преобразование геодезических координат (широта, долгота, высота) в ECEF."""
@@ -38,48 +63,96 @@ class CoordinateSystem:
 
     def ecef_to_enu(self, X, Y, Z):
         """Преобразование координат из ECEF в локальную систему ENU."""
-        # Широта и долгота в радианах
-        lat0 = radians(self.lat0)
-        lon0 = radians(self.lon0)
-
-        # Матрица поворота для ENU (East, North, Up) относительно (lat0, lon0)
-        R = np.array([[-sin(lon0), cos(lon0), 0],
-                      [-sin(lat0) * cos(lon0), -sin(lat0) * sin(lon0), cos(lat0)],
-                      [cos(lat0) * cos(lon0), cos(lat0) * sin(lon0), sin(lat0)]])
-
-        # Вектор от начала координат в ECEF до текущей точки
-        dX = self.X0 - X
-        dY = self.Y0 - Y
-        dZ = self.Z0 - Z
-
-        # Получаем координаты объекта в ENU
-        enu = np.dot(R, np.array([dX, dY, dZ]))
-
-        return enu
+        return self.ecef_to_enu_batch(np.array([[X, Y, Z]], dtype=np.float64))[0]
 
     def enu_to_ecef(self, x, y, z):
-        """Преобразование координат из локальной системы ENU в ECEF."""
-        # Широта и долгота в радианах
-        lat0 = radians(self.lat0)
-        lon0 = radians(self.lon0)
-
-        # Матрица поворота для ENU (East, North, Up) относительно (lat0, lon0)
-        R = np.array([[-sin(lon0), cos(lon0), 0],
-                      [-sin(lat0) * cos(lon0), -sin(lat0) * sin(lon0), cos(lat0)],
-                      [cos(lat0) * cos(lon0), cos(lat0) * sin(lon0), sin(lat0)]])
-
-        # Преобразуем из локальной системы в глобальную
-        ecef = np.dot(R.T, np.array([x, y, z]))
-
-        return ecef
+        """
+        Поворот вектора из локальной системы ENU в оси ECEF (без переноса начала;
+        абсолютные координаты — get_object_ecef).
+        """
+        self._require_origin()
+        return self.R.T @ np.array([x, y, z], dtype=np.float64)
 
     def get_object_ecef(self, x, y, z):
         """Преобразование координат объекта из локальной системы (ENU) в глобальные (ECEF)."""
-        # Переводим координаты объекта из локальной системы ENU в глобальную систему ECEF
-        X, Y, Z = self.enu_to_ecef(x, y, z)
+        X, Y, Z = self.enu_to_ecef_batch(np.array([[x, y, z]], dtype=np.float64))[0].tolist()
+        return X, Y, Z
 
-        # Возвращаем итоговые координаты объекта в системе ECEF
-        return X + self.X0, Y + self.Y0, Z + self.Z0
+    # --- Пакетные преобразования: массивы точек (N, 3), матрица поворота из set_origin ---
+
+    @staticmethod
+    def geodetic_to_ecef_batch(llh: np.ndarray) -> np.ndarray:
+        """
+        :param llh: массив (N, 3): широта, долгота (градусы), высота над эллипсоидом (м)
+        :return: массив (N, 3) X, Y, Z
+        """
+        llh = np.asarray(llh, dtype=np.float64).reshape(-1, 3)
+        lat = np.radians(llh[:, 0])
+        lon = np.radians(llh[:, 1])
+        h = llh[:, 2]
+        sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+        N = a / np.sqrt(1 - e2 * sin_lat ** 2)
+        ecef = np.empty_like(llh)
+        ecef[:, 0] = (N + h) * cos_lat * np.cos(lon)
+        ecef[:, 1] = (N + h) * cos_lat * np.sin(lon)
+        ecef[:, 2] = (N * (1 - e2) + h) * sin_lat
+        return ecef
+
+    @staticmethod
+    def ecef_to_geodetic_batch(ecef: np.ndarray) -> np.ndarray:
+        """
+        Точное (без итераций) преобразование ECEF в геодезические координаты
+        по формулам Хейккинена; погрешность — доли миллиметра для точек у поверхности Земли.
+
+        :param ecef: массив (N, 3) X, Y, Z
+        :return: массив (N, 3): широта, долгота (градусы), высота над эллипсоидом (м)
+        """
+        ecef = np.asarray(ecef, dtype=np.float64).reshape(-1, 3)
+        X, Y, Z = ecef[:, 0], ecef[:, 1], ecef[:, 2]
+        b2 = a * a * (1 - e2)
+        b = sqrt(b2)
+        ep2 = (a * a - b2) / b2
+        r2 = X * X + Y * Y
+        r = np.sqrt(r2)
+        Z2 = Z * Z
+
+        F = 54 * b2 * Z2
+        G = r2 + (1 - e2) * Z2 - e2 * (a * a - b2)
+        c = e2 * e2 * F * r2 / G ** 3
+        s = np.cbrt(1 + c + np.sqrt(c * c + 2 * c))
+        P = F / (3 * (s + 1 / s + 1) ** 2 * G * G)
+        Q = np.sqrt(1 + 2 * e2 * e2 * P)
+        r0 = -(P * e2 * r) / (1 + Q) + np.sqrt(np.maximum(
+            0.5 * a * a * (1 + 1 / Q) - P * (1 - e2) * Z2 / (Q * (1 + Q)) - 0.5 * P * r2, 0.0))
+        U = np.sqrt((r - e2 * r0) ** 2 + Z2)
+        V = np.sqrt((r - e2 * r0) ** 2 + (1 - e2) * Z2)
+        z0 = b2 * Z / (a * V)
+
+        llh = np.empty_like(ecef)
+        llh[:, 0] = np.degrees(np.arctan2(Z + ep2 * z0, r))
+        llh[:, 1] = np.degrees(np.arctan2(Y, X))
+        llh[:, 2] = U * (1 - b2 / (a * V))
+        return llh
+
+    def ecef_to_enu_batch(self, ecef: np.ndarray) -> np.ndarray:
+        """Точки ECEF (N, 3) -> локальные ENU (N, 3) относительно начала set_origin."""
+        self._require_origin()
+        ecef = np.asarray(ecef, dtype=np.float64).reshape(-1, 3)
+        return (ecef - self.origin_ecef) @ self.R.T
+
+    def enu_to_ecef_batch(self, enu: np.ndarray) -> np.ndarray:
+        """Локальные ENU (N, 3) -> точки ECEF (N, 3)."""
+        self._require_origin()
+        enu = np.asarray(enu, dtype=np.float64).reshape(-1, 3)
+        return enu @ self.R + self.origin_ecef
+
+    def enu_to_geodetic_batch(self, enu: np.ndarray) -> np.ndarray:
+        """Локальные ENU (N, 3) -> широта, долгота (градусы), высота (м) (N, 3)."""
+        return self.ecef_to_geodetic_batch(self.enu_to_ecef_batch(enu))
+
+    def geodetic_to_enu_batch(self, llh: np.ndarray) -> np.ndarray:
+        """Широта, долгота (градусы), высота (м) (N, 3) -> локальные ENU (N, 3)."""
+        return self.ecef_to_enu_batch(self.geodetic_to_ecef_batch(llh))
 
     def geodetic_to_nmea(self, lat, lon, h):
         """Преобразование геодезических координат в строку NMEA GPGGA."""
@@ -91,36 +164,22 @@ class CoordinateSystem:
 
         # Формируем строку GPGGA
         nmea_str = f"$GPGGA,{utc_time},{lat_deg:02d}{lat_min:07.4f},{'N' if lat >= 0 else 'S'},"
-        nmea_str += f"{lon_deg:03d}{lon_min:07.4f},{'E' if lon >= 0 else 'W'},1,08,0.9,{h:.1f},M,46.9,M,,*47"
+        nmea_str += f"{lon_deg:03d}{lon_min:07.4f},{'E' if lon >= 0 else 'W'},1,08,0.9,{h:.1f},M,46.9,M,,"
 
         # Контрольная сумма
-        nmea_str += "*" + hex(sum(ord(c) for c in nmea_str[1:]) & 0xFF)[2:].upper().zfill(2)
+        from GPS.nmea_writer import nmea_checksum
+        nmea_str += "*" + nmea_checksum(nmea_str)
 
         return nmea_str
 
     def convert_enu_to_nmea(self, coordinates):
         """Преобразование массива координат ENU в NMEA строки."""
-        nmea_strings = []
-
-        for coord in coordinates:
-            x, y, z = coord
-            X, Y, Z = self.get_object_ecef(x, y, z)
-
-            # Преобразуем ECEF в геодезические координаты
-            lat, lon, h = self.ecef_to_geodetic(X, Y, Z)
-
-            # Получаем строку NMEA
-            nmea_str = self.geodetic_to_nmea(lat, lon, h)
-            nmea_strings.append(nmea_str)
-
-        return nmea_strings
+        geodetic = self.enu_to_geodetic_batch(np.asarray(coordinates, dtype=np.float64))
+        return [self.geodetic_to_nmea(lat, lon, h) for lat, lon, h in geodetic.tolist()]
 
     def ecef_to_geodetic(self, X, Y, Z):
-        """Преобразование ECEF в геодезические координаты."""
-        p = sqrt(X ** 2 + Y ** 2)
-        lat = degrees(np.arctan2(Z, p * (1 - e2)))
-        lon = degrees(np.arctan2(Y, X))
-        h = 0  # Пример: добавим высоту как 0, для упрощения. Реальное значение можно найти через итерации.
+        """Преобразование ECEF в геодезические координаты (широта, долгота в градусах, высота в м)."""
+        lat, lon, h = self.ecef_to_geodetic_batch(np.array([[X, Y, Z]], dtype=np.float64))[0].tolist()
         return lat, lon, h
 
 
@@ -0,0 +1,309 @@
+import shutil
+import threading
+import time
+from typing import Callable, Optional
+
+
+class RingBuffer:
+    """
+    Кольцевой буфер байтов фиксированного размера для одного писателя и одного читателя.
+
+    Писатель получает непрерывный свободный участок (writable) и читает в него данные
+    напрямую, без промежуточных копий; читатель так же получает непрерывный участок данных
+    (readable). Когда буфер полон, writable ждёт читателя — это и есть обратное давление:
+    писатель перестаёт забирать данные у своего источника.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._data = bytearray(size)
+        self._view = memoryview(self._data)
+        self._start = 0
+        self._count = 0
+        self._closed = False      # писатель закончил: читатель дочитывает остаток
+        self._aborted = False     # читатель ушёл: писатель должен остановиться
+        self._condition = threading.Condition()
+        self.high_water = 0
+
+    @property
+    def available(self) -> int:
+        with self._condition:
+            return self._count
+
+    def writable(self, limit: int) -> Optional[memoryview]:
+        """Свободный непрерывный участок не длиннее limit; None, если читатель ушёл."""
+        with self._condition:
+            while self._count == self.size and not self._aborted:
+                self._condition.wait()
+            if self._aborted:
+                return None
+            end = (self._start + self._count) % self.size
+            length = min(limit, self.size - self._count, self.size - end)
+            return self._view[end:end + length]
+
+    def commit_write(self, n: int):
+        with self._condition:
+            self._count += n
+            self.high_water = max(self.high_water, self._count)
+            self._condition.notify_all()
+
+    def readable(self, limit: int) -> Optional[memoryview]:
+        """Непрерывный участок данных не длиннее limit; None, когда данные кончились."""
+        with self._condition:
+            while self._count == 0 and not self._closed and not self._aborted:
+                self._condition.wait()
+            if self._count == 0 or self._aborted:
+                return None
+            length = min(limit, self._count, self.size - self._start)
+            return self._view[self._start:self._start + length]
+
+    def commit_read(self, n: int):
+        with self._condition:
+            self._start = (self._start + n) % self.size
+            self._count -= n
+            self._condition.notify_all()
+
+    def wait_for(self, n: int, timeout: Optional[float] = None) -> bool:
+        """Ждёт, пока в буфере наберётся n байт (или писатель закончит); False — читать нечего."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._count >= n or self._closed or self._aborted, timeout)
+            return self._count > 0 and not self._aborted
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def abort(self):
+        with self._condition:
+            self._aborted = True
+            self._condition.notify_all()
+
+
+class IQStreamPipeline:
+    """
+    Передача выхода gps-sdr-sim в hackrf_transfer без файла на диске.
+
+    gps-sdr-sim пишет I/Q в stdout (-o -), hackrf_transfer читает их из stdin (-t -);
+    между ними — RingBuffer фиксированного размера и два потока. hackrf_transfer
+    запускается, как только в буфере набирается prefill_bytes (один блок генерации),
+    а не после записи всего файла. Передача идёт в реальном времени, поэтому буфер
+    заполняется, после чего поток чтения перестаёт забирать stdout и gps-sdr-sim
+    ждёт на записи — память ограничена buffer_bytes.
+    """
+
+    def __init__(self, gps_runner, hackrf_runner, buffer_bytes: int = 1 << 25,
+                 chunk_bytes: int = 1 << 19, prefill_bytes: int = 1 << 20,
+                 on_error: Optional[Callable[[str], None]] = None):
+        """
+        :param gps_runner: GPSProcessRunner с output_file=STREAM
+        :param hackrf_runner: HackRFTransferRunner с input_file=STREAM
+        :param buffer_bytes: размер кольцевого буфера (32 МБ ≈ 6 с при 2.6 Мвыб/с, 8 бит I/Q)
+        :param chunk_bytes: наибольший блок одной операции чтения или записи
+        :param prefill_bytes: сколько накопить до запуска hackrf_transfer
+        :param on_error: вызывается (из потока передачи) с описанием ошибки, если передача
+                         сорвалась: hackrf_transfer не запустился или завершился с ошибкой,
+                         gps-sdr-sim завершился до начала передачи или с ненулевым кодом
+        """
+        self.gps_runner = gps_runner
+        self.hackrf_runner = hackrf_runner
+        self.ring = RingBuffer(buffer_bytes)
+        self.chunk_bytes = chunk_bytes
+        self.prefill_bytes = min(prefill_bytes, buffer_bytes)
+        self.on_error = on_error
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.first_sample_delay: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        # Описание сбоя передачи (то же, что передаётся в on_error); None — передача прошла
+        self.failure: Optional[str] = None
+        self._threads = []
+        self._started_at = 0.0
+        self._terminated = False
+
+    def start(self):
+        """
+        Запускает gps-sdr-sim и потоки передачи; возвращается сразу.
+        Отсутствие hackrf_transfer обнаруживается здесь же (FileNotFoundError),
+        до запуска gps-sdr-sim.
+        """
+        executable = getattr(self.hackrf_runner, "executable", None)
+        if executable is not None and shutil.which(executable) is None:
+            raise FileNotFoundError(f"Утилита {executable} не найдена. "
+                                    f"Убедитесь, что HackRF Tools установлены и добавлены в PATH.")
+        self._started_at = time.perf_counter()
+        self.gps_runner.start()
+        self._threads = [
+            threading.Thread(target=self._produce, daemon=True),
+            threading.Thread(target=self._supervise, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _produce(self):
+        """stdout gps-sdr-sim -> буфер (readinto1 — сразу в свободный участок буфера)."""
+        stdout = self.gps_runner.process.stdout
+        try:
+            while True:
+                view = self.ring.writable(self.chunk_bytes)
+                if view is None:
+                    # hackrf_transfer остановлен: закрытый канал завершит и gps-sdr-sim
+                    stdout.close()
+                    break
+                n = stdout.readinto1(view)
+                if not n:
+                    break
+                self.ring.commit_write(n)
+                self.bytes_in += n
+        except (OSError, ValueError) as e:
+            self._fail(e)
+        finally:
+            self.ring.close()
+
+    def _consume(self):
+        """Буфер -> stdin hackrf_transfer; hackrf_transfer запускается после предзаполнения."""
+        try:
+            if not self.ring.wait_for(self.prefill_bytes):
+                return
+            self.hackrf_runner.start()
+            stdin = self.hackrf_runner.process.stdin
+            while True:
+                view = self.ring.readable(self.chunk_bytes)
+                if view is None:
+                    break
+                stdin.write(view)
+                stdin.flush()
+                if self.first_sample_delay is None:
+                    self.first_sample_delay = time.perf_counter() - self._started_at
+                    print(f"[+] Первый блок I/Q передан в hackrf_transfer через "
+                          f"{self.first_sample_delay:.2f} с")
+                self.ring.commit_read(len(view))
+                self.bytes_out += len(view)
+            stdin.close()
+        except BrokenPipeError:
+            # hackrf_transfer завершился (остановлен или ошибка устройства) — код проверит _supervise
+            self.ring.abort()
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+    def _supervise(self):
+        """Передача, затем проверка кодов возврата обоих процессов и сообщение о сбое."""
+        self._consume()
+        self._threads[0].join()
+        gps_code = self.gps_runner.process.wait()
+        hackrf_process = self.hackrf_runner.process
+        hackrf_code = hackrf_process.wait() if hackrf_process is not None else None
+        if self._terminated:
+            return
+        failure = self._describe_failure(gps_code, hackrf_code)
+        if failure is not None:
+            self.failure = failure
+            print(f"[!] {failure}")
+            if self.on_error is not None:
+                self.on_error(failure)
+
+    def _describe_failure(self, gps_code: int, hackrf_code: Optional[int]) -> Optional[str]:
+        if self.error is not None:
+            message = f"Ошибка потоковой передачи I/Q: {self.error}"
+        elif hackrf_code is None:
+            message = f"gps-sdr-sim завершился с кодом {gps_code}, не выдав данных для передачи"
+        elif hackrf_code != 0:
+            message = f"hackrf_transfer завершился с кодом {hackrf_code}"
+        elif gps_code != 0:
+            message = f"gps-sdr-sim завершился с кодом {gps_code}"
+        elif self.bytes_out < self.bytes_in:
+            message = "hackrf_transfer остановился до окончания передачи"
+        else:
+            return None
+        for label, runner in (("gps-sdr-sim", self.gps_runner), ("hackrf_transfer", self.hackrf_runner)):
+            tail = list(getattr(runner, "stderr_tail", ()))
+            if tail:
+                message += f"\n[{label}] " + f"\n[{label}] ".join(tail)
+        return message
+
+    def _fail(self, error: BaseException):
+        self.error = error
+        self.ring.abort()
+
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def wait(self):
+        """Ждёт окончания передачи и обоих процессов; возвращает коды возврата."""
+        for thread in self._threads:
+            thread.join()
+        gps_code = self.gps_runner.wait()
+        hackrf_code = self.hackrf_runner.wait() if self.hackrf_runner.process else None
+        print(f"[+] Передано {self.bytes_out / 2 ** 20:.1f} МБ I/Q, "
+              f"наибольшее заполнение буфера {self.ring.high_water / 2 ** 20:.1f} МБ")
+        return gps_code, hackrf_code
+
+    def terminate(self):
+        self._terminated = True
+        self.ring.abort()
+        for runner in (self.hackrf_runner, self.gps_runner):
+            if runner.is_running():
+                runner.terminate()
+
+
+if __name__ == "__main__":
+    import subprocess
+    import sys
+
+    # Заместители: «gps-sdr-sim» выдаёт блоки по 0.1 с (520 000 байт) так быстро, как может,
+    # «hackrf_transfer» забирает их в реальном времени (5.2 МБ/с) и проверяет содержимое
+    _PRODUCER = r"""
+import sys
+block = bytes(range(256)) * (520000 // 256) + bytes(range(520000 % 256))
+try:
+    for _ in range(int(sys.argv[1])):
+        sys.stdout.buffer.write(block)
+except BrokenPipeError:
+    pass
+"""
+    _CONSUMER = r"""
+import sys, time
+block = bytes(range(256)) * (520000 // 256) + bytes(range(520000 % 256))
+data, start, total, bad = bytearray(), time.perf_counter(), 0, 0
+while chunk := sys.stdin.buffer.read(65536):
+    data += chunk
+    while len(data) >= len(block):
+        bad += data[:len(block)] != block
+        del data[:len(block)]
+        total += 1
+        time.sleep(max(0.0, start + total * 0.1 - time.perf_counter()))
+print(f"блоков: {total}, испорченных: {bad}, остаток: {len(data)}")
+"""
+
+    class _StandIn:
+        def __init__(self, code, *args):
+            self.command = [sys.executable, "-c", code, *args]
+            self.process = None
+
+        def start(self):
+            self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        def is_running(self):
+            return self.process is not None and self.process.poll() is None
+
+        def wait(self):
+            self.process.wait()
+            if self.process.stdout and not self.process.stdout.closed:
+                out = self.process.stdout.read()
+                if out:
+                    print(out.decode().strip())
+            return self.process.returncode
+
+        def terminate(self):
+            self.process.terminate()
+
+    pipeline = IQStreamPipeline(_StandIn(_PRODUCER, "30"), _StandIn(_CONSUMER), buffer_bytes=1 << 22)
+    pipeline.start()
+    print(f"[+] Коды возврата: {pipeline.wait()}, сбой: {pipeline.failure}")
+
+    # Приёмник, который уходит после первого мегабайта с кодом 1 (как hackrf_transfer без устройства)
+    failed = IQStreamPipeline(_StandIn(_PRODUCER, "30"),
+                              _StandIn("import sys; sys.stdin.buffer.read(1 << 20); sys.exit(1)"),
+                              buffer_bytes=1 << 22, on_error=lambda message: print(f"[on_error] {message}"))
+    failed.start()
+    print(f"[+] Коды возврата: {failed.wait()}")
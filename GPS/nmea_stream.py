@@ -0,0 +1,228 @@
+import errno
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+from typing import BinaryIO, Iterable, Optional
+
+# Путь, по которому процесс читает NMEA из своего stdin (только POSIX)
+STDIN_PATH = "/dev/stdin"
+
+
+class NMEAPipe:
+    """
+    Канал, через который gps-sdr-sim читает NMEA по мере формирования, без файла на диске.
+
+    Строки берутся из итератора блоков байтов (например, iter_nmea_trajectory) в отдельном
+    потоке и пишутся в именованный канал: FIFO в POSIX, \\\\.\\pipe\\... в Windows.
+    Путь канала передаётся gps-sdr-sim в -g вместо nmea_strings.txt. Запись блокируется,
+    пока читатель не заберёт предыдущие данные, поэтому в памяти не больше одного блока.
+    В режиме use_stdin блоки пишутся в stdin процесса, а ему передаётся /dev/stdin.
+
+    gps-sdr-sim читает траекторию до своего предела числа точек и закрывает канал —
+    это не ошибка: поток записи останавливается и итератор больше не продвигается.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], use_stdin: bool = False, buffer_size: int = 1 << 16):
+        """
+        :param chunks: итератор блоков NMEA-текста
+        :param use_stdin: писать в stdin процесса (путь /dev/stdin) вместо именованного канала
+        :param buffer_size: размер буфера канала Windows
+        """
+        if use_stdin and os.name == "nt":
+            raise OSError("Чтение NMEA из stdin поддерживается только в POSIX; используйте именованный канал")
+        self.chunks = chunks
+        self.use_stdin = use_stdin
+        self.buffer_size = buffer_size
+        self.bytes_written = 0
+        self.error: Optional[BaseException] = None
+        self._directory = None
+        self._handle = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        if use_stdin:
+            self.path = STDIN_PATH
+        elif os.name == "nt":
+            self.path = rf"\\.\pipe\gps-sdr-sim-nmea-{uuid.uuid4().hex[:8]}"
+        else:
+            self._directory = tempfile.mkdtemp(prefix="gps-sdr-sim-")
+            self.path = os.path.join(self._directory, "nmea.fifo")
+            os.mkfifo(self.path)
+
+    def start(self, stdin: Optional[BinaryIO] = None):
+        """
+        Запускает поток записи. Для именованного канала вызывается до запуска читателя
+        (поток ждёт его подключения); для use_stdin — с stdin запущенного процесса.
+        """
+        if self.use_stdin and stdin is None:
+            raise ValueError("Для use_stdin нужен stdin запущенного процесса")
+        if os.name == "nt" and not self.use_stdin:
+            # Канал должен существовать до того, как читатель попытается его открыть
+            self._handle = _create_windows_pipe(self.path, self.buffer_size)
+        self._thread = threading.Thread(target=self._run, args=(stdin,), daemon=True)
+        self._thread.start()
+
+    def _run(self, stdin: Optional[BinaryIO]):
+        try:
+            if stdin is not None:
+                self._pump(stdin)
+            elif os.name == "nt":
+                with _connect_windows_pipe(self._handle) as stream:
+                    self._pump(stream)
+            else:
+                with open(self.path, "wb", buffering=0) as stream:
+                    self._pump(stream)
+        except BaseException as e:
+            if not _reader_closed(e):
+                self.error = e
+                print(f"[!] Ошибка записи NMEA в канал: {e}")
+
+    def _pump(self, stream: BinaryIO):
+        try:
+            for chunk in self.chunks:
+                if self._stop.is_set():
+                    break
+                stream.write(chunk)
+                self.bytes_written += len(chunk)
+        finally:
+            try:
+                stream.close()
+            except OSError:
+                pass
+        print(f"[+] Передано в канал NMEA: {self.bytes_written} байт")
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def close(self):
+        """Останавливает запись (в том числе если читатель так и не открыл канал) и удаляет FIFO."""
+        self._stop.set()
+        if self.is_running() and not self.use_stdin:
+            # Открытие канала со стороны читателя разблокирует поток, ждущий подключения
+            try:
+                if os.name == "nt":
+                    open(self.path, "rb").close()
+                else:
+                    os.close(os.open(self.path, os.O_RDONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+        self.join(5.0)
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def __enter__(self) -> "NMEAPipe":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _reader_closed(error: BaseException) -> bool:
+    """Читатель закрыл канал (в Windows запись в такой канал даёт EINVAL)."""
+    return isinstance(error, BrokenPipeError) or \
+        isinstance(error, OSError) and error.errno in (errno.EPIPE, errno.EINVAL)
+
+
+def _kernel32():
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateNamedPipeW.restype = wintypes.HANDLE
+    kernel32.CreateNamedPipeW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+                                          wintypes.DWORD, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID]
+    kernel32.ConnectNamedPipe.argtypes = [wintypes.HANDLE, wintypes.LPVOID]
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    return kernel32
+
+
+def _create_windows_pipe(path: str, buffer_size: int) -> int:
+    """Создаёт серверный конец именованного канала Windows (до запуска читателя)."""
+    import ctypes
+    from ctypes import wintypes
+
+    PIPE_ACCESS_OUTBOUND = 0x00000002
+    PIPE_TYPE_BYTE_WAIT = 0x00000000
+    handle = _kernel32().CreateNamedPipeW(path, PIPE_ACCESS_OUTBOUND, PIPE_TYPE_BYTE_WAIT, 1,
+                                          buffer_size, buffer_size, 0, None)
+    if handle in (None, wintypes.HANDLE(-1).value):
+        raise ctypes.WinError(ctypes.get_last_error())
+    return handle
+
+
+def _connect_windows_pipe(handle: int) -> BinaryIO:
+    """Ждёт подключения читателя и возвращает канал как файл для записи."""
+    import ctypes
+    import msvcrt
+
+    ERROR_PIPE_CONNECTED = 535
+    kernel32 = _kernel32()
+    if not kernel32.ConnectNamedPipe(handle, None) and ctypes.get_last_error() != ERROR_PIPE_CONNECTED:
+        error = ctypes.get_last_error()
+        kernel32.CloseHandle(handle)
+        raise ctypes.WinError(error)
+    return os.fdopen(msvcrt.open_osfhandle(handle, 0), "wb", buffering=0)
+
+
+# Заместитель gps-sdr-sim для проверки канала: читает файл из -g построчно,
+# берёт только $GPGGA, проверяет контрольные суммы и останавливается на пределе точек
+_STAND_IN_CONSUMER = r"""
+import sys
+path, limit = sys.argv[1], int(sys.argv[2])
+count = bad = 0
+with open(path, "rb") as f:
+    for line in f:
+        if not line.startswith(b"$GPGGA"):
+            continue
+        body, _, checksum = line.strip()[1:].partition(b"*")
+        value = 0
+        for byte in body:
+            value ^= byte
+        bad += f"{value:02X}".encode() != checksum
+        count += 1
+        if count >= limit:
+            break
+print(f"GGA: {count}, ошибок контрольной суммы: {bad}")
+"""
+
+
+if __name__ == "__main__":
+    import subprocess
+    import time
+    from datetime import datetime, timezone
+
+    import numpy as np
+
+    from GPS.coord_transformation import CoordinateSystem
+    from GPS.nmea_writer import iter_nmea_trajectory
+    from Simulation.Trajectory import Trajectory
+
+    coords = CoordinateSystem()
+    coords.set_origin(55.0, 37.0, 0.0)
+    t = np.arange(0.0, 10 * 3600.0, 0.5)   # 10 часов — файл занял бы ~50 МБ
+    trajectory = Trajectory.from_columns(t, np.column_stack([t * 50.0, 1000.0 * np.sin(t / 100.0), 1000.0 + 0 * t]))
+
+    for use_stdin in (False, True):
+        chunks = iter_nmea_trajectory(trajectory, coords, datetime.now(timezone.utc), 0.1,
+                                      lead_in_sec=5.0, chunk_points=1 << 12)
+        with NMEAPipe(chunks, use_stdin=use_stdin) as pipe:
+            start = time.perf_counter()
+            if not use_stdin:
+                pipe.start()
+            # Как gps-sdr-sim: 3000 точек (300 с при 10 Гц)
+            consumer = subprocess.Popen([sys.executable, "-c", _STAND_IN_CONSUMER, pipe.path, "3000"],
+                                        stdin=subprocess.PIPE if use_stdin else None)
+            if use_stdin:
+                pipe.start(consumer.stdin)
+            consumer.wait()
+            pipe.join()
+            print(f"[+] {'stdin' if use_stdin else 'FIFO'}: {pipe.path}, "
+                  f"{(time.perf_counter() - start) * 1e3:.0f} мс, ошибка: {pipe.error}")
@@ -0,0 +1,253 @@
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from GPS.coord_transformation import trajectory_to_enu
+
+# Метры в секунду -> узлы
+KNOTS_PER_MPS = 3600.0 / 1852.0
+
+_HEX = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+
+def _const(text: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Одинаковый во всех строках фрагмент text."""
+    chars = np.broadcast_to(np.frombuffer(text.encode("ascii"), dtype=np.uint8), (n, len(text)))
+    return chars, np.ones(chars.shape, dtype=bool)
+
+
+def _digits(values: np.ndarray, width: int) -> np.ndarray:
+    """Десятичные цифры неотрицательных целых (N,) как ASCII-коды (N, width), с ведущими нулями."""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return (values[:, None] // powers % 10 + ord("0")).astype(np.uint8)
+
+
+def _fixed(values: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Целые (N,) ровно в width цифр с ведущими нулями (поля времени, градусов и т. п.)."""
+    chars = _digits(values, width)
+    return chars, np.ones(chars.shape, dtype=bool)
+
+
+def _number(values: np.ndarray, decimals: int, int_width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Число с decimals знаками после точки без ведущих нулей (как f"{v:.{decimals}f}").
+    Поле занимает в матрице 1 + int_width + 1 + decimals столбцов; лишние
+    (знак у положительных, ведущие нули) помечаются как отсутствующие.
+    """
+    scaled = np.rint(np.asarray(values, dtype=np.float64) * 10 ** decimals).astype(np.int64)
+    negative = scaled < 0
+    scaled = np.minimum(np.abs(scaled), 10 ** (int_width + decimals) - 1)
+    integer, fraction = np.divmod(scaled, 10 ** decimals)
+    n = len(scaled)
+    length = 1 + sum((integer >= 10 ** k).astype(np.int64) for k in range(1, int_width))
+
+    chars = np.empty((n, 2 + int_width + decimals), dtype=np.uint8)
+    chars[:, 0] = ord("-")
+    chars[:, 1:1 + int_width] = _digits(integer, int_width)
+    chars[:, 1 + int_width] = ord(".")
+    chars[:, 2 + int_width:] = _digits(fraction, decimals)
+    mask = np.ones(chars.shape, dtype=bool)
+    mask[:, 0] = negative
+    mask[:, 1:1 + int_width] = np.arange(int_width)[None, :] >= (int_width - length)[:, None]
+    return chars, mask
+
+
+def _coordinate(degrees: np.ndarray, degree_width: int, positive: str, negative: str):
+    """Поля ddmm.mmmm,N (или dddmm.mmmm,E): минуты округляются до 1e-4 с переносом в градусы."""
+    units = np.rint(np.abs(degrees) * 600000.0).astype(np.int64)   # 1e-4 минуты
+    whole, minutes = np.divmod(units, 600000)
+    n = len(degrees)
+    pieces = [
+        _fixed(whole, degree_width),
+        _fixed(minutes // 10000, 2),
+        _const(".", n),
+        _fixed(minutes % 10000, 4),
+        _const(",", n),
+    ]
+    hemisphere = np.where(degrees >= 0, ord(positive), ord(negative)).astype(np.uint8)[:, None]
+    pieces.append((hemisphere, np.ones(hemisphere.shape, dtype=bool)))
+    return pieces
+
+
+def _time_fields(centiseconds: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """hhmmss.ss по числу сотых долей секунды от полуночи (по модулю суток)."""
+    day = centiseconds % 8640000
+    n = len(day)
+    return [
+        _fixed(day // 360000, 2),
+        _fixed(day // 6000 % 60, 2),
+        _fixed(day // 100 % 60, 2),
+        _const(".", n),
+        _fixed(day % 100, 2),
+    ]
+
+
+def _assemble(pieces: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Склеивает фрагменты в матрицу строк (N, W) и дописывает контрольную сумму *hh и перевод строки.
+    Контрольная сумма — XOR байтов между '$' и '*'; отсутствующие ячейки обнуляются и на неё не влияют.
+    """
+    chars = np.concatenate([p[0] for p in pieces], axis=1)
+    mask = np.concatenate([p[1] for p in pieces], axis=1)
+    checksum = np.bitwise_xor.reduce(np.where(mask[:, 1:], chars[:, 1:], 0), axis=1)
+    n = len(chars)
+    tail = np.empty((n, 4), dtype=np.uint8)
+    tail[:, 0] = ord("*")
+    tail[:, 1] = _HEX[checksum >> 4]
+    tail[:, 2] = _HEX[checksum & 15]
+    tail[:, 3] = ord("\n")
+    return np.concatenate([chars, tail], axis=1), np.concatenate([mask, np.ones(tail.shape, dtype=bool)], axis=1)
+
+
+def _start_centiseconds(start: datetime) -> int:
+    return ((start.hour * 60 + start.minute) * 60 + start.second) * 100 + start.microsecond // 10000
+
+
+def gga_lines(times: np.ndarray, llh: np.ndarray, start: datetime) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Строки $GPGGA для всех точек сразу.
+
+    :param times: смещения от start, с (N,)
+    :param llh: широта, долгота (градусы), высота (м) (N, 3)
+    :return: матрица байтов (N, W) и маска занятых ячеек
+    """
+    llh = np.asarray(llh, dtype=np.float64).reshape(-1, 3)
+    n = len(llh)
+    centiseconds = _start_centiseconds(start) + np.rint(np.asarray(times, dtype=np.float64) * 100).astype(np.int64)
+    pieces = [_const("$GPGGA,", n), *_time_fields(centiseconds), _const(",", n)]
+    pieces += _coordinate(llh[:, 0], 2, "N", "S") + [_const(",", n)]
+    pieces += _coordinate(llh[:, 1], 3, "E", "W")
+    pieces += [_const(",1,08,0.9,", n), _number(llh[:, 2], 1, 6), _const(",M,0.0,M,,", n)]
+    return _assemble(pieces)
+
+
+def rmc_lines(times: np.ndarray, llh: np.ndarray, velocities: np.ndarray,
+              start: datetime) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Строки $GPRMC: скорость (узлы) и путевой угол (градусы от севера) — по горизонтальной
+    скорости в осях ENU, дата — с учётом перехода через полночь.
+
+    :param velocities: скорости (N, 3) в осях ENU, м/с
+    """
+    llh = np.asarray(llh, dtype=np.float64).reshape(-1, 3)
+    velocities = np.asarray(velocities, dtype=np.float64).reshape(-1, 3)
+    n = len(llh)
+    centiseconds = _start_centiseconds(start) + np.rint(np.asarray(times, dtype=np.float64) * 100).astype(np.int64)
+    dates = np.datetime64(start.date(), "D") + centiseconds // 8640000
+    months = dates.astype("datetime64[M]")
+    day = (dates - months).astype(np.int64) + 1
+    month = months.astype(np.int64) % 12 + 1
+    year = (dates.astype("datetime64[Y]").astype(np.int64) + 1970) % 100
+
+    speed = np.hypot(velocities[:, 0], velocities[:, 1]) * KNOTS_PER_MPS
+    course = np.degrees(np.arctan2(velocities[:, 0], velocities[:, 1])) % 360.0
+    course = np.where(np.rint(course * 10) >= 3600, 0.0, course)
+
+    pieces = [_const("$GPRMC,", n), *_time_fields(centiseconds), _const(",A,", n)]
+    pieces += _coordinate(llh[:, 0], 2, "N", "S") + [_const(",", n)]
+    pieces += _coordinate(llh[:, 1], 3, "E", "W")
+    pieces += [_const(",", n), _number(speed, 1, 5), _const(",", n), _number(course, 1, 3), _const(",", n),
+               _fixed(day, 2), _fixed(month, 2), _fixed(year, 2), _const(",,,A", n)]
+    return _assemble(pieces)
+
+
+def format_nmea(times: np.ndarray, llh: np.ndarray, start: datetime,
+                velocities: Optional[np.ndarray] = None) -> bytes:
+    """
+    Текст NMEA для всей траектории одним буфером: строки собираются матрицей байтов,
+    пустые ячейки отбрасываются одной выборкой по маске.
+
+    :param times: смещения от start, с (N,)
+    :param llh: широта, долгота (градусы), высота (м) (N, 3)
+    :param start: время (UTC) нулевого смещения
+    :param velocities: скорости ENU (N, 3); если заданы, после каждой GGA идёт RMC
+    """
+    chars, mask = gga_lines(times, llh, start)
+    if velocities is not None:
+        rmc_chars, rmc_mask = rmc_lines(times, llh, velocities, start)
+        width = max(chars.shape[1], rmc_chars.shape[1])
+        n = len(chars)
+        both = np.zeros((n, 2, width), dtype=np.uint8)
+        both_mask = np.zeros((n, 2, width), dtype=bool)
+        both[:, 0, :chars.shape[1]], both_mask[:, 0, :chars.shape[1]] = chars, mask
+        both[:, 1, :rmc_chars.shape[1]], both_mask[:, 1, :rmc_chars.shape[1]] = rmc_chars, rmc_mask
+        chars, mask = both.reshape(2 * n, width), both_mask.reshape(2 * n, width)
+    return chars[mask].tobytes()
+
+
+def write_nmea(path: str, times: np.ndarray, llh: np.ndarray, start: datetime,
+               velocities: Optional[np.ndarray] = None) -> int:
+    """
+    Записывает format_nmea в файл одним вызовом write.
+
+    :return: число точек
+    """
+    data = format_nmea(times, llh, start, velocities)
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(np.asarray(times))
+
+
+def iter_nmea_trajectory(trajectory, coords, start: datetime, step_sec: float = 0.1,
+                         lead_in_sec: float = 0.0, hold_sec: float = 0.0, chunk_points: int = 1 << 14,
+                         rmc: bool = True) -> Iterator[bytes]:
+    """
+    Текст NMEA по траектории блоками по chunk_points точек на сетке step_sec.
+
+    Точка k имеет смещение k * step_sec от start. Первые lead_in_sec секунд —
+    неподвижная стартовая точка, затем траектория (её t0 приходится на start + lead_in_sec),
+    затем hold_sec секунд — неподвижная конечная точка. Положения берутся из траектории
+    только для текущего блока, поэтому память не зависит от длительности сценария.
+
+    :param trajectory: Trajectory; ось x — на север, y — на восток, z — вверх (trajectory_to_enu)
+    :param coords: CoordinateSystem с началом координат в точке пуска
+    :param rmc: добавлять строки RMC со скоростью и курсом
+    """
+    if not len(trajectory):
+        return
+    t0 = float(trajectory.t[0])
+    lead = int(round(lead_in_sec / step_sec))
+    points = int(np.floor((float(trajectory.t[-1]) - t0) / step_sec + 1e-9)) + 1
+    total = lead + points + int(round(hold_sec / step_sec))
+
+    for first in range(0, total, chunk_points):
+        k = np.arange(first, min(first + chunk_points, total), dtype=np.int64)
+        i = k - lead
+        moving = (i >= 0) & (i < points)
+        times = t0 + np.clip(i, 0, points - 1) * step_sec
+        llh = coords.enu_to_geodetic_batch(trajectory_to_enu(trajectory.positions_at(times)))
+        velocities = None
+        if rmc:
+            velocities = np.where(moving[:, None], trajectory_to_enu(trajectory.velocities_at(times)), 0.0)
+        yield format_nmea(k * step_sec, llh, start, velocities)
+
+
+def nmea_checksum(sentence: str) -> str:
+    """Контрольная сумма одной строки (XOR символов между '$' и '*')."""
+    body = sentence.strip().lstrip("$").split("*")[0]
+    value = 0
+    for byte in body.encode("ascii"):
+        value ^= byte
+    return f"{value:02X}"
+
+
+if __name__ == "__main__":
+    import time
+    from datetime import timezone
+
+    from GPS.coord_transformation import CoordinateSystem
+
+    coords = CoordinateSystem()
+    coords.set_origin(55.0, 37.0, 0.0)
+    times = np.arange(300000) * 0.1                      # 30 000 с при 10 Гц
+    enu = np.column_stack([times * 100.0, np.sin(times / 50.0) * 2000.0, 1000.0 + 10.0 * times % 5000.0])
+
+    start = time.perf_counter()
+    llh = coords.enu_to_geodetic_batch(enu)
+    velocities = np.gradient(enu, times, axis=0)
+    data = format_nmea(times, llh, datetime.now(timezone.utc), velocities)
+    print(f"[+] {len(times)} точек -> {len(data) / 2 ** 20:.1f} МБ NMEA за {(time.perf_counter() - start) * 1e3:.0f} мс")
+    first = data.split(b"\n", 2)
+    print(first[0].decode(), first[1].decode(), sep="\n")
+    assert all(nmea_checksum(line) == line[-2:] for line in (first[0].decode(), first[1].decode()))
@@ -1,13 +1,26 @@
 import time
 
-from PyQt6.QtCore import QObject, QTimer
+import numpy as np
+from PyQt6.QtCore import QObject, QTimer, QThreadPool, pyqtSignal
 
 
 from MVC.Model import Model
+from MVC.TrajectoryWorker import TrajectoryWorker
 from MVC.View import View
+from Simulation.Decimation import simplify
+from Simulation.InverseSolver import solve_launch_parameters
+from Simulation.GuidedFlight import iter_guided_flight_euler
+from Simulation.ManeuveringTrajectory import iter_compute_trajectory
+from Simulation.Trajectory import Trajectory
+
+# Допустимое отклонение сохранённой в файл траектории от рассчитанной, м
+SAVE_TOLERANCE = 0.01
 
 
 class Controller(QObject):
+    # Сбой передачи I/Q (из потока IQStreamPipeline, доставляется в поток GUI)
+    translation_failed = pyqtSignal(str)
+
     def __init__(self, model: Model, view: View):
         super().__init__()
 
@@ -16,9 +29,23 @@ class Controller(QObject):
         self.model = model
         self.view = view
 
+        # Фоновый расчёт: выполняется только последний запрос, предыдущие отменяются
+        self.thread_pool = QThreadPool.globalInstance()
+        self._generation = 0
+        self._active_worker = None
+        self._streaming_generation = None
+        self._solver_worker = None
+        self._solver_generation = 0
+        # Передача gps-sdr-sim -> hackrf_transfer через буфер в памяти (IQStreamPipeline)
+        self.iq_pipeline = None
+        self._stop_animation = None
+        self.translation_failed.connect(self._on_translation_failed)
 
 
         self.model.trajectory_changed.connect(self.view.update_trajectory)
+        self.model.trajectory_started.connect(self.view.begin_trajectory)
+        self.model.trajectory_extended.connect(self.view.extend_trajectory)
+        self.model.trajectory_previewed.connect(self.view.preview_trajectory)
 
         self.view.a_loadTrajectory.triggered.connect(self.load_trajectory)
         self.view.a_saveTrajectory.triggered.connect(self.save_trajectory)
@@ -26,6 +53,7 @@ class Controller(QObject):
         self.view.a_showTranslation.triggered.connect(self.view.show_translate_page)
         self.view.a_showGenerateStraightTrajectory.triggered.connect(self.view.show_generate_straight_trajectory_page)
         self.view.connect_to_change_trajectory_parameters(self.calculate_trajectory)
+        self.view.a_solveLaunchParameters.triggered.connect(self.solve_launch_parameters)
         self.view.p_translateSignal.GTO.pB_start_translation.clicked.connect(self.start_translation)
         # self.view.p_generateStraightTrajectory.pB_calculate_trajectory
         self.view.p_generateStraightTrajectory.GTO.pB_generate.clicked.connect(self.calculate_straight_trajectory)
@@ -42,7 +70,17 @@ class Controller(QObject):
         maneuverability = self.view.get_maneuverability()
         drag_coefficient = self.view.get_drag_coefficient()
 
-        self.model.compute_trajectory(distance, v0, angle_surface, angle_target, maneuverability, drag_coefficient)
+        # Пока идёт расчёт, показываем траекторию из таблицы предпросмотра (если есть)
+        self.model.preview_trajectory(
+            distance=distance, v0=v0, angle_surface_deg=angle_surface, angle_target_deg=angle_target,
+            maneuverability=maneuverability, drag_coefficient=drag_coefficient
+        )
+        self.submit_trajectory(
+            iter_compute_trajectory,
+            distance=distance, v0=v0, angle_surface_deg=angle_surface, angle_target_deg=angle_target,
+            maneuverability=maneuverability, drag_coefficient=drag_coefficient,
+            g=self.model.g, dt=self.model.dt, terrain=self.model.terrain
+        )
 
     def new_calculate_trajectory(self):
         start_point = self.view.p_newGenerateTrajectory.get_start_point()
@@ -57,7 +95,119 @@ class Controller(QObject):
         air_density = self.view.p_newGenerateTrajectory.get_air_density()
         precession_control_coefficient = self.view.p_newGenerateTrajectory.get_precession_control_coefficient()
 
-        self.model.simulate_guided_flight_with_strong_control(start_point, end_point, velocity, start_horizontal_angle, start_vertical_angle, weight, frontal_cross_sectional_area, resistance_coefficient, air_density,0.4,300,0.1, precession_control_coefficient)
+        self.submit_trajectory(
+            iter_guided_flight_euler,
+            r0=start_point, r_target=end_point, v0=velocity,
+            theta0_deg=start_horizontal_angle, phi0_deg=start_vertical_angle,
+            mass=weight, S=frontal_cross_sectional_area, C_D=resistance_coefficient, rho=air_density,
+            l_m=0.4, omega_spin_0=300, k_cp=0.1, k_guidance=precession_control_coefficient,
+            terrain=self.model.terrain
+        )
+
+    def solve_launch_parameters(self):
+        """
+        Подбирает углы и скорость пуска, при которых управляемый полёт
+        приходит в точку цели страницы новой траектории. Поиск идёт в фоне,
+        найденные значения подставляются в поля страницы.
+        """
+        page = self.view.p_newGenerateTrajectory
+        self._solver_generation += 1
+        if self._solver_worker is not None:
+            self._solver_worker.cancel()
+        params = dict(
+            r0=page.get_start_point(), r_target=page.get_end_point(),
+            base_params=dict(
+                mass=page.get_weight(), S=page.get_frontal_cross_sectional_area(),
+                C_D=page.get_resistance_coefficient(), rho=page.get_air_density(),
+                l_m=0.4, omega_spin_0=300, k_cp=0.1, k_guidance=page.get_precession_control_coefficient(),
+                terrain=self.model.terrain
+            )
+        )
+        worker = TrajectoryWorker(self._solver_generation, solve_launch_parameters, params)
+        worker.signals.finished.connect(self._on_launch_parameters_solved)
+        worker.signals.failed.connect(self._on_launch_parameters_failed)
+        self._solver_worker = worker
+        self.thread_pool.start(worker)
+
+    def _on_launch_parameters_solved(self, generation: int, result: dict):
+        # Результат отменённого подбора мог прийти уже после запуска следующего
+        if generation != self._solver_generation:
+            return
+        worker, self._solver_worker = self._solver_worker, None
+        page = self.view.p_newGenerateTrajectory
+        page.set_start_horizontal_angle(result["theta0_deg"])
+        page.set_start_above_angle(result["phi0_deg"])
+        page.set_start_velocity(result["v0"])
+        print(f"[+] Параметры пуска: theta={result['theta0_deg']:.3f}, phi={result['phi0_deg']:.3f}, "
+              f"v0={result['v0']:.2f}, промах {result['miss']:.2f} м")
+        if not result["converged"]:
+            self.view.show_info(f"Точного решения не найдено, промах {result['miss']:.1f} м")
+        # Поля страницы округляют значения, поэтому траектория строится по точному решению
+        self.submit_trajectory(
+            iter_guided_flight_euler,
+            r0=worker.params["r0"], r_target=worker.params["r_target"], v0=result["v0"],
+            theta0_deg=result["theta0_deg"], phi0_deg=result["phi0_deg"],
+            **worker.params["base_params"]
+        )
+
+    def _on_launch_parameters_failed(self, generation: int, message: str):
+        if generation != self._solver_generation:
+            return
+        self._solver_worker = None
+        self.view.show_error(f"Ошибка подбора параметров: {message}")
+
+    def submit_trajectory(self, engine, **params):
+        """
+        Запускает расчёт траектории в пуле потоков.
+        Незавершённый предыдущий расчёт отменяется; в модель попадает
+        только результат последнего запроса. Если такая траектория уже
+        есть в кэше модели, она отображается сразу, без пересчёта.
+
+        Движок-генератор (iter_*) отдаёт траекторию блоками, и виды
+        дорисовывают её по ходу расчёта.
+        """
+        self._generation += 1
+        if self._active_worker is not None:
+            self._active_worker.cancel()
+            self._active_worker = None
+
+        cached = self.model.cache.get(engine, params)
+        if cached is not None:
+            self.model.set_trajectory(cached)
+            return
+
+        worker = TrajectoryWorker(self._generation, engine, params)
+        worker.signals.chunk.connect(self._on_trajectory_chunk)
+        worker.signals.finished.connect(self._on_trajectory_computed)
+        worker.signals.failed.connect(self._on_trajectory_failed)
+        self._active_worker = worker
+        self.thread_pool.start(worker)
+
+    def _on_trajectory_chunk(self, generation: int, block):
+        if generation != self._generation:
+            return
+        if self._streaming_generation != generation:
+            self._streaming_generation = generation
+            self.model.begin_trajectory()
+        self.model.extend_trajectory(block)
+
+    def _on_trajectory_computed(self, generation: int, trajectory: Trajectory):
+        if generation != self._generation:
+            return
+        worker, self._active_worker = self._active_worker, None
+        if trajectory is None:
+            self._streaming_generation = None
+            trajectory = self.model.finish_trajectory()
+            self.model.cache.put(worker.engine, worker.params, trajectory)
+            return
+        self.model.cache.put(worker.engine, worker.params, trajectory)
+        self.model.set_trajectory(trajectory)
+
+    def _on_trajectory_failed(self, generation: int, message: str):
+        if generation != self._generation:
+            return
+        self._active_worker = None
+        self.view.show_error(f"Ошибка расчёта траектории: {message}")
 
     def load_trajectory(self):
         file_path = self.view.ask_open_file_path()
@@ -74,10 +224,11 @@ class Controller(QObject):
                 maneuverability = float(lines[4].split(":")[1].strip())
                 drag_coefficient = float(lines[5].split(":")[1].strip())
 
-                trajectory = [
-                    tuple(map(float, line.split(",")))
-                    for line in lines[6:]
-                ]
+                rows = [tuple(map(float, line.split(","))) for line in lines[6:]]
+                if rows and len(rows[0]) == 4:
+                    trajectory = Trajectory.from_array(np.array(rows))
+                else:
+                    trajectory = Trajectory.from_points(rows)
         except (UnicodeDecodeError, ValueError, IndexError):
             self.view.show_error(f"Файл {file_path.split('/')[-1]} повреждён.")
             return
@@ -104,8 +255,9 @@ class Controller(QObject):
                 file.write(f"Угол отклонения в горизонтальной плоскости: {self.view.get_angle_target()}\n")
                 file.write(f"Коэффициент маневренности: {self.view.get_maneuverability()}\n")
                 file.write(f"Коэффициент сопротивления воздуха: {self.view.get_drag_coefficient()}\n")
-                for point in self.model.get_trajectory():
-                    file.write(f"{point[0]},{point[1]},{point[2]}\n")
+                trajectory = simplify(self.model.get_trajectory(), SAVE_TOLERANCE)
+                for t, x, y, z in trajectory.data.tolist():
+                    file.write(f"{t},{x},{y},{z}\n")
         except Exception as e:
             self.view.show_error(f"Ошибка сохранения: {str(e)}")
             return
@@ -121,17 +273,16 @@ class Controller(QObject):
             # Получаем значение задержки из GUI
             delay_sec = self.view.p_translateSignal.GTO.dSB_delay.value()
 
-            # Экспорт траектории в NMEA с учётом задержки
-            self.model.export_trajectory_to_nmea(
-                delay_sec=delay_sec
-            )
+            # NMEA с учётом задержки формируется по мере чтения gps-sdr-sim (канал, без файла)
+            nmea_source = self.model.nmea_chunks(delay_sec=delay_sec)
 
         except Exception as e:
             self.view.show_error(f"Ошибка экспорта: {e}")
             return
 
         from datetime import datetime
-        from GPS.console_hack_management import GPSProcessRunner, HackRFTransferRunner, get_hackrf_serial_numbers
+        from GPS.console_hack_management import GPSProcessRunner, HackRFTransferRunner, STREAM, get_hackrf_serial_numbers
+        from GPS.iq_pipeline import IQStreamPipeline
 
         start_time = datetime(2025, 2, 12, 0, 0, 0)
         start_real_time = datetime.now()
@@ -142,23 +293,18 @@ class Controller(QObject):
             self.view.show_error("HackRF не обнаружен.")
             return
 
-        nmea_file = "nmea_strings.txt"
-        output_file = "nmea_strings.bin"
-
         try:
             gps_runner = GPSProcessRunner(
                 ephemeris_file="brdc0430.25n",
-                nmea_file=nmea_file,
+                nmea_file=None,
+                nmea_source=nmea_source,
                 bitrate=8,
-                output_file=output_file,
+                output_file=STREAM,
                 sim_dir="GPS_SDR_SIM",
                 start_time=(start_time + delta_start_time).strftime("%Y/%m/%d,%H:%M:%S")
             )
-            gps_runner.start()
-            gps_runner.wait()
-
             hackrf_runner = HackRFTransferRunner(
-                input_file=output_file,
+                input_file=STREAM,
                 frequency=1575420000,
                 sample_rate=2600000,
                 antenna=1,
@@ -166,7 +312,9 @@ class Controller(QObject):
                 working_dir="GPS_SDR_SIM",
                 device_number=device_numbers[0]
             )
-            hackrf_runner.start()
+            self.stop_iq_pipeline()
+            self.iq_pipeline = IQStreamPipeline(gps_runner, hackrf_runner, on_error=self.translation_failed.emit)
+            self.iq_pipeline.start()
 
             self.animate_trajectory(
                 self.view.p_translateSignal.GTO.widget,
@@ -182,14 +330,19 @@ class Controller(QObject):
     import time
     from PyQt6.QtCore import QTimer
 
-    def animate_trajectory(self, widget3d, trajectory: list[tuple[float, float, float]], step_ms=100):
+    def animate_trajectory(self, widget3d, trajectory: Trajectory, step_ms=100):
         """
         Анимирует движение по траектории и отображает прошедшее время, с учётом задержки dSB_delay.
+        Маркер ставится по меткам времени траектории (как в экспорте NMEA),
+        а не по номеру точки, поэтому шаг расчёта и прореживание на скорость не влияют.
+
+        :param step_ms: период обновления маркера
         """
         if not trajectory:
             return
 
-        step_duration_sec = step_ms / 1000.0
+        t0 = float(trajectory.t[0])
+        duration = float(trajectory.t[-1]) - t0
         widget3d.start_translation()
 
         delay_sec = self.view.p_translateSignal.GTO.dSB_delay.value()  # задержка в секундах
@@ -211,7 +364,7 @@ class Controller(QObject):
 
         # === Таймер позиции ===
         pos_timer = QTimer(widget3d)
-        pos_timer.setInterval(100)
+        pos_timer.setInterval(step_ms)
 
         real_start_time = [None]
 
@@ -220,22 +373,28 @@ class Controller(QObject):
                 return
             self.view.p_translateSignal.GTO.l_sygnal.setStyleSheet("background-color: rgb(0, 255, 0)")
             elapsed = time.monotonic() - real_start_time[0]
-            index = int(elapsed / step_duration_sec)
-            if 0 <= index < len(trajectory):
-                widget3d.update_position_marker(trajectory[index])
-            elif index >= len(trajectory):
-                pos_timer.stop()
-                time_timer.stop()
-                widget3d.stop_translation()
-                self.view.p_translateSignal.GTO.l_sygnal.setStyleSheet("")
-
+            widget3d.update_position_marker(trajectory.positions_at([t0 + min(elapsed, duration)])[0])
+            if elapsed >= duration:
+                finish()
+
+        def finish():
+            stopped[0] = True
+            pos_timer.stop()
+            time_timer.stop()
+            widget3d.stop_translation()
+            self.view.p_translateSignal.GTO.l_sygnal.setStyleSheet("")
+
+        stopped = [False]
         pos_timer.timeout.connect(update_position)
+        self._stop_animation = finish
 
         # Показать первую точку
         widget3d.update_position_marker(trajectory[0])
 
         # Старт таймера позиции после задержки
         def start_position_timer():
+            if stopped[0]:
+                return
             real_start_time[0] = time.monotonic()
             pos_timer.start()
 
@@ -249,37 +408,57 @@ class Controller(QObject):
         trajectory = self.model.generate_straight_trajectory(speed, distance)
         self.view.p_generateStraightTrajectory.GTO.f_3DView.update_trajectory(trajectory)
 
+    def _on_translation_failed(self, message: str):
+        if self._stop_animation is not None:
+            self._stop_animation()
+            self._stop_animation = None
+        self.view.show_error(f"Ошибка трансляции: {message}")
+
+    def stop_iq_pipeline(self):
+        """Останавливает предыдущую передачу (и её анимацию), если она ещё идёт."""
+        if self.iq_pipeline is not None and self.iq_pipeline.is_running():
+            self.iq_pipeline.terminate()
+        self.iq_pipeline = None
+        if self._stop_animation is not None:
+            self._stop_animation()
+            self._stop_animation = None
+
     def translate_straight_trajectory(self):
 
         from datetime import datetime
-        from GPS.console_hack_management import GPSProcessRunner, HackRFTransferRunner, get_hackrf_serial_numbers
+        from GPS.console_hack_management import GPSProcessRunner, HackRFTransferRunner, STREAM, get_hackrf_serial_numbers
+        from GPS.iq_pipeline import IQStreamPipeline
 
         start_time = datetime(2025, 2, 12, 0, 0, 0)
         start_real_time = datetime.now()
         delta_start_time = datetime.now() - start_real_time
 
+        try:
+            trajectory = self.model.get_straight_trajectory()
+            if trajectory is None:
+                raise ValueError("Прямолинейная траектория не построена")
+            nmea_source = self.model.nmea_chunks(trajectory=trajectory)
+        except Exception as e:
+            self.view.show_error(f"Ошибка экспорта: {e}")
+            return
+
         device_numbers = get_hackrf_serial_numbers()
         if not device_numbers:
             self.view.show_error("HackRF не обнаружен.")
             return
 
-        nmea_file = "nmea_strings.txt"
-        output_file = "nmea_strings.bin"
-
         try:
             gps_runner = GPSProcessRunner(
                 ephemeris_file="brdc0430.25n",
-                nmea_file=nmea_file,
+                nmea_file=None,
+                nmea_source=nmea_source,
                 bitrate=8,
-                output_file=output_file,
+                output_file=STREAM,
                 sim_dir="GPS_SDR_SIM",
                 start_time=(start_time + delta_start_time).strftime("%Y/%m/%d,%H:%M:%S")
             )
-            gps_runner.start()
-            gps_runner.wait()
-
             hackrf_runner = HackRFTransferRunner(
-                input_file=output_file,
+                input_file=STREAM,
                 frequency=1575420000,
                 sample_rate=2600000,
                 antenna=1,
@@ -287,7 +466,9 @@ class Controller(QObject):
                 working_dir="GPS_SDR_SIM",
                 device_number=device_numbers[0]
             )
-            hackrf_runner.start()
+            self.stop_iq_pipeline()
+            self.iq_pipeline = IQStreamPipeline(gps_runner, hackrf_runner, on_error=self.translation_failed.emit)
+            self.iq_pipeline.start()
 
             self.animate_trajectory(
                 self.view.p_generateStraightTrajectory.GTO.f_3DView,
@@ -1,20 +1,89 @@
 import numpy as np
-from typing import List, Tuple
-from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
 from PyQt6.QtCore import pyqtSignal, QObject
 import __main__, os
 
-class Model(QObject):
-    trajectory_changed = pyqtSignal(list)
-    straight_trajectory_changed = pyqtSignal(list)
+from GPS.coord_transformation import CoordinateSystem
+from GPS.nmea_writer import iter_nmea_trajectory
+
+from Simulation.Atmosphere import AtmosphereTable, WindField
+from Simulation.BatchTrajectory import compute_trajectory_batch
+from Simulation.Engines import INTEGRATORS, simulate_engine
+from Simulation.ManeuveringTrajectory import compute_trajectory
+from Simulation.MonteCarlo import run_monte_carlo
+from Simulation.Segments import SegmentTrajectory
+from Simulation.SpatialIndex import TrajectoryIndex
+from Simulation.Surrogate import SurrogateTable
+from Simulation.Terrain import Terrain
+from Simulation.GuidedFlight import DOPRI5_RTOL_RANGE, simulate_guided_flight_euler, simulate_guided_flight_dopri5
+from Simulation.Trajectory import Trajectory
+from Simulation.TrajectoryCache import TrajectoryCache
+from Simulation.WindGuidedTrajectory import simulate_guided_trajectory, simulate_guided_trajectory_batch
+
+# Широта, долгота (градусы) и высота (м) точки пуска для экспорта в NMEA
+NMEA_ORIGIN = (55.0, 37.0, 0.0)
 
-    def __init__(self, g: float = 9.81, dt: float = 0.1) -> None:
+class Model(QObject):
+    trajectory_changed = pyqtSignal(object)
+    # Потоковый расчёт: начало новой траектории и дописывание очередного блока
+    trajectory_started = pyqtSignal(object)
+    trajectory_extended = pyqtSignal(object)
+    straight_trajectory_changed = pyqtSignal(object)
+    # Предварительная траектория по таблице SurrogateTable до окончания точного расчёта
+    trajectory_previewed = pyqtSignal(object)
+
+    def __init__(self, g: float = 9.81, dt: float = 0.1, cache_dir: str = None) -> None:
+        """
+        :param g: ускорение свободного падения
+        :param dt: шаг интегрирования compute_trajectory
+        :param cache_dir: папка для сохранения рассчитанных траекторий между запусками;
+                          None — кэш только в памяти
+        """
         super().__init__()
 
         self.straight_trajectory = None
         self.g: float = g
         self.dt: float = dt
-        self.trajectory: List[Tuple[float, float, float]] = []
+        self.trajectory: Trajectory = Trajectory()
+        self.cache = TrajectoryCache(directory=cache_dir)
+        self.surrogate: SurrogateTable = None
+        # Рельеф, на котором заканчивается полёт; None — плоскость z = 0
+        self.terrain: Terrain = None
+        self._index: TrajectoryIndex = None
+        self._indexed = (None, 0)
+
+    def load_surrogate(self, path: str) -> bool:
+        """
+        Подключает таблицу предпросмотра (каталог build_surrogate).
+        :return: False, если таблицы по этому пути нет
+        """
+        if not os.path.isfile(os.path.join(path, "surrogate.json")):
+            return False
+        self.surrogate = SurrogateTable.load(path)
+        print(f"[+] Таблица предпросмотра {self.surrogate.shape} загружена из {path}")
+        return True
+
+    def load_terrain(self, path: str) -> bool:
+        """
+        Подключает рельеф (файл .npy, записанный Terrain.save); высоты отображаются в память.
+        :return: False, если файла нет
+        """
+        if not os.path.isfile(path):
+            return False
+        self.terrain = Terrain.load(path)
+        print(f"[+] Рельеф {self.terrain} загружен из {path}")
+        return True
+
+    def preview_trajectory(self, **params) -> Trajectory:
+        """
+        Грубая траектория compute_trajectory по таблице предпросмотра.
+        :return: None, если таблица не загружена или параметры вне её сетки
+        """
+        if self.surrogate is None or not self.surrogate.contains(**params):
+            return None
+        preview = self.surrogate.preview(**params)
+        self.trajectory_previewed.emit(preview)
+        return preview
 
     def compute_trajectory(
             self,
@@ -25,7 +94,7 @@ class Model(QObject):
             maneuverability: float = 0.05,
             drag_coefficient: float = 0.01,
             accel_phase: float = 2.0  # время разгона до v0 (секунды)
-    ) -> List[Tuple[float, float, float]]:
+    ) -> Trajectory:
         """
         Вычисляет траекторию от (0,0,0) до (distance, 0, 0) с маневрированием.
         Добавлен разгон: в течение accel_phase секунд скорость возрастает от 0 до v0.
@@ -37,90 +106,56 @@ class Model(QObject):
         :param maneuverability: коэффициент маневренности
         :param drag_coefficient: коэффициент сопротивления воздуха
         :param accel_phase: длительность разгона в секундах
-        :return: список координат траектории
-        """
-
-        pos: np.ndarray = np.array([0.0, 0.0, 0.0])
-        end_point: np.ndarray = np.array([distance, 0.0, 0.0])
-        trajectory: List[Tuple[float, float, float]] = [tuple(pos)]
-
-        # Углы в радианах
-        theta: float = np.radians(angle_surface_deg)
-        phi: float = np.radians(angle_target_deg)
-
-        # Направление движения
-        dir_vec = np.array([
-            np.cos(theta) * np.cos(phi),
-            np.cos(theta) * np.sin(phi),
-            np.sin(theta)
-        ])
-
-        # Начальная скорость = 0
-        velocity: np.ndarray = np.zeros(3)
-
-        t = 0.0
-        while pos[2] >= 0 and np.linalg.norm(velocity) > 0.1 or t < accel_phase:
-            pos += velocity * self.dt
-            trajectory.append(tuple(pos))
-
-            # --- Разгонная фаза ---
-            if t < accel_phase:
-                # линейный рост скорости от 0 до v0
-                target_speed = v0 * (t / accel_phase)
-                current_speed = np.linalg.norm(velocity)
-                dv = target_speed - current_speed
-                if dv > 0:
-                    velocity += dir_vec * (dv / max(self.dt, 1e-9))
-            else:
-                # Гравитация
-                velocity[2] -= self.g * self.dt
-
-                # Сопротивление воздуха
-                speed = np.linalg.norm(velocity)
-                if speed > 0:
-                    drag_force = drag_coefficient * velocity
-                    velocity -= drag_force * self.dt
-
-                # Маневрирование
-                to_target = end_point - pos
-                dist_to_target = np.linalg.norm(to_target)
-                if dist_to_target > 1e-6:
-                    to_target_unit = to_target / dist_to_target
-                    v_unit = velocity / speed
-                    correction_direction = to_target_unit - np.dot(to_target_unit, v_unit) * v_unit
-
-                    if np.linalg.norm(correction_direction) > 1e-6:
-                        correction_unit = correction_direction / np.linalg.norm(correction_direction)
-                        correction = maneuverability * speed * correction_unit
-                        velocity += correction * self.dt
-
-            t += self.dt
+        :return: траектория (t, x, y, z)
+        """
+
+        params = dict(
+            distance=distance, v0=v0, angle_surface_deg=angle_surface_deg, angle_target_deg=angle_target_deg,
+            maneuverability=maneuverability, drag_coefficient=drag_coefficient, accel_phase=accel_phase,
+            g=self.g, dt=self.dt, terrain=self.terrain
+        )
+        trajectory = self.cache.get(compute_trajectory, params)
+        if trajectory is None:
+            trajectory = compute_trajectory(**params)
+            self.cache.put(compute_trajectory, params, trajectory)
 
         self.trajectory_changed.emit(trajectory)
         self.trajectory = trajectory
         return trajectory
 
-    def generate_straight_trajectory(self,speed: float, distance: float, step: float = 0.1) -> List[Tuple[float, float, float]]:
+    def compute_trajectory_batch(
+            self,
+            distance,
+            v0,
+            angle_surface_deg,
+            angle_target_deg,
+            maneuverability=0.05,
+            drag_coefficient=0.01,
+            accel_phase=2.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Генерация траектории движения по прямой.
+        Вычисляет траектории compute_trajectory сразу для N наборов параметров.
+        Параметры — скаляры или массивы (N,). Сигнал trajectory_changed не испускается.
 
-        :param speed: скорость (м/с)
-        :param distance: дистанция (м)
-        :param step: шаг по времени (сек), по умолчанию 1 секунда
-        :return: список точек [(x, y, t)]
+        :return: (positions, lengths) — дополненный массив (N, T, 3) и длины траекторий (N,)
         """
-        trajectory = []
-        total_time = distance / speed
-        t = 0.0
+        return compute_trajectory_batch(
+            distance, v0, angle_surface_deg, angle_target_deg,
+            maneuverability, drag_coefficient, accel_phase,
+            g=self.g, dt=self.dt, terrain=self.terrain
+        )
 
-        while t <= total_time:
-            x = speed * t
-            trajectory.append((x, 0.0, 0.0))
-            t += step
+    def generate_straight_trajectory(self,speed: float, distance: float, step: float = 0.1) -> Trajectory:
+        """
+        Генерация траектории движения по прямой. Участок вычисляется аналитически
+        (SegmentTrajectory), без шага интегрирования и без предела длительности.
 
-        # Добавим конечную точку точно в distance
-        if trajectory[-1][0] < distance:
-            trajectory.append((distance, 0.0, 0.0))
+        :param speed: скорость (м/с)
+        :param distance: дистанция (м)
+        :param step: шаг по времени (сек), по умолчанию 0.1 секунды
+        :return: траектория (t, x, y, z)
+        """
+        trajectory = SegmentTrajectory().straight(speed, distance=distance).sample(step)
         self.straight_trajectory_changed.emit(trajectory)
         self.straight_trajectory = trajectory
         return trajectory
@@ -135,129 +170,235 @@ class Model(QObject):
                                                    mass, S, C_D, rho, l_m,
                                                    omega_spin_0, k_cp, k_guidance,
                                                    Ix=0.01, Iy=0.002, Iz=0.002,
-                                                   dt=0.005, g=9.81
-                                                   ):
+                                                   dt=0.005, g=9.81,
+                                                   method: str = "euler",
+                                                   rtol: float = 1e-6, atol: float = 1e-6,
+                                                   sample_dt: float = 0.1,
+                                                   atmosphere: AtmosphereTable = None
+                                                   ) -> Trajectory:
         """
         Сбалансированная модель полета снаряда с уравнениями Эйлера (10.9) и активным управлением.
         Включает ограничения, достаточные для стабильности, но позволяющие маневрировать.
+
+        :param method: "euler" — явный Эйлер с шагом dt;
+                       "dopri5" — адаптивный Дорман–Принс с допусками rtol/atol,
+                       траектория выдаётся с шагом sample_dt
+        :param rtol: для "dopri5" — только в проверенном диапазоне DOPRI5_RTOL_RANGE (1e-6…1e-4):
+                     при более жёстком допуске точка падения не сходится (при 1e-8 уходит
+                     на десятки метров), поэтому такой rtol отклоняется с ValueError
+        :param atmosphere: таблица атмосферы (например, standard_atmosphere());
+                           если задана, плотность зависит от высоты, а rho не используется
         """
+        params = dict(
+            r0=r0, r_target=r_target, v0=v0, theta0_deg=theta0_deg, phi0_deg=phi0_deg,
+            mass=mass, S=S, C_D=C_D, rho=rho, l_m=l_m,
+            omega_spin_0=omega_spin_0, k_cp=k_cp, k_guidance=k_guidance,
+            Ix=Ix, Iy=Iy, Iz=Iz, g=g, atmosphere=atmosphere, terrain=self.terrain
+        )
+        if method == "euler":
+            engine = simulate_guided_flight_euler
+            params["dt"] = dt
+        elif method == "dopri5":
+            low, high = DOPRI5_RTOL_RANGE
+            if not low <= rtol <= high:
+                raise ValueError(f"rtol={rtol:g} вне проверенного диапазона {low:g}…{high:g} для dopri5")
+            engine = simulate_guided_flight_dopri5
+            params.update(rtol=rtol, atol=atol, sample_dt=sample_dt)
+        else:
+            raise ValueError(f"Неизвестный метод интегрирования: {method}")
+
+        traj = self.cache.get(engine, params)
+        if traj is None:
+            traj = engine(**params)
+            self.cache.put(engine, params, traj)
+
+        self.trajectory = traj
+        self.trajectory_changed.emit(traj)
+        return traj
+
+    def simulate_guided_trajectory(self, m, S, C_D, start, target, v0,
+                                   wind_zones=None, k_c: float = 2.0, p: float = 2,
+                                   atmosphere: AtmosphereTable = None, wind_field: WindField = None,
+                                   method: str = "RK45", rtol: float = 1e-6, atol: float = 1e-8,
+                                   sample_dt: float = 0.05) -> Trajectory:
+        """
+        Управляемый полёт с сопротивлением, ветром и боковой коррекцией к цели
+        (Simulation.WindGuidedTrajectory).
+
+        :param method: метод solve_ivp (RK45, DOP853, Radau, BDF, LSODA...) — векторизованная
+                       правая часть, для неявных методов передаётся аналитический якобиан;
+                       или интегратор движка "wind_guided" из Simulation.Engines ("dopri5", "rk4", "euler")
+        :param sample_dt: шаг точек траектории по плотному выводу
+        """
+        if method in INTEGRATORS:
+            traj = self._engine_trajectory(
+                "wind_guided", integrator=method, dt=sample_dt,
+                integrator_options=dict(rtol=rtol, atol=atol) if method == "dopri5" else None,
+                m=m, S=S, C_D=C_D, start=start, target=target, v0=v0, g=self.g,
+                wind_zones=wind_zones, k_c=k_c, p=p, atmosphere=atmosphere, wind_field=wind_field,
+                terrain=self.terrain
+            )
+        else:
+            params = dict(
+                m=m, S=S, C_D=C_D, start=start, target=target, v0=v0, g=self.g,
+                wind_zones=wind_zones, k_c=k_c, p=p, atmosphere=atmosphere, wind_field=wind_field,
+                method=method, rtol=rtol, atol=atol, sample_dt=sample_dt, terrain=self.terrain
+            )
+            traj = self.cache.get(simulate_guided_trajectory, params)
+            if traj is None:
+                traj = simulate_guided_trajectory(**params)
+                self.cache.put(simulate_guided_trajectory, params, traj)
 
-        r = np.array(r0, dtype=np.float64)
-        traj = [tuple(r)]
-
-        theta = np.radians(theta0_deg)
-        phi = np.radians(phi0_deg)
-        dir0 = np.array([
-            np.cos(theta) * np.cos(phi),
-            np.cos(theta) * np.sin(phi),
-            np.sin(theta)
-        ])
-        v = v0 * dir0
-
-        # Угловые скорости
-        omega_x = omega_spin_0
-        omega_y = omega_z = 0.0
-        # Отклонения ориентации
-        delta_y = delta_z = 0.0
-
-        z_target = r_target[2]
-        has_reached_apex = False
-
-        for step in range(200000):
-            t = step * dt
-            speed = np.linalg.norm(v)
-            if speed < 1e-3:
-                break
-
-            # Аэродинамические и управляющие моменты
-            Mx = -Ix * k_cp * omega_x
-            My_aero = -rho * speed ** 2 * S * l_m * delta_y / 2
-            Mz_aero = -rho * speed ** 2 * S * l_m * delta_z / 2
-
-            to_target = np.array(r_target) - r
-            to_target /= np.linalg.norm(to_target)
-            velocity_dir = v / speed
-            error = to_target - velocity_dir
-            error = np.clip(error, -1.0, 1.0)  # до ±1 рад (≈ 57°)
-
-            My_control = -k_guidance * error[1]
-            Mz_control = -k_guidance * error[2]
-            My = My_aero + My_control
-            Mz = Mz_aero + Mz_control
-
-            # Уравнения Эйлера
-            domega_x = Mx / Ix
-            domega_y = (My - (Iz - Ix) * omega_z * omega_x) / Iy
-            domega_z = (Mz - (Ix - Iy) * omega_x * omega_y) / Iz
-
-            if not np.isfinite(domega_y) or not np.isfinite(domega_z):
-                break
-
-            omega_x += domega_x * dt
-            omega_y += domega_y * dt
-            omega_z += domega_z * dt
-
-            # Ограничения на угловые скорости
-            omega_x = np.clip(omega_x, -15000, 15000)
-            omega_y = np.clip(omega_y, -2000, 2000)
-            omega_z = np.clip(omega_z, -2000, 2000)
-
-            # Интеграция углов ориентации
-            delta_y += omega_y * dt
-            delta_z += omega_z * dt
-
-            # Ограничения на углы ориентации
-            delta_y = np.clip(delta_y, -1.0, 1.0)
-            delta_z = np.clip(delta_z, -1.0, 1.0)
-
-            # Ось тела
-            body_dir = velocity_dir + np.array([0, delta_y, delta_z])
-            norm_bd = np.linalg.norm(body_dir)
-            if norm_bd < 1e-6:
-                body_dir = velocity_dir
-            else:
-                body_dir /= norm_bd
-
-            # Силы
-            F_aero = -0.5 * rho * C_D * S * speed * body_dir
-            F_grav = np.array([0, 0, -mass * g])
-            a_lin = (F_aero + F_grav) / mass
-
-            # Интеграция поступательного движения
-            v += a_lin * dt
-            r += v * dt
-            traj.append(tuple(r))
-
-            # Условие завершения
-            if not has_reached_apex and v[2] < 0:
-                has_reached_apex = True
-            if has_reached_apex and r[2] <= z_target:
-                break
+        self.trajectory = traj
+        self.trajectory_changed.emit(traj)
+        return traj
+
+    def simulate_guided_trajectory_batch(self, m, S, C_D, starts, targets, v0s,
+                                         method: str = "RK45", rtol: float = 1e-6, atol: float = 1e-8,
+                                         sample_dt: float = 0.05, **kwargs) -> List[Trajectory]:
+        """
+        Пакет начальных условий той же модели одной системой ОДУ;
+        траектории возвращаются списком, текущая траектория модели не меняется.
+
+        :param method: как в simulate_guided_trajectory; для неявных методов solve_ivp
+                       якобиан блочно-диагональный и передаётся разреженным
+        :param kwargs: прочие параметры модели (wind_zones, k_c, p, atmosphere, wind_field);
+                       рельеф по умолчанию — загруженный в модель
+        """
+        kwargs.setdefault("terrain", self.terrain)
+        if method in INTEGRATORS:
+            return simulate_engine(
+                "wind_guided", integrator=method, dt=sample_dt,
+                integrator_options=dict(rtol=rtol, atol=atol) if method == "dopri5" else None,
+                m=m, S=S, C_D=C_D, start=starts, target=targets, v0=v0s, g=self.g, **kwargs
+            )
+        return simulate_guided_trajectory_batch(m, S, C_D, starts, targets, v0s, g=self.g, method=method,
+                                                rtol=rtol, atol=atol, sample_dt=sample_dt, **kwargs)
+
+    def simulate_engine(self, name: str, integrator: str = "rk4", dt: float = None, **params) -> Trajectory:
+        """
+        Расчёт зарегистрированным движком из Simulation.Engines (набор сил + интегратор).
+        Текущей становится траектория первого тела.
+
+        :param name: ключ ENGINES ("maneuvering", "wind_guided", "straight", ...)
+        :param integrator: "euler", "rk4" или "dopri5"
+        :param dt: шаг выдачи; по умолчанию — шаг движка
+        """
+        traj = self._engine_trajectory(name, integrator=integrator, dt=dt, **params)
 
         self.trajectory = traj
         self.trajectory_changed.emit(traj)
         return traj
 
+    def _engine_trajectory(self, name: str, integrator: str = "rk4", dt: float = None,
+                           integrator_options: dict = None, **params) -> Trajectory:
+        """Траектория первого тела движка name через кэш; текущая траектория не меняется."""
+        key = dict(params, name=name, integrator=integrator, dt=dt, integrator_options=integrator_options)
+        traj = self.cache.get(simulate_engine, key)
+        if traj is None:
+            traj = simulate_engine(name, integrator=integrator, dt=dt,
+                                   integrator_options=integrator_options, **params)[0]
+            self.cache.put(simulate_engine, key, traj)
+        return traj
+
+
+
+    def run_monte_carlo(self, base_params: dict, dispersions: dict, n_samples: int, **kwargs) -> dict:
+        """
+        Рассеивание точек падения (Simulation.MonteCarlo); текущая траектория модели не меняется.
 
+        :param base_params: номинальные параметры движка (по умолчанию "wind_guided")
+        :param dispersions: стандартные отклонения возмущаемых параметров
+        """
+        base_params = dict(base_params)
+        base_params.setdefault("g", self.g)
+        return run_monte_carlo(base_params, dispersions, n_samples, **kwargs)
 
     def get_trajectory(self):
         return self.trajectory
 
-    def set_trajectory(self, trajectory:List[Tuple[float, float, float]]):
+    def trajectory_index(self) -> TrajectoryIndex:
+        """Индекс текущей траектории; перестраивается, только если траектория сменилась или дописана."""
+        if self._indexed[0] is not self.trajectory or self._indexed[1] != len(self.trajectory):
+            self._index = TrajectoryIndex(self.trajectory)
+            self._indexed = (self.trajectory, len(self.trajectory))
+        return self._index
+
+    def closest_approach(self, point) -> dict:
+        """
+        Наименьшее расстояние текущей траектории до точки (например, цели).
+        :return: distance, position, time, segment (см. TrajectoryIndex.closest_approach)
+        """
+        if not self.trajectory:
+            raise ValueError("Траектория пуста")
+        return self.trajectory_index().closest_approach(point)
+
+    def set_trajectory(self, trajectory: Trajectory):
+        if not isinstance(trajectory, Trajectory):
+            trajectory = Trajectory.from_points(trajectory, self.dt)
         self.trajectory = trajectory
         self.trajectory_changed.emit(self.trajectory)
 
-    def export_trajectory_to_nmea(self, step_sec: float = 0.1, delay_sec: float = 0.0):
+    def begin_trajectory(self) -> Trajectory:
+        """
+        Начинает потоковую траекторию: дальше она наращивается блоками
+        через extend_trajectory и завершается finish_trajectory.
+        """
+        self.trajectory = Trajectory()
+        self.trajectory_started.emit(self.trajectory)
+        return self.trajectory
+
+    def extend_trajectory(self, block: np.ndarray):
+        """
+        :param block: массив (k, 4) со столбцами t, x, y, z
+        """
+        self.trajectory.extend(block)
+        self.trajectory_extended.emit(self.trajectory)
+
+    def finish_trajectory(self) -> Trajectory:
+        self.trajectory.trim()
+        self.trajectory_changed.emit(self.trajectory)
+        return self.trajectory
+
+    def nmea_chunks(self, step_sec: float = 0.1, delay_sec: float = 0.0, hold_sec: float = 0.0,
+                    trajectory: Optional[Trajectory] = None) -> Iterator[bytes]:
+        """
+        Ленивый источник NMEA по траектории: блоки строк GGA и RMC
+        формируются по мере чтения (для файла или канала NMEAPipe к gps-sdr-sim).
+
+        :param delay_sec: сколько секунд до пуска стоять в стартовой точке
+        :param hold_sec: сколько секунд после окончания траектории стоять в конечной точке
+        :param trajectory: траектория (по умолчанию — текущая)
+        """
+        from datetime import datetime, timezone
+
+        if trajectory is None:
+            trajectory = self.trajectory
+        if not trajectory:
+            raise ValueError("Траектория пуста")
+        coords = CoordinateSystem()
+        coords.set_origin(*NMEA_ORIGIN)
+        return iter_nmea_trajectory(trajectory, coords, datetime.now(timezone.utc), step_sec,
+                                    lead_in_sec=delay_sec, hold_sec=hold_sec)
+
+    def export_trajectory_to_nmea(self, step_sec: float = 0.1, delay_sec: float = 0.0, hold_sec: float = 0.0):
         """
         Экспорт текущей траектории в NMEA-формат с учётом задержки.
         Файл сохраняется в ту же папку, где лежит gps-sdr-sim.exe.
+
+        Траектория пересчитывается по своим меткам времени на сетку step_sec,
+        поэтому точек ровно длительность / step_sec + 1 при любом шаге расчёта;
+        на каждую точку пишутся строки GGA и RMC (скорость и курс).
+        Файл пишется за один последовательный проход блоками (см. iter_nmea_trajectory).
+
+        :param delay_sec: сколько секунд до пуска стоять в стартовой точке
+        :param hold_sec: сколько секунд после окончания траектории стоять в конечной точке
         """
         if not self.trajectory:
             raise ValueError("Траектория пуста")
 
         import os
         import sys
-        from datetime import datetime, timedelta, timezone
 
         # Определим путь к GPS_SDR_SIM
         if getattr(sys, 'frozen', False):
@@ -271,68 +412,9 @@ class Model(QObject):
         # Убедимся, что папка существует (на случай запуска не из PyInstaller)
         os.makedirs(sim_dir, exist_ok=True)
 
-        def to_nmea_latlon(lat, lon):
-            lat_deg = int(abs(lat))
-            lat_min = (abs(lat) - lat_deg) * 60
-            lat_str = f"{lat_deg:02d}{lat_min:07.4f},{'N' if lat >= 0 else 'S'}"
-
-            lon_deg = int(abs(lon))
-            lon_min = (abs(lon) - lon_deg) * 60
-            lon_str = f"{lon_deg:03d}{lon_min:07.4f},{'E' if lon >= 0 else 'W'}"
-            return lat_str, lon_str
-
-        start_time = datetime.now(timezone.utc)
-
-        with open(filepath, 'w') as f:
-            for i, (x, y, z) in enumerate(self.trajectory):
-                lat, lon, h = 55.0 + x * 1e-5, 37.0 + y * 1e-5, z
-                t = start_time + timedelta(seconds=i * step_sec)
-                t_str = t.strftime("%H%M%S.%f")[:-4]
-                lat_str, lon_str = to_nmea_latlon(lat, lon)
-                f.write(f"$GPGGA,{t_str},{lat_str},{lon_str},1,08,0.9,{h:.1f},M,0.0,M,,*47\n")
-
-        print(f"[+] Экспортировано в {filepath}")
-        self.prepend_static_padding_to_nmea(filepath, delay_sec=delay_sec, step_sec=step_sec)
-
-    @staticmethod
-    def prepend_static_padding_to_nmea(
-            filepath: str = "GPS_SDR_SIM/nmea_strings.txt",
-            delay_sec: float = 30.0,
-            step_sec: float = 0.1
-    ):
-        """
-        Дополняет nmea_strings.txt в начале фиксированными строками, чтобы добавить задержку delay_sec.
-        """
-        with open(filepath, "r") as f:
-            lines = f.readlines()
-
-        target_lines = int(delay_sec / step_sec)
-
-        # if len(lines) >= target_lines:
-        #     print(f"[=] Уже {len(lines)} строк, не требует дополнения.")
-        #     return
-
-        # Извлечём первую строку как шаблон
-        first_line = lines[0].strip()
-        time_str = first_line.split(",")[1]  # HHMMSS или HHMMSS.ss
-
-        # Определим базовое UTC время из первой строки
-        base_time = datetime.strptime(time_str[:6], "%H%M%S")
-
-        # Остальные поля
-        gga_rest = ",".join(first_line.split(",")[2:])
-
-        missing_lines = target_lines
-
-        # Генерация новых строк
-        padding = []
-        for i in range(missing_lines, 0, -1):
-            t = base_time - timedelta(seconds=i * step_sec)
-            t_str = t.strftime("%H%M%S.%f")[:-4]
-            padding.append(f"$GPGGA,{t_str},{gga_rest}\n")
-
-        # Сохраняем результат
-        with open(filepath, "w") as f:
-            f.writelines(padding + lines)
+        chunks = self.nmea_chunks(step_sec, delay_sec, hold_sec)
+        with open(filepath, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
 
-        print(f"[+] Добавлено {missing_lines} статичных строк. Общее число строк: {len(padding) + len(lines)}")
+        print(f"[+] Экспортировано в {filepath} (задержка {delay_sec:.1f} с, удержание {hold_sec:.1f} с)")
@@ -0,0 +1,58 @@
+import inspect
+import threading
+import traceback
+from typing import Callable, Dict
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from Simulation.Cancellation import ComputationCancelled
+
+
+class TrajectoryWorkerSignals(QObject):
+    # (номер поколения запроса, траектория)
+    finished = pyqtSignal(int, object)
+    # (номер поколения запроса, блок (k, 4) потокового расчёта)
+    chunk = pyqtSignal(int, object)
+    # (номер поколения запроса, текст ошибки)
+    failed = pyqtSignal(int, str)
+
+
+class TrajectoryWorker(QRunnable):
+    """
+    Выполняет расчёт траектории в пуле потоков.
+
+    Движок вызывается с аргументом cancel; после cancel() он прерывается
+    на ближайшей проверке, и результат не отправляется.
+
+    Если движок возвращает генератор блоков, каждый блок отправляется сигналом chunk
+    по мере готовности, а finished приходит с None после последнего блока.
+    """
+
+    def __init__(self, generation: int, engine: Callable, params: Dict):
+        super().__init__()
+        self.generation = generation
+        self.engine = engine
+        self.params = params
+        self.cancelled = threading.Event()
+        self.signals = TrajectoryWorkerSignals()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            result = self.engine(**self.params, cancel=self.cancelled.is_set)
+            if inspect.isgenerator(result):
+                for block in result:
+                    if self.cancelled.is_set():
+                        return
+                    self.signals.chunk.emit(self.generation, block)
+                result = None
+        except ComputationCancelled:
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        if not self.cancelled.is_set():
+            self.signals.finished.emit(self.generation, result)
@@ -1,3 +1,4 @@
+from PyQt6 import QtCore
 from PyQt6 import QtWidgets
 from PyQt6 import QtGui
 
@@ -16,6 +17,16 @@ class View(MainFormOptions):
         self.trajectory_parameters.append(self.p_generateTrajectory.GTO.dSB_dragCoefficient)
         self.trajectory_parameters.extend(self.p_newGenerateTrajectory.trajectory_parameters)
 
+        self.a_solveLaunchParameters = QtGui.QAction("Подобрать параметры пуска по цели", parent=form)
+        self.menu.addAction(self.a_solveLaunchParameters)
+
+        # Дорисовка потоковой траектории не чаще, чем раз в 40 мс
+        self._pending_trajectory = None
+        self._trajectory_refresh = QtCore.QTimer(form)
+        self._trajectory_refresh.setSingleShot(True)
+        self._trajectory_refresh.setInterval(40)
+        self._trajectory_refresh.timeout.connect(self._flush_trajectory)
+
 
 
         self.show_generate_trajectory_page()
@@ -37,17 +48,47 @@ class View(MainFormOptions):
 
 
 
+    def _trajectory_widgets(self):
+        return (
+            self.p_generateTrajectory.GTO.f_3DView,
+            self.p_generateTrajectory.GTO.f_rearView,
+            self.p_generateTrajectory.GTO.f_sideView,
+            self.p_generateTrajectory.GTO.f_aboveView,
+            self.p_newGenerateTrajectory.GTO.f_3DView,
+            self.p_newGenerateTrajectory.GTO.f_rearView,
+            self.p_newGenerateTrajectory.GTO.f_sideView,
+            self.p_newGenerateTrajectory.GTO.f_aboveView,
+            self.p_translateSignal.GTO.widget,
+        )
+
     def update_trajectory(self, trajectory):
-        self.p_generateTrajectory.GTO.f_3DView.update_trajectory(trajectory)
-        self.p_generateTrajectory.GTO.f_rearView.update_trajectory(trajectory)
-        self.p_generateTrajectory.GTO.f_sideView.update_trajectory(trajectory)
-        self.p_generateTrajectory.GTO.f_aboveView.update_trajectory(trajectory)
-        self.p_newGenerateTrajectory.GTO.f_3DView.update_trajectory(trajectory)
-        self.p_newGenerateTrajectory.GTO.f_rearView.update_trajectory(trajectory)
-        self.p_newGenerateTrajectory.GTO.f_sideView.update_trajectory(trajectory)
-        self.p_newGenerateTrajectory.GTO.f_aboveView.update_trajectory(trajectory)
-
-        self.p_translateSignal.GTO.widget.update_trajectory(trajectory)
+        self._trajectory_refresh.stop()
+        self._pending_trajectory = None
+        for widget in self._trajectory_widgets():
+            widget.preview_trajectory(None)
+            widget.update_trajectory(trajectory)
+
+    def preview_trajectory(self, trajectory):
+        for widget in self._trajectory_widgets():
+            widget.preview_trajectory(trajectory)
+
+    def begin_trajectory(self, trajectory):
+        self._trajectory_refresh.stop()
+        self._pending_trajectory = None
+        for widget in self._trajectory_widgets():
+            widget.begin_trajectory()
+
+    def extend_trajectory(self, trajectory):
+        self._pending_trajectory = trajectory
+        if not self._trajectory_refresh.isActive():
+            self._trajectory_refresh.start()
+
+    def _flush_trajectory(self):
+        trajectory, self._pending_trajectory = self._pending_trajectory, None
+        if trajectory is None or len(trajectory) == 0:
+            return
+        for widget in self._trajectory_widgets():
+            widget.extend_trajectory(trajectory)
 
     def get_distance(self):
         return self.p_generateTrajectory.GTO.dSB_distance.value()
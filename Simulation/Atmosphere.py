@@ -0,0 +1,285 @@
+import hashlib
+import json
+import math
+import os
+from bisect import bisect_left
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Газовая постоянная сухого воздуха, Дж/(кг·К), и стандартное g, м/с²
+R_AIR = 287.05287
+G0 = 9.80665
+GAMMA = 1.4
+
+# Слои стандартной атмосферы ISA: (нижняя граница, м; температурный градиент, К/м)
+_ISA_LAYERS = [
+    (0.0, -0.0065),
+    (11000.0, 0.0),
+    (20000.0, 0.001),
+    (32000.0, 0.0028),
+    (47000.0, 0.0),
+    (51000.0, -0.0028),
+    (71000.0, -0.002),
+]
+
+
+def _isa_point(z: float) -> Tuple[float, float]:
+    """Температура (К) и давление (Па) ISA на высоте z (ниже 0 — продолжение тропосферы)."""
+    temperature, pressure = 288.15, 101325.0
+    for i, (base, lapse) in enumerate(_ISA_LAYERS):
+        top = _ISA_LAYERS[i + 1][0] if i + 1 < len(_ISA_LAYERS) else math.inf
+        h = min(z, top) - base if i else min(z, top)
+        if lapse == 0.0:
+            pressure *= math.exp(-G0 * h / (R_AIR * temperature))
+        else:
+            new_temperature = temperature + lapse * h
+            pressure *= (new_temperature / temperature) ** (-G0 / (lapse * R_AIR))
+            temperature = new_temperature
+        if z <= top:
+            break
+    return temperature, pressure
+
+
+class AtmosphereTable:
+    """
+    Параметры атмосферы, заранее рассчитанные на равномерной сетке высот.
+
+    Поиск ячейки — одно деление (без поиска и без exp на каждом шаге),
+    между узлами — линейная интерполяция; вне таблицы берётся значение на границе.
+    Методы density/temperature/pressure работают с массивами высот,
+    density_at — быстрый скалярный вариант для правых частей ОДУ.
+    """
+
+    def __init__(self, z0: float, dz: float, temperature: np.ndarray, pressure: np.ndarray,
+                 density: np.ndarray, name: str = "table"):
+        self.z0 = float(z0)
+        self.dz = float(dz)
+        self.temperature_table = np.ascontiguousarray(temperature, dtype=np.float64)
+        self.pressure_table = np.ascontiguousarray(pressure, dtype=np.float64)
+        self.density_table = np.ascontiguousarray(density, dtype=np.float64)
+        self.name = name
+        self._density_list: List[float] = self.density_table.tolist()
+        self._last = len(self.density_table) - 1
+
+    @classmethod
+    def isa(cls, z_min: float = -1000.0, z_max: float = 80000.0, dz: float = 10.0) -> "AtmosphereTable":
+        """Стандартная атмосфера ISA (ГОСТ 4401-81 до 80 км)."""
+        altitudes = np.arange(int(round((z_max - z_min) / dz)) + 1) * dz + z_min
+        temperature, pressure = np.array([_isa_point(z) for z in altitudes.tolist()]).T
+        return cls(z_min, dz, temperature, pressure, pressure / (R_AIR * temperature), name="isa")
+
+    @classmethod
+    def exponential(cls, rho0: float = 1.225, scale_height: float = 8500.0, temperature: float = 288.15,
+                    z_min: float = -1000.0, z_max: float = 80000.0, dz: float = 10.0) -> "AtmosphereTable":
+        """Изотермическая модель rho0 * exp(-z / H), как в WindGuidedTrajectory."""
+        altitudes = np.arange(int(round((z_max - z_min) / dz)) + 1) * dz + z_min
+        density = rho0 * np.exp(-altitudes / scale_height)
+        temperatures = np.full_like(altitudes, temperature)
+        return cls(z_min, dz, temperatures, density * R_AIR * temperature, density,
+                   name=f"exp({rho0}, {scale_height})")
+
+    def _interpolate(self, table: np.ndarray, z) -> np.ndarray:
+        s = np.clip((np.asarray(z, dtype=np.float64) - self.z0) / self.dz, 0.0, self._last)
+        i = np.minimum(s.astype(np.intp), max(self._last - 1, 0))
+        f = s - i
+        return table[i] * (1.0 - f) + table[np.minimum(i + 1, self._last)] * f
+
+    def density(self, z) -> np.ndarray:
+        return self._interpolate(self.density_table, z)
+
+    def temperature(self, z) -> np.ndarray:
+        return self._interpolate(self.temperature_table, z)
+
+    def pressure(self, z) -> np.ndarray:
+        return self._interpolate(self.pressure_table, z)
+
+    def density_gradient(self, z) -> np.ndarray:
+        """Производная плотности по высоте (наклон интерполяции), 0 вне таблицы."""
+        z = np.asarray(z, dtype=np.float64)
+        s = (z - self.z0) / self.dz
+        i = np.clip(s.astype(np.intp), 0, max(self._last - 1, 0))
+        slope = (self.density_table[np.minimum(i + 1, self._last)] - self.density_table[i]) / self.dz
+        return np.where((s < 0.0) | (s > self._last), 0.0, slope)
+
+    def speed_of_sound(self, z) -> np.ndarray:
+        return np.sqrt(GAMMA * R_AIR * self.temperature(z))
+
+    def density_at(self, z: float) -> float:
+        """Плотность на одной высоте, без создания массивов."""
+        s = (z - self.z0) / self.dz
+        if s <= 0.0:
+            return self._density_list[0]
+        if s >= self._last:
+            return self._density_list[self._last]
+        i = int(s)
+        f = s - i
+        table = self._density_list
+        return table[i] + (table[i + 1] - table[i]) * f
+
+    def cache_key(self) -> Tuple:
+        digest = hashlib.sha1(self.density_table.tobytes()).hexdigest()
+        return "AtmosphereTable", self.name, self.z0, self.dz, digest
+
+    def __repr__(self) -> str:
+        z_max = self.z0 + self._last * self.dz
+        return f"AtmosphereTable({self.name}, {self.z0:g}..{z_max:g} м, шаг {self.dz:g} м)"
+
+
+@lru_cache(maxsize=None)
+def standard_atmosphere() -> AtmosphereTable:
+    """Общая таблица ISA (строится один раз на процесс)."""
+    return AtmosphereTable.isa()
+
+
+class WindField:
+    """
+    Ветер на регулярной трёхмерной сетке: data[ix, iy, iz] = (wx, wy, wz).
+
+    Ячейка находится делением координат на шаг сетки, значение — трилинейной
+    интерполяцией по восьми узлам; за пределами сетки берётся значение на границе.
+    Ось из одного узла (например, ветер, не зависящий от x и y) допускается.
+    Сетку можно загрузить из файла с отображением в память: читаются
+    только узлы, в которые попадают запрошенные точки.
+    """
+
+    def __init__(self, origin: Sequence[float], spacing: Sequence[float], data: np.ndarray):
+        """
+        :param origin: координаты узла [0, 0, 0] (м)
+        :param spacing: шаг сетки по x, y, z (м)
+        :param data: массив (nx, ny, nz, 3)
+        """
+        if data.ndim != 4 or data.shape[3] != 3:
+            raise ValueError("Ожидается массив ветра формы (nx, ny, nz, 3)")
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.spacing = np.asarray(spacing, dtype=np.float64)
+        self.data = data
+        self._upper = np.array(data.shape[:3], dtype=np.float64) - 1.0
+        self._cell_limit = np.maximum(np.array(data.shape[:3]) - 2, 0)
+        # Файл, из которого загружена сетка (load); ключ кэша считается один раз
+        self.path: Optional[str] = None
+        self._cache_key: Optional[Tuple] = None
+
+    @classmethod
+    def uniform(cls, wind: Sequence[float]) -> "WindField":
+        return cls((0.0, 0.0, 0.0), (1.0, 1.0, 1.0), np.asarray(wind, dtype=np.float64).reshape(1, 1, 1, 3))
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет сетку: данные — в path (.npy), начало и шаг — в соседний .json.
+        """
+        np.save(path, np.asarray(self.data))
+        with open(os.path.splitext(path)[0] + ".json", "w") as f:
+            json.dump({"origin": self.origin.tolist(), "spacing": self.spacing.tolist()}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "WindField":
+        """
+        :param path: файл .npy, записанный save()
+        :param mmap: отображать данные в память, а не читать целиком
+        """
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            header = json.load(f)
+        data = np.load(path, mmap_mode="r" if mmap else None)
+        field = cls(header["origin"], header["spacing"], data)
+        field.path = os.path.abspath(path)
+        return field
+
+    def at(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Ветер в пакете точек.
+
+        :param positions: массив (k, 3)
+        :return: массив (k, 3)
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        s = np.clip((positions - self.origin) / self.spacing, 0.0, self._upper)
+        i0 = np.minimum(s.astype(np.intp), self._cell_limit)
+        f = s - i0
+        i1 = np.minimum(i0 + 1, self._upper.astype(np.intp))
+
+        fx, fy, fz = f[:, 0:1], f[:, 1:2], f[:, 2:3]
+        x0, y0, z0 = i0.T
+        x1, y1, z1 = i1.T
+        data = self.data
+        c00 = data[x0, y0, z0] * (1 - fx) + data[x1, y0, z0] * fx
+        c10 = data[x0, y1, z0] * (1 - fx) + data[x1, y1, z0] * fx
+        c01 = data[x0, y0, z1] * (1 - fx) + data[x1, y0, z1] * fx
+        c11 = data[x0, y1, z1] * (1 - fx) + data[x1, y1, z1] * fx
+        c0 = c00 * (1 - fy) + c10 * fy
+        c1 = c01 * (1 - fy) + c11 * fy
+        return c0 * (1 - fz) + c1 * fz
+
+    def at_point(self, x: float, y: float, z: float) -> np.ndarray:
+        return self.at(np.array([[x, y, z]]))[0]
+
+    def cache_key(self) -> Tuple:
+        """
+        Для сетки из файла — путь, размер и время изменения (данные не читаются),
+        для массива в памяти — хэш данных.
+        """
+        if self._cache_key is None:
+            if self.path is not None:
+                stat = os.stat(self.path)
+                content = (self.path, stat.st_size, stat.st_mtime_ns)
+            else:
+                content = hashlib.sha1(np.ascontiguousarray(self.data).tobytes()).hexdigest()
+            self._cache_key = "WindField", tuple(self.origin.tolist()), tuple(self.spacing.tolist()), content
+        return self._cache_key
+
+
+class LayeredWind:
+    """
+    Ветер по высотным зонам [(z_min, z_max, (wx, wy, wz)), ...] — формат wind_zones.
+
+    Зоны заранее раскладываются на непересекающиеся интервалы, поиск — бинарный.
+    Результат совпадает с перебором зон по порядку (берётся первая зона,
+    содержащая высоту, границы включаются).
+    """
+
+    def __init__(self, wind_zones: Optional[Sequence[Tuple[float, float, Sequence[float]]]]):
+        zones = [(float(lo), float(hi), np.asarray(w, dtype=np.float64)) for lo, hi, w in (wind_zones or [])]
+        self.edges: List[float] = sorted({edge for lo, hi, _ in zones for edge in (lo, hi)})
+
+        def first_zone(z: float) -> np.ndarray:
+            for lo, hi, wind in zones:
+                if lo <= z <= hi:
+                    return wind
+            return np.zeros(3)
+
+        # Значение на самих границах и внутри интервалов между ними
+        self._edge_winds = [first_zone(edge) for edge in self.edges]
+        bounds = [-math.inf] + self.edges + [math.inf]
+        self._interval_winds = [first_zone(z) if z is not None else np.zeros(3)
+                                for z in map(self._inside, bounds[:-1], bounds[1:])]
+
+    @staticmethod
+    def _inside(lo: float, hi: float) -> Optional[float]:
+        """Конечная точка внутри интервала (lo, hi); None для (-inf, +inf) — там зон нет."""
+        if math.isfinite(lo) and math.isfinite(hi):
+            return 0.5 * (lo + hi)
+        if math.isfinite(hi):
+            return hi - 1.0
+        if math.isfinite(lo):
+            return lo + 1.0
+        return None
+
+    def at_point(self, x: float, y: float, z: float) -> np.ndarray:
+        i = bisect_left(self.edges, z)
+        if i < len(self.edges) and self.edges[i] == z:
+            return self._edge_winds[i]
+        return self._interval_winds[i]
+
+    def at(self, positions: np.ndarray) -> np.ndarray:
+        z = np.asarray(positions, dtype=np.float64).reshape(-1, 3)[:, 2]
+        edges = np.asarray(self.edges)
+        i = np.searchsorted(edges, z, side="left")
+        result = np.asarray(self._interval_winds)[i]
+        if len(edges):
+            on_edge = (i < len(edges)) & (edges[np.minimum(i, len(edges) - 1)] == z)
+            result[on_edge] = np.asarray(self._edge_winds)[i[on_edge]]
+        return result
+
+    def cache_key(self) -> Tuple:
+        return "LayeredWind", tuple(self.edges), tuple(tuple(w.tolist()) for w in self._interval_winds)
@@ -0,0 +1,152 @@
+import numpy as np
+from typing import Callable, Optional, Tuple
+
+from Simulation.Cancellation import check_cancelled
+from Simulation.Terrain import Terrain
+
+
+def _norm(vectors: np.ndarray) -> np.ndarray:
+    """Длины строк массива (k, 3)."""
+    return np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+
+def compute_trajectory_batch(
+        distance,
+        v0,
+        angle_surface_deg,
+        angle_target_deg,
+        maneuverability=0.05,
+        drag_coefficient=0.01,
+        accel_phase=2.0,
+        g: float = 9.81,
+        dt: float = 0.1,
+        max_steps: int = 1_000_000,
+        cancel: Optional[Callable[[], bool]] = None,
+        terrain: Optional[Terrain] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Пакетный вариант Model.compute_trajectory: N наборов параметров интегрируются
+    одновременно, состояние хранится как структура массивов (N, 3).
+    Каждое тело останавливается независимо по тому же условию, что и в скалярной версии.
+
+    Все параметры, кроме g, dt и max_steps, принимают скаляр или массив (N,)
+    и приводятся друг к другу по правилам broadcasting.
+
+    :param max_steps: аварийное ограничение числа шагов
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    :param terrain: рельеф; если задан, тело останавливается под его поверхностью, а не под z = 0,
+                    и последняя точка переносится на пересечение шага с рельефом
+    :return: (positions, lengths) — массив (N, T, 3), где после lengths[i] точек
+             траектория дополнена последней точкой, и вектор длин (N,)
+    """
+    distance, v0, angle_surface_deg, angle_target_deg, maneuverability, drag_coefficient, accel_phase = (
+        np.array(a, dtype=np.float64) for a in np.broadcast_arrays(
+            distance, v0, angle_surface_deg, angle_target_deg,
+            maneuverability, drag_coefficient, accel_phase
+        )
+    )
+    distance = np.atleast_1d(distance)
+    n = distance.shape[0]
+    v0, maneuverability, drag_coefficient, accel_phase = (
+        np.atleast_1d(a) for a in (v0, maneuverability, drag_coefficient, accel_phase)
+    )
+
+    theta = np.radians(np.atleast_1d(angle_surface_deg))
+    phi = np.radians(np.atleast_1d(angle_target_deg))
+    dir_vec = np.stack([
+        np.cos(theta) * np.cos(phi),
+        np.cos(theta) * np.sin(phi),
+        np.sin(theta)
+    ], axis=1)
+    end_point = np.zeros((n, 3))
+    end_point[:, 0] = distance
+
+    capacity = 256
+    positions = np.zeros((n, capacity, 3))
+    lengths = np.ones(n, dtype=np.int64)
+
+    # Состояние только активных тел; idx — их номера в исходном пакете
+    idx = np.arange(n)
+    pos = np.zeros((n, 3))
+    velocity = np.zeros((n, 3))
+
+    t = 0.0
+    step = 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        while idx.size and step < max_steps:
+            ground = 0.0 if terrain is None else terrain.heights(pos[:, 0], pos[:, 1])
+            running = (pos[:, 2] >= ground) & (_norm(velocity) > 0.1) | (t < accel_phase[idx])
+            if not running.all():
+                if terrain is not None:
+                    landed = idx[~running & (pos[:, 2] < ground)]
+                    landed = landed[lengths[landed] > 1]
+                    if landed.size:
+                        last = lengths[landed] - 1
+                        before, after = positions[landed, last - 1], positions[landed, last]
+                        s = terrain.segment_crossing(before, after)
+                        positions[landed, last] = before + s[:, None] * (after - before)
+                idx, pos, velocity = idx[running], pos[running], velocity[running]
+                if not idx.size:
+                    break
+
+            step += 1
+            if step % 256 == 0:
+                check_cancelled(cancel)
+            if step == capacity:
+                capacity *= 2
+                grown = np.zeros((n, capacity, 3))
+                grown[:, :step] = positions[:, :step]
+                positions = grown
+
+            pos += velocity * dt
+            positions[idx, step] = pos
+            lengths[idx] = step + 1
+
+            # --- Разгонная фаза ---
+            accel = t < accel_phase[idx]
+            if accel.any():
+                a_idx = idx[accel]
+                target_speed = v0[a_idx] * (t / accel_phase[a_idx])
+                dv = target_speed - _norm(velocity[accel])
+                dv = np.where(dv > 0, dv, 0.0)
+                velocity[accel] += dir_vec[a_idx] * (dv / max(dt, 1e-9))[:, None]
+
+            flight = ~accel
+            if flight.any():
+                f_idx = idx[flight]
+                vel = velocity[flight]
+                p = pos[flight]
+
+                # Гравитация
+                vel[:, 2] -= g * dt
+
+                # Сопротивление воздуха
+                speed = _norm(vel)
+                drag = np.where(speed > 0, drag_coefficient[f_idx], 0.0)
+                vel -= (drag[:, None] * vel) * dt
+
+                # Маневрирование
+                to_target = end_point[f_idx] - p
+                dist_to_target = _norm(to_target)
+                to_target_unit = to_target / dist_to_target[:, None]
+                v_unit = vel / speed[:, None]
+                correction_direction = to_target_unit - np.einsum('ij,ij->i', to_target_unit, v_unit)[:, None] * v_unit
+                correction_norm = _norm(correction_direction)
+                apply = (dist_to_target > 1e-6) & (correction_norm > 1e-6)
+                if apply.any():
+                    correction = (maneuverability[f_idx][apply] * speed[apply])[:, None] \
+                        * correction_direction[apply] / correction_norm[apply][:, None]
+                    vel[apply] += correction * dt
+
+                velocity[flight] = vel
+
+            t += dt
+
+    positions = positions[:, :int(lengths.max())]
+    # Дополняем короткие траектории их последней точкой
+    steps = np.arange(positions.shape[1])
+    last = positions[np.arange(n), lengths - 1]
+    padding = steps[None, :] >= lengths[:, None]
+    positions[padding] = np.broadcast_to(last[:, None, :], positions.shape)[padding]
+    return positions, lengths
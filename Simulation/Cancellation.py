@@ -0,0 +1,11 @@
+from typing import Callable, Optional
+
+
+class ComputationCancelled(Exception):
+    """Вычисление прервано, потому что его результат больше не нужен."""
+
+
+def check_cancelled(cancel: Optional[Callable[[], bool]]) -> None:
+    """Бросает ComputationCancelled, если функция cancel сообщает об отмене."""
+    if cancel is not None and cancel():
+        raise ComputationCancelled()
@@ -0,0 +1,128 @@
+from typing import Optional
+
+import numpy as np
+
+from Simulation.Trajectory import Trajectory
+
+
+def _segment_distances(points: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Расстояния от точек (k, d) до отрезка [a, b]."""
+    ab = b - a
+    length2 = ab @ ab
+    if length2 == 0.0:
+        offset = points - a
+    else:
+        s = np.clip((points - a) @ ab / length2, 0.0, 1.0)
+        offset = points - (a + s[:, None] * ab)
+    return np.sqrt(np.einsum('ij,ij->i', offset, offset))
+
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Упрощение ломаной Дугласа–Пекера: отклонение отброшенных точек
+    от упрощённой ломаной не превышает tolerance.
+
+    Разбиение идёт стеком отрезков, расстояния внутри отрезка считаются одним
+    векторным проходом; для гладких траекторий это O(N log N).
+
+    :param points: массив (N, d)
+    :param tolerance: допустимое отклонение (в единицах координат)
+    :return: возрастающие индексы сохранённых точек (первая и последняя — всегда)
+    """
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _segment_distances(points[first + 1:last], points[first], points[last])
+        k = int(np.argmax(distances))
+        if distances[k] > tolerance:
+            middle = first + 1 + k
+            keep[middle] = True
+            stack.append((first, middle))
+            stack.append((middle, last))
+    return np.nonzero(keep)[0]
+
+
+def minmax_envelope(values: np.ndarray, bins: int) -> np.ndarray:
+    """
+    Прореживание для отображения: ряд делится на bins равных по числу точек частей,
+    в каждой сохраняются первая и последняя точки и точки минимума и максимума
+    каждого столбца — на экране пики не теряются.
+
+    :param values: массив (N,) или (N, d)
+    :param bins: число частей (обычно ширина графика в пикселях)
+    :return: возрастающие индексы сохранённых точек
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n = len(values)
+    size = -(-n // max(int(bins), 1))
+    if size <= 2:
+        return np.arange(n)
+    count = -(-n // size)
+    # Дополняем последнюю часть её же последней точкой, чтобы разложить ряд в (count, size)
+    padded = np.concatenate([values, np.repeat(values[-1:], count * size - n, axis=0)])
+    blocks = padded.reshape(count, size, -1)
+    offsets = np.arange(count)[:, None] * size
+    picked = [
+        offsets[:, 0], np.minimum(offsets[:, 0] + size - 1, n - 1),
+        (offsets + blocks.argmin(axis=1)).ravel(),
+        (offsets + blocks.argmax(axis=1)).ravel(),
+    ]
+    return np.unique(np.minimum(np.concatenate(picked), n - 1))
+
+
+def arc_length_resample(trajectory: Trajectory, spacing: Optional[float] = None,
+                        count: Optional[int] = None) -> Trajectory:
+    """
+    Точки, равномерно расставленные по длине пути (время интерполируется вместе с координатами).
+
+    :param spacing: расстояние между соседними точками (м)
+    :param count: число точек, если spacing не задан
+    """
+    if len(trajectory) < 2:
+        return trajectory.copy()
+    xyz = trajectory.xyz
+    steps = np.sqrt(np.einsum('ij,ij->i', np.diff(xyz, axis=0), np.diff(xyz, axis=0)))
+    path = np.concatenate([[0.0], np.cumsum(steps)])
+    if spacing is not None:
+        count = int(np.floor(path[-1] / spacing + 1e-9)) + 1
+    elif count is None:
+        raise ValueError("Нужно задать spacing или count")
+    grid = np.linspace(0.0, path[-1], max(int(count), 2)) if spacing is None else np.arange(count) * spacing
+    times = np.interp(grid, path, trajectory.t)
+    positions = np.column_stack([np.interp(grid, path, column) for column in xyz.T])
+    return Trajectory.from_columns(times, positions)
+
+
+def simplify(trajectory: Trajectory, tolerance: float) -> Trajectory:
+    """Подмножество точек траектории (с их метками времени) по Дугласу–Пекеру с отклонением tolerance, м."""
+    return Trajectory.from_array(trajectory.data[douglas_peucker(trajectory.xyz, tolerance)])
+
+
+if __name__ == "__main__":
+    import time
+
+    from Simulation.GuidedFlight import simulate_guided_flight_euler
+
+    trajectory = simulate_guided_flight_euler(
+        r0=(0.0, 0.0, 0.0), r_target=(5000.0, 1000.0, 0.0), v0=800.0, theta0_deg=30.0, phi0_deg=10.0,
+        mass=50.0, S=0.01, C_D=0.5, rho=1.225, l_m=0.4, omega_spin_0=300.0, k_cp=0.1, k_guidance=0.5
+    )
+    for tolerance in (0.01, 0.1, 1.0):
+        start = time.perf_counter()
+        simplified = simplify(trajectory, tolerance)
+        print(f"[+] Дуглас–Пекер {tolerance} м: {len(trajectory)} -> {len(simplified)} точек "
+              f"за {(time.perf_counter() - start) * 1e3:.1f} мс")
+    start = time.perf_counter()
+    indices = minmax_envelope(trajectory.xyz, 800)
+    print(f"[+] Огибающая на 800 пикселей: {len(indices)} точек за {(time.perf_counter() - start) * 1e3:.1f} мс")
+    print(f"[+] Через 10 м по пути: {len(arc_length_resample(trajectory, spacing=10.0))} точек")
@@ -0,0 +1,157 @@
+import numpy as np
+from typing import Callable, Optional
+
+# Таблица Бутчера метода Дормана–Принса 5(4)
+_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0])
+_A = [
+    np.array([]),
+    np.array([1 / 5]),
+    np.array([3 / 40, 9 / 40]),
+    np.array([44 / 45, -56 / 15, 32 / 9]),
+    np.array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+    np.array([9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656]),
+]
+_B = np.array([35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+# Разность решений 5-го и 4-го порядка (оценка локальной ошибки)
+_E = np.array([-71 / 57600, 0.0, 71 / 16695, -71 / 1920, 17253 / 339200, -22 / 525, 1 / 40])
+# Коэффициенты непрерывного продолжения 4-го порядка (Hairer, Nørsett, Wanner)
+_P = np.array([
+    [1.0, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0.0, 0.0, 0.0, 0.0],
+    [0.0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0.0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0.0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0.0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0.0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+_SAFETY = 0.9
+_MIN_FACTOR = 0.2
+_MAX_FACTOR = 10.0
+
+
+class DormandPrince:
+    """
+    Явный метод Рунге–Кутты Дормана–Принса 5(4) с адаптивным шагом
+    и плотным выводом (интерполяцией внутри последнего принятого шага).
+
+    Каждый вызов step() делает один принятый шаг; между t_old и t
+    решение можно получить методом dense_output без повторного интегрирования.
+    """
+
+    def __init__(
+            self,
+            fun: Callable[[float, np.ndarray], np.ndarray],
+            t0: float,
+            y0,
+            rtol: float = 1e-6,
+            atol=1e-9,
+            first_step: Optional[float] = None,
+            max_step: float = np.inf,
+            error_weights: Optional[np.ndarray] = None,
+            project: Optional[Callable[[np.ndarray], bool]] = None
+    ) -> None:
+        """
+        :param fun: правая часть f(t, y) -> dy/dt
+        :param t0: начальное время
+        :param y0: начальное состояние
+        :param rtol: относительная точность
+        :param atol: абсолютная точность (скаляр или вектор по компонентам)
+        :param first_step: начальный шаг; если не задан, оценивается автоматически
+        :param max_step: максимальный шаг
+        :param error_weights: веса компонент в норме ошибки (0 — компонента не контролируется)
+        :param project: проекция состояния на допустимую область после принятого шага;
+                        изменяет y на месте и возвращает True, если состояние изменилось
+        """
+        self.fun = fun
+        self.t = float(t0)
+        self.y = np.array(y0, dtype=np.float64)
+        self.rtol = rtol
+        self.atol = np.broadcast_to(np.asarray(atol, dtype=np.float64), self.y.shape)
+        self.max_step = max_step
+        self.error_weights = None if error_weights is None else np.asarray(error_weights, dtype=np.float64)
+        self.project = project
+
+        self.t_old = self.t
+        self.y_old = self.y.copy()
+        self.K = np.empty((7, self.y.size))
+        self.K[0] = fun(self.t, self.y)
+
+        self.n_steps = 0
+        self.n_rejected = 0
+        self.n_fev = 1
+
+        self.h = first_step if first_step is not None else self._initial_step()
+
+    def _error_norm(self, error: np.ndarray, scale: np.ndarray) -> float:
+        ratio = error / scale
+        if self.error_weights is not None:
+            ratio = ratio * self.error_weights
+            return float(np.sqrt(np.sum(ratio ** 2) / max(np.count_nonzero(self.error_weights), 1)))
+        return float(np.sqrt(np.mean(ratio ** 2)))
+
+    def _initial_step(self) -> float:
+        """Оценка начального шага (Hairer, Nørsett, Wanner, II.4)."""
+        scale = self.atol + np.abs(self.y) * self.rtol
+        d0 = self._error_norm(self.y, scale)
+        d1 = self._error_norm(self.K[0], scale)
+        h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+        f1 = self.fun(self.t + h0, self.y + h0 * self.K[0])
+        self.n_fev += 1
+        d2 = self._error_norm(f1 - self.K[0], scale) / h0
+        if d1 <= 1e-15 and d2 <= 1e-15:
+            h1 = max(1e-6, h0 * 1e-3)
+        else:
+            h1 = (0.01 / max(d1, d2)) ** (1 / 5)
+        return min(100 * h0, h1, self.max_step)
+
+    def step(self) -> None:
+        """Выполняет один принятый шаг интегрирования."""
+        t, y, K = self.t, self.y, self.K
+        h = min(self.h, self.max_step)
+
+        while True:
+            for i in range(1, 6):
+                K[i] = self.fun(t + _C[i] * h, y + h * (_A[i] @ K[:i]))
+            y_new = y + h * (_B @ K[:6])
+            K[6] = self.fun(t + h, y_new)
+            self.n_fev += 6
+
+            scale = self.atol + np.maximum(np.abs(y), np.abs(y_new)) * self.rtol
+            error_norm = self._error_norm(h * (_E @ K), scale)
+
+            if error_norm <= 1.0 or not np.isfinite(error_norm) and h <= 1e-12:
+                break
+            if not np.isfinite(error_norm):
+                h *= _MIN_FACTOR
+            else:
+                h *= max(_MIN_FACTOR, _SAFETY * error_norm ** -0.2)
+            self.n_rejected += 1
+
+        self.t_old, self.y_old = t, y
+        self._h_done = h
+        self._Q = K.T @ _P
+        self.t = t + h
+
+        if self.project is not None and self.project(y_new):
+            K[6] = self.fun(self.t, y_new)
+            self.n_fev += 1
+        self.y = y_new
+        K[0] = K[6]
+        self.n_steps += 1
+
+        if error_norm == 0.0:
+            factor = _MAX_FACTOR
+        else:
+            factor = min(_MAX_FACTOR, _SAFETY * error_norm ** -0.2)
+        self.h = h * factor
+
+    def dense_output(self, t_points) -> np.ndarray:
+        """
+        Значения решения в моменты t_points из отрезка [t_old, t] последнего шага.
+
+        :return: массив (k, n)
+        """
+        x = (np.atleast_1d(np.asarray(t_points, dtype=np.float64)) - self.t_old) / self._h_done
+        powers = np.cumprod(np.repeat(x[:, None], 4, axis=1), axis=1)
+        return self.y_old + self._h_done * powers @ self._Q.T
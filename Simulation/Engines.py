@@ -0,0 +1,346 @@
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from Simulation.Atmosphere import AtmosphereTable, LayeredWind, WindField
+from Simulation.Cancellation import check_cancelled
+from Simulation.DormandPrince import DormandPrince
+from Simulation.Forces import (AltitudeReached, ForceModel, Gravity, LateralGuidance, LinearDrag,
+                               MinSpeed, QuadraticDrag, StopCondition, TerrainReached, Thrust, TimeLimit)
+from Simulation.Terrain import Terrain
+from Simulation.Trajectory import Trajectory
+
+
+class FixedStepIntegrator:
+    """Интегратор с постоянным шагом: один шаг метода на интервал выдачи."""
+
+    def __init__(self, forces: ForceModel, step: Callable):
+        self.forces = forces
+        self._step = step
+
+    def reset(self, t: float, state: np.ndarray, idx: np.ndarray) -> None:
+        self.t, self.state, self.idx = t, state, idx
+
+    def advance(self, t_next: float) -> np.ndarray:
+        self.state = self._step(self.forces, self.t, self.state, t_next - self.t, self.idx)
+        self.t = t_next
+        return self.state
+
+
+def _euler_step(forces: ForceModel, t: float, state: np.ndarray, dt: float, idx: np.ndarray) -> np.ndarray:
+    """Полунеявный Эйлер: сначала скорость, затем положение по новой скорости."""
+    new = np.empty_like(state)
+    new[:, 3:] = state[:, 3:] + forces.acceleration(t, state[:, :3], state[:, 3:], idx) * dt
+    new[:, :3] = state[:, :3] + new[:, 3:] * dt
+    return new
+
+
+def _rk4_step(forces: ForceModel, t: float, state: np.ndarray, dt: float, idx: np.ndarray) -> np.ndarray:
+    k1 = forces.derivatives(t, state, idx)
+    k2 = forces.derivatives(t + dt / 2, state + dt / 2 * k1, idx)
+    k3 = forces.derivatives(t + dt / 2, state + dt / 2 * k2, idx)
+    k4 = forces.derivatives(t + dt, state + dt * k3, idx)
+    return state + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+class Dopri5Integrator:
+    """
+    Адаптивный Дорман–Принс для всего пакета как одной системы;
+    значения на сетке выдачи берутся из плотного вывода.
+
+    Если на интервал выдачи уходит больше max_substeps шагов (разрывная правая часть,
+    например смена знака бокового ускорения при проходе над целью), интервал
+    проходится одним шагом RK4, и решатель перезапускается.
+    """
+
+    def __init__(self, forces: ForceModel, rtol: float = 1e-6, atol: float = 1e-3, max_substeps: int = 200):
+        self.forces = forces
+        self.rtol = rtol
+        self.atol = atol
+        self.max_substeps = max_substeps
+
+    def reset(self, t: float, state: np.ndarray, idx: np.ndarray) -> None:
+        n = state.shape[0]
+        forces = self.forces
+
+        def fun(time, y):
+            return forces.derivatives(time, y.reshape(n, 6), idx).ravel()
+
+        self.t, self.state, self.idx = t, state, idx
+        self.solver = DormandPrince(fun, t, state.ravel(), rtol=self.rtol, atol=self.atol)
+
+    def advance(self, t_next: float) -> np.ndarray:
+        solver = self.solver
+        substeps = 0
+        while solver.t < t_next:
+            if substeps == self.max_substeps:
+                state = _rk4_step(self.forces, self.t, self.state, t_next - self.t, self.idx)
+                self.reset(t_next, state, self.idx)
+                return state
+            solver.step()
+            substeps += 1
+        if solver.t == t_next:
+            state = solver.y.reshape(self.state.shape).copy()
+        else:
+            state = solver.dense_output(t_next)[0].reshape(self.state.shape)
+        self.t, self.state = t_next, state
+        return state
+
+
+# Интеграторы: имя -> фабрика от ForceModel
+INTEGRATORS: Dict[str, Callable[[ForceModel], object]] = {
+    "euler": lambda forces: FixedStepIntegrator(forces, _euler_step),
+    "rk4": lambda forces: FixedStepIntegrator(forces, _rk4_step),
+    "dopri5": Dopri5Integrator,
+}
+
+
+def run_forces(
+        forces: ForceModel,
+        r0: np.ndarray,
+        v0: np.ndarray,
+        stop: Sequence[StopCondition],
+        dt: float = 0.01,
+        integrator: str = "rk4",
+        t_max: float = 1e4,
+        cancel: Optional[Callable[[], bool]] = None,
+        integrator_options: Optional[Dict] = None
+) -> List[Trajectory]:
+    """
+    Интегрирует пакет тел под действием набора сил до выполнения условий остановки.
+
+    Состояние хранится массивом (N, 6); остановившиеся тела исключаются из расчёта,
+    остальные продолжают. Точки выдаются с шагом dt, последняя точка тела —
+    уточнённый момент срабатывания условия (если условие это умеет).
+
+    :param r0: начальные положения (N, 3)
+    :param v0: начальные скорости (N, 3)
+    :param stop: условия остановки; тело останавливается по первому сработавшему
+    :param dt: шаг выдачи (и шаг интегрирования для euler/rk4)
+    :param integrator: ключ INTEGRATORS
+    :param t_max: предельная длительность
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    :param integrator_options: аргументы фабрики интегратора (для dopri5 — rtol, atol, max_substeps)
+    :return: список траекторий (t, x, y, z) в порядке тел
+    """
+    if integrator not in INTEGRATORS:
+        raise ValueError(f"Неизвестный интегратор: {integrator}")
+    r0 = np.asarray(r0, dtype=np.float64).reshape(-1, 3)
+    v0 = np.asarray(v0, dtype=np.float64).reshape(-1, 3)
+    n = r0.shape[0]
+
+    capacity = 256
+    positions = np.empty((n, capacity, 3))
+    positions[:, 0] = r0
+    lengths = np.ones(n, dtype=np.int64)
+    end_times = np.full(n, np.nan)
+
+    idx = np.arange(n)
+    state = np.hstack([r0, v0])
+    stepper = INTEGRATORS[integrator](forces, **(integrator_options or {}))
+    stepper.reset(0.0, state, idx)
+
+    step = 0
+    while idx.size:
+        step += 1
+        if step % 256 == 0:
+            check_cancelled(cancel)
+        t_prev, t = (step - 1) * dt, step * dt
+        new = stepper.advance(t)
+
+        if step == capacity:
+            capacity *= 2
+            grown = np.empty((n, capacity, 3))
+            grown[:, :step] = positions[:, :step]
+            positions = grown
+        positions[idx, step] = new[:, :3]
+        lengths[idx] = step + 1
+
+        stopped = np.zeros(idx.size, dtype=bool)
+        for condition in stop:
+            hit = condition.check(t, new[:, :3], new[:, 3:], idx)
+            if not hit.any():
+                continue
+            fraction = condition.crossing(t_prev, t, state[hit, :3], new[hit, :3])
+            first = ~stopped[hit]
+            rows = np.nonzero(hit)[0][first]
+            if fraction is None:
+                end_times[idx[rows]] = t
+            else:
+                s = fraction[first]
+                positions[idx[rows], step] = state[rows, :3] + s[:, None] * (new[rows, :3] - state[rows, :3])
+                end_times[idx[rows]] = t_prev + s * dt
+            stopped |= hit
+        if t >= t_max:
+            end_times[idx[~stopped]] = t
+            break
+
+        if stopped.any():
+            idx, state = idx[~stopped], new[~stopped]
+            if idx.size:
+                stepper.reset(t, state, idx)
+        else:
+            state = new
+
+    trajectories = []
+    for i in range(n):
+        times = np.arange(lengths[i]) * dt
+        if np.isfinite(end_times[i]):
+            times[-1] = end_times[i]
+        trajectories.append(Trajectory.from_columns(times, positions[i, :lengths[i]]))
+    return trajectories
+
+
+class EngineSetup:
+    """Описание задачи для run_forces: силы, начальные условия, условия остановки и шаг по умолчанию."""
+
+    def __init__(self, forces: ForceModel, r0: np.ndarray, v0: np.ndarray,
+                 stop: Sequence[StopCondition], dt: float = 0.01):
+        self.forces = forces
+        self.r0 = r0
+        self.v0 = v0
+        self.stop = list(stop)
+        self.dt = dt
+
+
+# Реестр движков: имя -> функция параметров, возвращающая EngineSetup
+ENGINES: Dict[str, Callable[..., EngineSetup]] = {}
+
+
+def register_engine(name: str):
+    def decorator(factory: Callable[..., EngineSetup]):
+        ENGINES[name] = factory
+        return factory
+    return decorator
+
+
+def simulate_engine(name: str, integrator: str = "rk4", dt: Optional[float] = None,
+                    t_max: float = 1e4, cancel: Optional[Callable[[], bool]] = None,
+                    integrator_options: Optional[Dict] = None, **params) -> List[Trajectory]:
+    """
+    Строит задачу зарегистрированного движка и интегрирует её выбранным интегратором.
+    Параметры, переданные массивами (N,), дают пакет из N тел.
+
+    :param integrator_options: аргументы фабрики интегратора, например dict(rtol=1e-6, atol=1e-8) для dopri5
+
+    :return: список траекторий, по одной на тело
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Неизвестный движок: {name}")
+    setup = ENGINES[name](**params)
+    return run_forces(setup.forces, setup.r0, setup.v0, setup.stop,
+                      dt=setup.dt if dt is None else dt, integrator=integrator,
+                      t_max=t_max, cancel=cancel, integrator_options=integrator_options)
+
+
+def _launch_directions(angle_surface_deg, angle_target_deg) -> np.ndarray:
+    theta = np.radians(np.atleast_1d(np.asarray(angle_surface_deg, dtype=np.float64)))
+    phi = np.radians(np.atleast_1d(np.asarray(angle_target_deg, dtype=np.float64)))
+    return np.stack([
+        np.cos(theta) * np.cos(phi),
+        np.cos(theta) * np.sin(phi),
+        np.sin(theta)
+    ], axis=1)
+
+
+@register_engine("maneuvering")
+def maneuvering_engine(distance, v0, angle_surface_deg, angle_target_deg,
+                       maneuverability=0.05, drag_coefficient=0.01, accel_phase=2.0,
+                       g: float = 9.81, terrain: Optional[Terrain] = None) -> EngineSetup:
+    """
+    Модель compute_trajectory из компонент: равномерный разгон до v0 за accel_phase,
+    затем тяжесть, линейное сопротивление и маневрирование к (distance, 0, 0).
+    Отличия: разгон задан постоянным ускорением, а не подстановкой скорости на шаге;
+    боковое ускорение сглажено в пределах 0.01 рад от линии визирования.
+    Если задан рельеф terrain, полёт заканчивается на нём, а не на z = 0.
+    """
+    distance, v0, angle_surface_deg, angle_target_deg, maneuverability, drag_coefficient, accel_phase = (
+        np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in np.broadcast_arrays(
+            distance, v0, angle_surface_deg, angle_target_deg, maneuverability, drag_coefficient, accel_phase
+        )
+    )
+    n = distance.shape[0]
+    direction = _launch_directions(angle_surface_deg, angle_target_deg)
+    target = np.zeros((n, 3))
+    target[:, 0] = distance
+
+    boosted = accel_phase > 0
+    thrust = np.where(boosted, v0 / np.where(boosted, accel_phase, 1.0), 0.0)
+    initial_velocity = np.where(boosted, 0.0, v0)[:, None] * direction
+
+    forces = ForceModel([
+        Thrust(thrust, direction, end=accel_phase),
+        Gravity(g, start=accel_phase),
+        LinearDrag(drag_coefficient, start=accel_phase),
+        LateralGuidance(target, maneuverability, mode="speed", blend=0.01, start=accel_phase),
+    ])
+    stop = [
+        AltitudeReached(0.0, descending=False, not_before=accel_phase) if terrain is None
+        else TerrainReached(terrain, not_before=accel_phase),
+        MinSpeed(0.1, not_before=accel_phase),
+    ]
+    return EngineSetup(forces, np.zeros((n, 3)), initial_velocity, stop, dt=0.1)
+
+
+@register_engine("wind_guided")
+def wind_guided_engine(m, S, C_D, start, target, v0, g: float = 9.81,
+                       wind_zones=None, wind_field: Optional[WindField] = None,
+                       atmosphere: Optional[AtmosphereTable] = None,
+                       k_c: float = 2.0, p: float = 2, wind_offset=None,
+                       terrain: Optional[Terrain] = None) -> EngineSetup:
+    """
+    Модель WindGuidedTrajectory из компонент: тяжесть, квадратичное сопротивление
+    с ветром и таблицей атмосферы, боковая коррекция к цели.
+    start, target, v0 и постоянная добавка к ветру wind_offset — (3,) или (N, 3);
+    m, C_D — скаляры или (N,).
+    Если задан рельеф terrain, полёт заканчивается и при столкновении с ним до высоты цели.
+    """
+    start = np.asarray(start, dtype=np.float64).reshape(-1, 3)
+    v0 = np.asarray(v0, dtype=np.float64).reshape(-1, 3)
+    target = np.asarray(target, dtype=np.float64).reshape(-1, 3)
+    n = max(start.shape[0], v0.shape[0], target.shape[0])
+    start, v0, target = (np.broadcast_to(a, (n, 3)).copy() for a in (start, v0, target))
+    if atmosphere is None:
+        atmosphere = AtmosphereTable.exponential()
+    wind = wind_field if wind_field is not None else LayeredWind(wind_zones)
+
+    forces = ForceModel([
+        Gravity(g),
+        QuadraticDrag(C_D, S, m, atmosphere=atmosphere, wind=wind, wind_offset=wind_offset),
+        LateralGuidance(target, k_c, mode="scaled", v_ref=np.linalg.norm(v0, axis=1), p=p, blend=0.01),
+    ])
+    stop = [AltitudeReached(target[:, 2], descending=True)]
+    if terrain is not None:
+        stop.append(TerrainReached(terrain))
+    return EngineSetup(forces, start, v0, stop, dt=0.05)
+
+
+@register_engine("straight")
+def straight_engine(speed, distance, heading_deg=0.0, start=(0.0, 0.0, 0.0)) -> EngineSetup:
+    """Равномерное прямолинейное движение без сил до прохождения distance."""
+    speed, distance, heading_deg = (
+        np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in np.broadcast_arrays(speed, distance, heading_deg)
+    )
+    n = speed.shape[0]
+    heading = np.radians(heading_deg)
+    velocity = np.stack([speed * np.cos(heading), speed * np.sin(heading), np.zeros(n)], axis=1)
+    start = np.broadcast_to(np.asarray(start, dtype=np.float64), (n, 3)).copy()
+    return EngineSetup(ForceModel([]), start, velocity, [TimeLimit(distance / speed)], dt=0.1)
+
+
+if __name__ == "__main__":
+    import time
+
+    for integrator in INTEGRATORS:
+        start = time.perf_counter()
+        trajectories = simulate_engine(
+            "maneuvering", integrator=integrator,
+            distance=np.linspace(2000.0, 20000.0, 100), v0=800.0,
+            angle_surface_deg=30.0, angle_target_deg=np.linspace(-40.0, 40.0, 100),
+            maneuverability=0.1, drag_coefficient=0.02
+        )
+        elapsed = time.perf_counter() - start
+        last = trajectories[-1].data[-1]
+        print(f"[+] {integrator}: {len(trajectories)} траекторий за {elapsed * 1e3:.0f} мс, "
+              f"последняя: t={last[0]:.2f} с, ({last[1]:.1f}, {last[2]:.1f}, {last[3]:.1f})")
@@ -0,0 +1,288 @@
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from Simulation.Atmosphere import AtmosphereTable, LayeredWind, WindField
+from Simulation.Terrain import Terrain
+
+# Параметр силы: скаляр (общий для всех тел) или массив (N, ...) — своё значение каждому телу
+PerBody = Union[float, Sequence[float], np.ndarray]
+
+
+def _per_body(value, idx: np.ndarray):
+    """Значение параметра для активных тел idx (скаляр и общий вектор возвращаются как есть)."""
+    return value[idx] if isinstance(value, np.ndarray) and value.ndim and value.shape[0] > 1 else value
+
+
+def _norm(vectors: np.ndarray) -> np.ndarray:
+    """Длины строк массива (k, 3)."""
+    return np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+
+class ForceComponent:
+    """
+    Слагаемое ускорения для пакета тел.
+
+    acceleration получает положения и скорости активных тел (k, 3) и их номера idx
+    в исходном пакете (для параметров, заданных по телам) и возвращает (k, 3).
+    Компонента действует в окне времени [start, end); границы тоже могут быть заданы по телам.
+    """
+
+    def __init__(self, start: PerBody = 0.0, end: PerBody = np.inf):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+
+    def acceleration(self, t: float, pos: np.ndarray, vel: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def active(self, t: float, idx: np.ndarray) -> Optional[np.ndarray]:
+        """Маска тел, для которых компонента действует в момент t; None — действует для всех."""
+        if not self.start.any() and np.isinf(self.end).all():
+            return None
+        start = _per_body(self.start, idx)
+        end = _per_body(self.end, idx)
+        return np.broadcast_to((t >= start) & (t < end), idx.shape)
+
+
+class Gravity(ForceComponent):
+    def __init__(self, g: float = 9.81, **window):
+        super().__init__(**window)
+        self.g = g
+
+    def acceleration(self, t, pos, vel, idx):
+        acc = np.zeros_like(vel)
+        acc[:, 2] = -self.g
+        return acc
+
+
+class LinearDrag(ForceComponent):
+    """Сопротивление, пропорциональное скорости: a = -k v (как в compute_trajectory)."""
+
+    def __init__(self, coefficient: PerBody, **window):
+        super().__init__(**window)
+        self.coefficient = np.asarray(coefficient, dtype=np.float64)
+
+    def acceleration(self, t, pos, vel, idx):
+        k = _per_body(self.coefficient, idx)
+        return -np.reshape(k, (-1, 1)) * vel
+
+
+class QuadraticDrag(ForceComponent):
+    """
+    Аэродинамическое сопротивление a = -rho(z) C_D S / (2 m) |v - w| (v - w).
+
+    Плотность берётся из таблицы atmosphere или постоянная rho;
+    ветер w — из WindField/LayeredWind (по умолчанию безветрие) плюс постоянная
+    добавка wind_offset, общая (3,) или своя у каждого тела (N, 3).
+    """
+
+    def __init__(self, C_D: PerBody, S: PerBody, mass: PerBody,
+                 rho: float = 1.225, atmosphere: Optional[AtmosphereTable] = None,
+                 wind: Union[WindField, LayeredWind, None] = None,
+                 wind_offset: Optional[np.ndarray] = None, **window):
+        super().__init__(**window)
+        self.k = 0.5 * np.asarray(C_D, dtype=np.float64) * np.asarray(S, dtype=np.float64) \
+            / np.asarray(mass, dtype=np.float64)
+        self.rho = rho
+        self.atmosphere = atmosphere
+        self.wind = wind
+        self.wind_offset = None if wind_offset is None else np.asarray(wind_offset, dtype=np.float64).reshape(-1, 3)
+
+    def acceleration(self, t, pos, vel, idx):
+        v_rel = vel if self.wind is None else vel - self.wind.at(pos)
+        if self.wind_offset is not None:
+            v_rel = v_rel - (self.wind_offset[idx] if self.wind_offset.shape[0] > 1 else self.wind_offset)
+        rho = self.rho if self.atmosphere is None else self.atmosphere.density(pos[:, 2])
+        scale = np.reshape(_per_body(self.k, idx), (-1,)) * rho * _norm(v_rel)
+        return -scale[:, None] * v_rel
+
+
+class LateralGuidance(ForceComponent):
+    """
+    Боковое ускорение к цели, перпендикулярное скорости (направление — составляющая
+    линии визирования, ортогональная скорости).
+
+    Модуль:
+      mode="speed" — gain * |v| (маневрирование compute_trajectory);
+      mode="scaled" — gain * min(1, (|v| / v_ref)^p) (коррекция WindGuidedTrajectory).
+
+    blend > 0 — если угол между скоростью и линией визирования меньше blend радиан,
+    модуль уменьшается пропорционально углу; сила становится непрерывной при проходе
+    линии визирования через вектор скорости (иначе направление скачком меняется
+    на противоположное и шаг адаптивного интегратора вырождается).
+    """
+
+    def __init__(self, target: Sequence[float], gain: PerBody, mode: str = "speed",
+                 v_ref: PerBody = 1.0, p: float = 2.0, blend: float = 0.0, **window):
+        super().__init__(**window)
+        if mode not in ("speed", "scaled"):
+            raise ValueError(f"Неизвестный режим наведения: {mode}")
+        self.target = np.asarray(target, dtype=np.float64).reshape(-1, 3)
+        self.gain = np.asarray(gain, dtype=np.float64)
+        self.mode = mode
+        self.v_ref = np.asarray(v_ref, dtype=np.float64)
+        self.p = p
+        self.blend = blend
+
+    def acceleration(self, t, pos, vel, idx):
+        target = self.target[idx] if self.target.shape[0] > 1 else self.target
+        speed = _norm(vel)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            v_unit = vel / speed[:, None]
+            to_target = target - pos
+            perpendicular = to_target - np.einsum('ij,ij->i', to_target, v_unit)[:, None] * v_unit
+            perpendicular_norm = _norm(perpendicular)
+            gain = np.reshape(_per_body(self.gain, idx), (-1,))
+            if self.mode == "speed":
+                magnitude = gain * speed
+            else:
+                v_ref = np.reshape(_per_body(self.v_ref, idx), (-1,))
+                magnitude = gain * np.minimum(1.0, (speed / v_ref) ** self.p)
+            if self.blend > 0:
+                angle = perpendicular_norm / _norm(to_target)
+                magnitude = magnitude * np.minimum(1.0, angle / self.blend)
+            acc = (magnitude / perpendicular_norm)[:, None] * perpendicular
+        valid = (speed > 1e-2) & (perpendicular_norm > 1e-6)
+        return np.where(valid[:, None], acc, 0.0)
+
+
+class Thrust(ForceComponent):
+    """
+    Постоянное ускорение вдоль заданного направления (разгонная фаза).
+    Например, разгон до v0 за T секунд: Thrust(v0 / T, direction, end=T).
+    """
+
+    def __init__(self, acceleration: PerBody, direction: Sequence[float], **window):
+        super().__init__(**window)
+        direction = np.asarray(direction, dtype=np.float64).reshape(-1, 3)
+        self.direction = direction / _norm(direction)[:, None]
+        self.magnitude = np.asarray(acceleration, dtype=np.float64)
+
+    def acceleration(self, t, pos, vel, idx):
+        direction = self.direction[idx] if self.direction.shape[0] > 1 else self.direction
+        magnitude = np.reshape(_per_body(self.magnitude, idx), (-1, 1))
+        return np.broadcast_to(magnitude * direction, vel.shape).copy()
+
+
+class ForceModel:
+    """Сумма компонент: ускорение и производная состояния (pos, vel) для пакета тел."""
+
+    def __init__(self, components: Sequence[ForceComponent]):
+        self.components: List[ForceComponent] = list(components)
+
+    def acceleration(self, t: float, pos: np.ndarray, vel: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        total = np.zeros_like(vel)
+        for component in self.components:
+            mask = component.active(t, idx)
+            if mask is None:
+                total += component.acceleration(t, pos, vel, idx)
+            elif mask.any():
+                total[mask] += component.acceleration(t, pos[mask], vel[mask], idx[mask])
+        return total
+
+    def derivatives(self, t: float, state: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        """
+        :param state: массив (k, 6) — x, y, z, vx, vy, vz
+        :return: производные (k, 6)
+        """
+        out = np.empty_like(state)
+        out[:, :3] = state[:, 3:]
+        out[:, 3:] = self.acceleration(t, state[:, :3], state[:, 3:], idx)
+        return out
+
+
+class StopCondition:
+    """
+    Условие остановки тела; проверяется после каждого шага выдачи.
+    crossing возвращает долю шага (0..1), на которой условие выполнилось точно,
+    или None, если уточнять точку не нужно.
+    """
+
+    def check(self, t: float, pos: np.ndarray, vel: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def crossing(self, prev_t: float, t: float, prev_pos: np.ndarray, pos: np.ndarray) -> Optional[np.ndarray]:
+        """Вызывается для тел, остановленных последним check."""
+        return None
+
+
+class AltitudeReached(StopCondition):
+    """
+    Тело опустилось до высоты level (по телам или общей).
+
+    :param descending: только при снижении (vz < 0), т. е. после апогея
+    :param not_before: не проверять раньше этого момента (например, до конца разгона)
+    :param interpolate: уточнять последнюю точку до пересечения уровня
+    """
+
+    def __init__(self, level: PerBody = 0.0, descending: bool = True, not_before: PerBody = 0.0,
+                 interpolate: bool = True):
+        self.level = np.asarray(level, dtype=np.float64)
+        self.descending = descending
+        self.not_before = np.asarray(not_before, dtype=np.float64)
+        self.interpolate = interpolate
+        self._levels = None
+
+    def check(self, t, pos, vel, idx):
+        level = _per_body(self.level, idx)
+        stopped = (pos[:, 2] <= level) & (t >= _per_body(self.not_before, idx))
+        if self.descending:
+            stopped &= vel[:, 2] < 0
+        self._levels = np.broadcast_to(level, idx.shape)[stopped]
+        return stopped
+
+    def crossing(self, prev_t, t, prev_pos, pos):
+        if not self.interpolate:
+            return None
+        dz = prev_pos[:, 2] - pos[:, 2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            s = np.where(dz > 0, (prev_pos[:, 2] - self._levels) / dz, 1.0)
+        return np.clip(s, 0.0, 1.0)
+
+
+class TerrainReached(StopCondition):
+    """
+    Тело ушло под поверхность рельефа (после not_before).
+    Точка пересечения уточняется бисекцией по отрезку шага.
+    """
+
+    def __init__(self, terrain: Terrain, not_before: PerBody = 0.0, interpolate: bool = True):
+        self.terrain = terrain
+        self.not_before = np.asarray(not_before, dtype=np.float64)
+        self.interpolate = interpolate
+
+    def check(self, t, pos, vel, idx):
+        return (self.terrain.clearance(pos) < 0) & (t >= _per_body(self.not_before, idx))
+
+    def crossing(self, prev_t, t, prev_pos, pos):
+        if not self.interpolate:
+            return None
+        return self.terrain.segment_crossing(prev_pos, pos)
+
+
+class MinSpeed(StopCondition):
+    """Скорость упала ниже v_min (после not_before)."""
+
+    def __init__(self, v_min: float = 0.1, not_before: PerBody = 0.0):
+        self.v_min = v_min
+        self.not_before = np.asarray(not_before, dtype=np.float64)
+
+    def check(self, t, pos, vel, idx):
+        return (_norm(vel) <= self.v_min) & (t >= _per_body(self.not_before, idx))
+
+
+class TimeLimit(StopCondition):
+    """Достигнута длительность duration (по телам или общая)."""
+
+    def __init__(self, duration: PerBody):
+        self.duration = np.asarray(duration, dtype=np.float64)
+        self._durations = None
+
+    def check(self, t, pos, vel, idx):
+        duration = np.broadcast_to(_per_body(self.duration, idx), idx.shape)
+        stopped = t >= duration - 1e-9
+        self._durations = duration[stopped]
+        return stopped
+
+    def crossing(self, prev_t, t, prev_pos, pos):
+        return np.clip((self._durations - prev_t) / (t - prev_t), 0.0, 1.0)
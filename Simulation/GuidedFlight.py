@@ -0,0 +1,739 @@
+import math
+import time
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from scipy.optimize import brentq
+
+from Simulation.Atmosphere import AtmosphereTable
+from Simulation.Cancellation import check_cancelled
+from Simulation.DormandPrince import DormandPrince
+from Simulation.Terrain import Terrain, clip_blocks
+from Simulation.Trajectory import Trajectory, rechunk
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Ограничения на угловые скорости (omega_x, omega_y, omega_z) и углы ориентации (delta_y, delta_z)
+_ATTITUDE_LIMITS = np.array([15000.0, 2000.0, 2000.0, 1.0, 1.0])
+
+# Диапазон rtol, в котором Дорман–Принс проверен по guided_flight_accuracy_report:
+# точка падения в пределах метра от Эйлера. При rtol ~1e-8 шагов становится ~10^5,
+# ошибка округления накапливается и отклонение вырастает до десятков метров.
+DOPRI5_RTOL_RANGE = (1e-6, 1e-4)
+
+
+def simulate_guided_flight_euler_reference(r0, r_target, v0, theta0_deg, phi0_deg,
+                                           mass, S, C_D, rho, l_m,
+                                           omega_spin_0, k_cp, k_guidance,
+                                           Ix=0.01, Iy=0.002, Iz=0.002,
+                                           dt=0.005, g=9.81
+                                           ) -> Trajectory:
+    """
+    Сбалансированная модель полета снаряда с уравнениями Эйлера (10.9) и активным управлением.
+    Включает ограничения, достаточные для стабильности, но позволяющие маневрировать.
+    Интегрирование — явный метод Эйлера с постоянным шагом dt.
+
+    Эталонная реализация на векторах NumPy; рабочий вариант — simulate_guided_flight_euler.
+    """
+
+    r = np.array(r0, dtype=np.float64)
+    traj = Trajectory()
+    traj.append(0.0, r)
+
+    theta = np.radians(theta0_deg)
+    phi = np.radians(phi0_deg)
+    dir0 = np.array([
+        np.cos(theta) * np.cos(phi),
+        np.cos(theta) * np.sin(phi),
+        np.sin(theta)
+    ])
+    v = v0 * dir0
+
+    # Угловые скорости
+    omega_x = omega_spin_0
+    omega_y = omega_z = 0.0
+    # Отклонения ориентации
+    delta_y = delta_z = 0.0
+
+    z_target = r_target[2]
+    has_reached_apex = False
+
+    for step in range(200000):
+        t = step * dt
+        speed = np.linalg.norm(v)
+        if speed < 1e-3:
+            break
+
+        # Аэродинамические и управляющие моменты
+        Mx = -Ix * k_cp * omega_x
+        My_aero = -rho * speed ** 2 * S * l_m * delta_y / 2
+        Mz_aero = -rho * speed ** 2 * S * l_m * delta_z / 2
+
+        to_target = np.array(r_target) - r
+        to_target /= np.linalg.norm(to_target)
+        velocity_dir = v / speed
+        error = to_target - velocity_dir
+        error = np.clip(error, -1.0, 1.0)  # до ±1 рад (≈ 57°)
+
+        My_control = -k_guidance * error[1]
+        Mz_control = -k_guidance * error[2]
+        My = My_aero + My_control
+        Mz = Mz_aero + Mz_control
+
+        # Уравнения Эйлера
+        domega_x = Mx / Ix
+        domega_y = (My - (Iz - Ix) * omega_z * omega_x) / Iy
+        domega_z = (Mz - (Ix - Iy) * omega_x * omega_y) / Iz
+
+        if not np.isfinite(domega_y) or not np.isfinite(domega_z):
+            break
+
+        omega_x += domega_x * dt
+        omega_y += domega_y * dt
+        omega_z += domega_z * dt
+
+        # Ограничения на угловые скорости
+        omega_x = np.clip(omega_x, -15000, 15000)
+        omega_y = np.clip(omega_y, -2000, 2000)
+        omega_z = np.clip(omega_z, -2000, 2000)
+
+        # Интеграция углов ориентации
+        delta_y += omega_y * dt
+        delta_z += omega_z * dt
+
+        # Ограничения на углы ориентации
+        delta_y = np.clip(delta_y, -1.0, 1.0)
+        delta_z = np.clip(delta_z, -1.0, 1.0)
+
+        # Ось тела
+        body_dir = velocity_dir + np.array([0, delta_y, delta_z])
+        norm_bd = np.linalg.norm(body_dir)
+        if norm_bd < 1e-6:
+            body_dir = velocity_dir
+        else:
+            body_dir /= norm_bd
+
+        # Силы
+        F_aero = -0.5 * rho * C_D * S * speed * body_dir
+        F_grav = np.array([0, 0, -mass * g])
+        a_lin = (F_aero + F_grav) / mass
+
+        # Интеграция поступательного движения
+        v += a_lin * dt
+        r += v * dt
+        traj.append((step + 1) * dt, r)
+
+        # Условие завершения
+        if not has_reached_apex and v[2] < 0:
+            has_reached_apex = True
+        if has_reached_apex and r[2] <= z_target:
+            break
+
+    return traj
+
+
+
+# Раскладка состояния скалярного ядра
+_STATE_SIZE = 12
+_APEX = 11
+
+
+def _guided_euler_steps(state, out, max_steps,
+                        xt, yt, zt, mass, S, C_D, rho, l_m,
+                        k_cp, k_guidance, Ix, Iy, Iz, dt, g,
+                        rho_z0, rho_dz, rho_table):
+    """
+    До max_steps шагов схемы Эйлера simulate_guided_flight_euler_reference
+    на скалярах, без выделения памяти на шаге.
+
+    :param state: буфер (12,) — x, y, z, vx, vy, vz, omega_x, omega_y, omega_z,
+                  delta_y, delta_z, признак прохождения апогея; обновляется на месте
+    :param out: буфер (max_steps, 3) для новых точек траектории
+    :param rho_z0, rho_dz, rho_table: таблица плотности по высоте (AtmosphereTable);
+                  пустая таблица — постоянная плотность rho
+    :return: (число записанных точек, признак завершения полёта)
+    """
+    rho_last = rho_table.shape[0] - 1
+    x, y, z = state[0], state[1], state[2]
+    vx, vy, vz = state[3], state[4], state[5]
+    omega_x, omega_y, omega_z = state[6], state[7], state[8]
+    delta_y, delta_z = state[9], state[10]
+    has_reached_apex = state[_APEX] != 0.0
+
+    n = 0
+    finished = False
+    while n < max_steps:
+        speed = math.sqrt(vx * vx + vy * vy + vz * vz)
+        if speed < 1e-3:
+            finished = True
+            break
+
+        if rho_last >= 0:
+            s = (z - rho_z0) / rho_dz
+            if s <= 0.0:
+                rho = rho_table[0]
+            elif s >= rho_last:
+                rho = rho_table[rho_last]
+            else:
+                i = int(s)
+                rho = rho_table[i] + (rho_table[i + 1] - rho_table[i]) * (s - i)
+
+        # Аэродинамические и управляющие моменты
+        Mx = -Ix * k_cp * omega_x
+        My_aero = -rho * speed ** 2 * S * l_m * delta_y / 2
+        Mz_aero = -rho * speed ** 2 * S * l_m * delta_z / 2
+
+        tx, ty, tz = xt - x, yt - y, zt - z
+        dist = math.sqrt(tx * tx + ty * ty + tz * tz)
+        ux, uy, uz = vx / speed, vy / speed, vz / speed
+        error_y = min(max(ty / dist - uy, -1.0), 1.0)
+        error_z = min(max(tz / dist - uz, -1.0), 1.0)
+
+        My = My_aero + -k_guidance * error_y
+        Mz = Mz_aero + -k_guidance * error_z
+
+        # Уравнения Эйлера
+        domega_x = Mx / Ix
+        domega_y = (My - (Iz - Ix) * omega_z * omega_x) / Iy
+        domega_z = (Mz - (Ix - Iy) * omega_x * omega_y) / Iz
+        if not math.isfinite(domega_y) or not math.isfinite(domega_z):
+            finished = True
+            break
+
+        omega_x = min(max(omega_x + domega_x * dt, -15000.0), 15000.0)
+        omega_y = min(max(omega_y + domega_y * dt, -2000.0), 2000.0)
+        omega_z = min(max(omega_z + domega_z * dt, -2000.0), 2000.0)
+
+        delta_y = min(max(delta_y + omega_y * dt, -1.0), 1.0)
+        delta_z = min(max(delta_z + omega_z * dt, -1.0), 1.0)
+
+        # Ось тела
+        bx, by, bz = ux, uy + delta_y, uz + delta_z
+        norm_bd = math.sqrt(bx * bx + by * by + bz * bz)
+        if norm_bd < 1e-6:
+            bx, by, bz = ux, uy, uz
+        else:
+            bx, by, bz = bx / norm_bd, by / norm_bd, bz / norm_bd
+
+        # Силы
+        k_aero = -0.5 * rho * C_D * S * speed
+        vx += (k_aero * bx + 0.0) / mass * dt
+        vy += (k_aero * by + 0.0) / mass * dt
+        vz += (k_aero * bz + -mass * g) / mass * dt
+        x += vx * dt
+        y += vy * dt
+        z += vz * dt
+
+        out[n, 0] = x
+        out[n, 1] = y
+        out[n, 2] = z
+        n += 1
+
+        # Условие завершения
+        if not has_reached_apex and vz < 0:
+            has_reached_apex = True
+        if has_reached_apex and z <= zt:
+            finished = True
+            break
+
+    state[0], state[1], state[2] = x, y, z
+    state[3], state[4], state[5] = vx, vy, vz
+    state[6], state[7], state[8] = omega_x, omega_y, omega_z
+    state[9], state[10] = delta_y, delta_z
+    state[_APEX] = 1.0 if has_reached_apex else 0.0
+    return n, finished
+
+
+if numba is not None:
+    _guided_euler_kernel = numba.njit(cache=True, nogil=True)(_guided_euler_steps)
+else:
+    _guided_euler_kernel = _guided_euler_steps
+
+
+def iter_guided_flight_euler(r0, r_target, v0, theta0_deg, phi0_deg,
+                             mass, S, C_D, rho, l_m,
+                             omega_spin_0, k_cp, k_guidance,
+                             Ix=0.01, Iy=0.002, Iz=0.002,
+                             dt=0.005, g=9.81,
+                             atmosphere: Optional[AtmosphereTable] = None,
+                             cancel: Optional[Callable[[], bool]] = None,
+                             chunk_size: int = 4096, max_steps: int = 200000,
+                             terrain: Optional[Terrain] = None
+                             ) -> Iterator[np.ndarray]:
+    """
+    Потоковый вариант simulate_guided_flight_euler: прогоняет скалярное ядро
+    порциями и выдаёт блоки (k, 4) со столбцами t, x, y, z, k <= chunk_size.
+    Между порциями проверяется отмена (см. check_cancelled).
+
+    :param terrain: рельеф; если задан, траектория обрывается на столкновении с ним (clip_blocks)
+    """
+    blocks = _guided_euler_blocks(r0, r_target, v0, theta0_deg, phi0_deg,
+                                  mass, S, C_D, rho, l_m,
+                                  omega_spin_0, k_cp, k_guidance,
+                                  Ix, Iy, Iz, dt, g, atmosphere, cancel, chunk_size, max_steps)
+    if terrain is not None:
+        blocks = clip_blocks(blocks, terrain)
+    return rechunk(blocks, chunk_size)
+
+
+def _guided_euler_blocks(r0, r_target, v0, theta0_deg, phi0_deg,
+                         mass, S, C_D, rho, l_m,
+                         omega_spin_0, k_cp, k_guidance,
+                         Ix, Iy, Iz, dt, g, atmosphere, cancel, chunk_size, max_steps):
+    theta = np.radians(theta0_deg)
+    phi = np.radians(phi0_deg)
+    dir0 = np.array([
+        np.cos(theta) * np.cos(phi),
+        np.cos(theta) * np.sin(phi),
+        np.sin(theta)
+    ])
+    state = np.zeros(_STATE_SIZE)
+    state[0:3] = r0
+    state[3:6] = v0 * dir0
+    state[6] = omega_spin_0
+
+    yield np.array([[0.0, state[0], state[1], state[2]]])
+
+    args = (float(r_target[0]), float(r_target[1]), float(r_target[2]),
+            float(mass), float(S), float(C_D), float(rho), float(l_m),
+            float(k_cp), float(k_guidance), float(Ix), float(Iy), float(Iz), float(dt), float(g))
+    if atmosphere is None:
+        args += (0.0, 1.0, np.empty(0))
+    else:
+        args += (atmosphere.z0, atmosphere.dz, atmosphere.density_table)
+    out = np.empty((chunk_size, 3))
+    done = 0
+    while done < max_steps:
+        check_cancelled(cancel)
+        n, finished = _guided_euler_kernel(state, out, min(chunk_size, max_steps - done), *args)
+        if n:
+            block = np.empty((n, 4))
+            block[:, 0] = np.arange(done + 1, done + n + 1) * dt
+            block[:, 1:] = out[:n]
+            yield block
+        done += n
+        if finished:
+            break
+
+
+def simulate_guided_flight_euler(r0, r_target, v0, theta0_deg, phi0_deg,
+                                 mass, S, C_D, rho, l_m,
+                                 omega_spin_0, k_cp, k_guidance,
+                                 Ix=0.01, Iy=0.002, Iz=0.002,
+                                 dt=0.005, g=9.81,
+                                 atmosphere: Optional[AtmosphereTable] = None,
+                                 cancel: Optional[Callable[[], bool]] = None,
+                                 terrain: Optional[Terrain] = None
+                                 ) -> Trajectory:
+    """
+    Та же схема Эйлера, что и simulate_guided_flight_euler_reference, но на скалярном ядре
+    без выделения памяти на шаге. Если установлен numba, ядро компилируется.
+
+    :param atmosphere: таблица атмосферы (например, standard_atmosphere());
+                       если задана, плотность берётся по высоте, а rho не используется
+
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    :param terrain: рельеф; полёт заканчивается на нём, если столкновение раньше снижения до высоты цели
+    """
+    trajectory = Trajectory(capacity=8192)
+    for block in iter_guided_flight_euler(r0, r_target, v0, theta0_deg, phi0_deg,
+                                          mass, S, C_D, rho, l_m,
+                                          omega_spin_0, k_cp, k_guidance,
+                                          Ix, Iy, Iz, dt, g, atmosphere=atmosphere, cancel=cancel,
+                                          terrain=terrain):
+        trajectory.extend(block)
+    return trajectory
+
+
+def verify_guided_euler_kernel(params: Dict, rtol: float = 1e-3) -> Dict:
+    """
+    Сравнивает скалярное ядро с эталонной реализацией на NumPy.
+
+    Побитового совпадения в общем случае нет: np.linalg.norm считает скалярное
+    произведение через BLAS (с другим порядком сложения и FMA), а контур
+    ориентации при сильном управлении усиливает разницу в последнем бите.
+    Поэтому отклонение проверяется относительно размаха траектории.
+
+    :param params: аргументы simulate_guided_flight_euler
+    :param rtol: допустимое отклонение, доля от максимального удаления от старта
+    :return: словарь с числом точек, отклонениями и признаками совпадения
+    """
+    reference = simulate_guided_flight_euler_reference(**params)
+    fast = simulate_guided_flight_euler(**params)
+    same_length = len(reference) == len(fast)
+    extent = float(np.max(np.linalg.norm(reference.xyz - reference.xyz[0], axis=1)))
+    if same_length:
+        deviation = float(np.max(np.abs(reference.xyz - fast.xyz)))
+    else:
+        n = min(len(reference), len(fast))
+        deviation = float(np.max(np.abs(reference.xyz[:n] - fast.xyz[:n])))
+    impact_deviation = float(np.linalg.norm(reference.xyz[-1] - fast.xyz[-1]))
+    return {
+        "points": len(fast),
+        "reference_points": len(reference),
+        "bit_identical": same_length and np.array_equal(reference.data, fast.data),
+        "max_deviation": deviation,
+        "impact_deviation": impact_deviation,
+        "within_tolerance": max(deviation, impact_deviation) <= rtol * max(extent, 1.0),
+        "jit": numba is not None,
+    }
+
+def _make_guided_rhs(r_target, mass, S, C_D, rho, l_m, k_cp, k_guidance, Ix, Iy, Iz, g,
+                     atmosphere: Optional[AtmosphereTable] = None):
+    """
+    Правая часть той же модели для состояния
+    y = (x, y, z, vx, vy, vz, omega_x, omega_y, omega_z, delta_y, delta_z).
+
+    Ограничения на угловые скорости и углы реализованы как насыщение:
+    на границе производная, выводящая за предел, обнуляется.
+    Если задана atmosphere, плотность берётся по высоте вместо постоянной rho.
+    """
+    density_at = atmosphere.density_at if atmosphere is not None else None
+    rho_const = rho
+    xt, yt, zt = (float(c) for c in r_target)
+    lim_ox, lim_oy, lim_oz, lim_dy, lim_dz = _ATTITUDE_LIMITS.tolist()
+
+    def saturate(value, derivative, limit):
+        if value >= limit and derivative > 0 or value <= -limit and derivative < 0:
+            return 0.0
+        return derivative
+
+    def rhs(t: float, state: np.ndarray) -> np.ndarray:
+        x, y, z, vx, vy, vz, omega_x, omega_y, omega_z, delta_y, delta_z = state.tolist()
+        delta_y_c = min(max(delta_y, -lim_dy), lim_dy)
+        delta_z_c = min(max(delta_z, -lim_dz), lim_dz)
+
+        speed = math.sqrt(vx * vx + vy * vy + vz * vz)
+        speed = max(speed, 1e-12)
+        rho = rho_const if density_at is None else density_at(z)
+
+        # Аэродинамические и управляющие моменты
+        Mx = -Ix * k_cp * omega_x
+        q = rho * speed ** 2 * S * l_m / 2
+        My_aero = -q * delta_y_c
+        Mz_aero = -q * delta_z_c
+
+        dx, dy, dz = xt - x, yt - y, zt - z
+        dist = math.sqrt(dx * dx + dy * dy + dz * dz)
+        ux, uy, uz = vx / speed, vy / speed, vz / speed
+        error_y = min(max(dy / dist - uy, -1.0), 1.0)
+        error_z = min(max(dz / dist - uz, -1.0), 1.0)
+
+        My = My_aero - k_guidance * error_y
+        Mz = Mz_aero - k_guidance * error_z
+
+        # Уравнения Эйлера
+        domega_x = saturate(omega_x, Mx / Ix, lim_ox)
+        domega_y = saturate(omega_y, (My - (Iz - Ix) * omega_z * omega_x) / Iy, lim_oy)
+        domega_z = saturate(omega_z, (Mz - (Ix - Iy) * omega_x * omega_y) / Iz, lim_oz)
+        ddelta_y = saturate(delta_y, omega_y, lim_dy)
+        ddelta_z = saturate(delta_z, omega_z, lim_dz)
+
+        # Ось тела
+        bx, by, bz = ux, uy + delta_y_c, uz + delta_z_c
+        norm_bd = math.sqrt(bx * bx + by * by + bz * bz)
+        if norm_bd < 1e-6:
+            bx, by, bz = ux, uy, uz
+        else:
+            bx, by, bz = bx / norm_bd, by / norm_bd, bz / norm_bd
+
+        # Силы
+        k_aero = -0.5 * rho * C_D * S * speed / mass
+        return np.array([
+            vx, vy, vz,
+            k_aero * bx, k_aero * by, k_aero * bz - g,
+            domega_x, domega_y, domega_z,
+            ddelta_y, ddelta_z
+        ])
+
+    return rhs
+
+
+def _project_attitude(state: np.ndarray) -> bool:
+    """Возвращает угловые скорости и углы в допустимые пределы."""
+    attitude = state[6:]
+    clipped = np.clip(attitude, -_ATTITUDE_LIMITS, _ATTITUDE_LIMITS)
+    if np.array_equal(clipped, attitude):
+        return False
+    state[6:] = clipped
+    return True
+
+
+def _guided_dopri5_blocks(r0, r_target, v0, theta0_deg, phi0_deg,
+                          mass, S, C_D, rho, l_m,
+                          omega_spin_0, k_cp, k_guidance,
+                          Ix=0.01, Iy=0.002, Iz=0.002, g=9.81,
+                          rtol=1e-6, atol=1e-6, sample_dt: Optional[float] = 0.1,
+                          attitude_error_control: bool = False,
+                          atmosphere: Optional[AtmosphereTable] = None,
+                          t_max: float = 1000.0, max_steps: int = 2_000_000,
+                          cancel: Optional[Callable[[], bool]] = None
+                          ):
+    """
+    Генератор блоков (k, 4) траектории по мере интегрирования;
+    по завершении возвращает объект решателя (для статистики шагов).
+    """
+    theta = math.radians(theta0_deg)
+    phi = math.radians(phi0_deg)
+    v = v0 * np.array([
+        math.cos(theta) * math.cos(phi),
+        math.cos(theta) * math.sin(phi),
+        math.sin(theta)
+    ])
+    y0 = np.concatenate([np.asarray(r0, dtype=np.float64), v, [omega_spin_0, 0.0, 0.0, 0.0, 0.0]])
+
+    rhs = _make_guided_rhs(r_target, mass, S, C_D, rho, l_m, k_cp, k_guidance, Ix, Iy, Iz, g, atmosphere)
+    error_weights = None if attitude_error_control else np.r_[np.ones(6), np.zeros(5)]
+    solver = DormandPrince(rhs, 0.0, y0, rtol=rtol, atol=atol,
+                           error_weights=error_weights, project=_project_attitude)
+
+    yield np.array([[0.0, *y0[:3]]])
+    last_t = 0.0
+    z_target = float(r_target[2])
+    has_reached_apex = False
+    next_sample = 1
+
+    while solver.n_steps < max_steps and solver.t < t_max:
+        if solver.n_steps % 256 == 0:
+            check_cancelled(cancel)
+        solver.step()
+        y = solver.y
+        if not np.all(np.isfinite(y)):
+            break
+
+        # Условие завершения: снижение до высоты цели после апогея
+        t_event = None
+        if not has_reached_apex and y[5] < 0:
+            has_reached_apex = True
+        if has_reached_apex and y[2] <= z_target:
+            z_old = solver.y_old[2]
+            if z_old > z_target:
+                t_event = brentq(lambda tt: solver.dense_output(tt)[0, 2] - z_target,
+                                 solver.t_old, solver.t, xtol=1e-9)
+            else:
+                t_event = solver.t
+        t_end = solver.t if t_event is None else t_event
+
+        if sample_dt:
+            last_sample = int(math.floor(t_end / sample_dt + 1e-9))
+            if last_sample >= next_sample:
+                times = np.arange(next_sample, last_sample + 1) * sample_dt
+                block = solver.dense_output(times)
+                yield np.column_stack([times, block[:, :3]])
+                next_sample = last_sample + 1
+                last_t = times[-1]
+        elif t_event is None:
+            yield np.array([[solver.t, *y[:3]]])
+            last_t = solver.t
+
+        if t_event is not None:
+            if last_t < t_event:
+                yield np.array([[t_event, *solver.dense_output(t_event)[0, :3]]])
+            break
+
+        if math.sqrt(y[3] ** 2 + y[4] ** 2 + y[5] ** 2) < 1e-3:
+            break
+
+    return solver
+
+
+def _integrate_guided_dopri5(*args, **kwargs) -> Tuple[Trajectory, DormandPrince]:
+    trajectory = Trajectory()
+    blocks = _guided_dopri5_blocks(*args, **kwargs)
+    while True:
+        try:
+            trajectory.extend(next(blocks))
+        except StopIteration as stop:
+            return trajectory, stop.value
+
+
+def iter_guided_flight_dopri5(r0, r_target, v0, theta0_deg, phi0_deg,
+                              mass, S, C_D, rho, l_m,
+                              omega_spin_0, k_cp, k_guidance,
+                              Ix=0.01, Iy=0.002, Iz=0.002, g=9.81,
+                              rtol=1e-6, atol=1e-6, sample_dt: Optional[float] = 0.1,
+                              attitude_error_control: bool = False,
+                              atmosphere: Optional[AtmosphereTable] = None,
+                              cancel: Optional[Callable[[], bool]] = None,
+                              chunk_size: int = 256,
+                              terrain: Optional[Terrain] = None
+                              ) -> Iterator[np.ndarray]:
+    """
+    Потоковый вариант simulate_guided_flight_dopri5:
+    блоки (k, 4) со столбцами t, x, y, z, k <= chunk_size.
+
+    :param terrain: рельеф; если задан, траектория обрывается на столкновении с ним (clip_blocks)
+    """
+    blocks = _guided_dopri5_blocks(
+        r0, r_target, v0, theta0_deg, phi0_deg, mass, S, C_D, rho, l_m,
+        omega_spin_0, k_cp, k_guidance, Ix, Iy, Iz, g,
+        rtol=rtol, atol=atol, sample_dt=sample_dt,
+        attitude_error_control=attitude_error_control, atmosphere=atmosphere, cancel=cancel
+    )
+    if terrain is not None:
+        blocks = clip_blocks(blocks, terrain)
+    return rechunk(blocks, chunk_size)
+
+
+def simulate_guided_flight_dopri5(r0, r_target, v0, theta0_deg, phi0_deg,
+                                  mass, S, C_D, rho, l_m,
+                                  omega_spin_0, k_cp, k_guidance,
+                                  Ix=0.01, Iy=0.002, Iz=0.002, g=9.81,
+                                  rtol=1e-6, atol=1e-6, sample_dt: Optional[float] = 0.1,
+                                  attitude_error_control: bool = False,
+                                  atmosphere: Optional[AtmosphereTable] = None,
+                                  cancel: Optional[Callable[[], bool]] = None,
+                                  terrain: Optional[Terrain] = None
+                                  ) -> Trajectory:
+    """
+    Та же модель управляемого полёта, проинтегрированная методом Дормана–Принса 5(4)
+    с контролем ошибки. Траектория выдаётся через плотный вывод с шагом sample_dt
+    (например, 0.1 с — частота NMEA), промежуточные шаги не сохраняются.
+    Точка падения находится интерполяцией внутри шага.
+
+    :param rtol: относительная точность; проверенный диапазон — DOPRI5_RTOL_RANGE,
+                 при более жёстком допуске результат с уменьшением rtol не сходится
+    :param atol: абсолютная точность
+    :param sample_dt: шаг выдачи точек (сек); None — сохранять каждый принятый шаг
+    :param attitude_error_control: учитывать ли угловые переменные в норме ошибки.
+           Контур ориентации при сильном управлении жёсткий (характерное время ~1 мс)
+           и при шаге Эйлера 0.005 с всё равно сидит на ограничениях. Без его контроля
+           шаг задаётся только поступательным движением: шагов на порядки меньше,
+           а точка падения совпадает с результатом Эйлера (см. guided_flight_accuracy_report).
+    :param atmosphere: таблица атмосферы; если задана, rho не используется
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    :param terrain: рельеф; полёт заканчивается на нём, если столкновение раньше снижения до высоты цели.
+                    Точка столкновения уточняется на отрезке между точками выдачи
+    """
+    if terrain is not None:
+        trajectory = Trajectory()
+        for block in iter_guided_flight_dopri5(
+                r0, r_target, v0, theta0_deg, phi0_deg, mass, S, C_D, rho, l_m,
+                omega_spin_0, k_cp, k_guidance, Ix, Iy, Iz, g,
+                rtol=rtol, atol=atol, sample_dt=sample_dt,
+                attitude_error_control=attitude_error_control, atmosphere=atmosphere, cancel=cancel,
+                terrain=terrain):
+            trajectory.extend(block)
+        return trajectory
+    trajectory, _ = _integrate_guided_dopri5(
+        r0, r_target, v0, theta0_deg, phi0_deg, mass, S, C_D, rho, l_m,
+        omega_spin_0, k_cp, k_guidance, Ix, Iy, Iz, g,
+        rtol=rtol, atol=atol, sample_dt=sample_dt,
+        attitude_error_control=attitude_error_control, atmosphere=atmosphere, cancel=cancel
+    )
+    return trajectory
+
+
+def impact_point(trajectory: Trajectory, z_level: float) -> np.ndarray:
+    """
+    Точка пересечения уровня z_level на последнем отрезке траектории
+    (линейная интерполяция между двумя последними точками).
+    """
+    xyz = trajectory.xyz
+    if len(xyz) < 2 or xyz[-2, 2] == xyz[-1, 2]:
+        return xyz[-1].copy()
+    a, b = xyz[-2], xyz[-1]
+    s = np.clip((a[2] - z_level) / (a[2] - b[2]), 0.0, 1.0)
+    return a + s * (b - a)
+
+
+def guided_flight_accuracy_report(params: Dict,
+                                  tolerances: Sequence[float] = (1e-3, 1e-4, 1e-5, 1e-6),
+                                  impact_tolerance: float = 10.0,
+                                  euler_dt: float = 0.005,
+                                  attitude_error_control: bool = False) -> List[Dict]:
+    """
+    Сравнивает интегрирование методом Дормана–Принса при разных допусках
+    с текущей схемой Эйлера: число шагов, вычислений правой части,
+    сохранённых точек и отклонение точки падения.
+
+    :param params: аргументы simulate_guided_flight_euler (без dt)
+    :param tolerances: значения rtol (atol берётся равным rtol)
+    :param impact_tolerance: допустимое отклонение точки падения от Эйлера (м)
+    :return: список строк отчёта (словари)
+    :raises RuntimeError: если хотя бы при одном допуске отклонение больше impact_tolerance
+                          (в сообщении — весь отчёт)
+    """
+    z_target = float(params["r_target"][2])
+
+    started = time.perf_counter()
+    euler = simulate_guided_flight_euler(**params, dt=euler_dt)
+    euler_elapsed = time.perf_counter() - started
+    euler_impact = impact_point(euler, z_target)
+
+    rows = [{
+        "method": f"euler dt={euler_dt}",
+        "tolerance": None,
+        "steps": len(euler) - 1,
+        "rhs_evaluations": len(euler) - 1,
+        "stored_points": len(euler),
+        "impact": euler_impact,
+        "flight_time": euler.t[-1],
+        "impact_deviation": 0.0,
+        "within_tolerance": True,
+        "elapsed": euler_elapsed,
+    }]
+    for tol in tolerances:
+        started = time.perf_counter()
+        trajectory, solver = _integrate_guided_dopri5(
+            **params, rtol=tol, atol=tol, sample_dt=0.1,
+            attitude_error_control=attitude_error_control
+        )
+        elapsed = time.perf_counter() - started
+        impact = trajectory.xyz[-1].copy()
+        deviation = float(np.linalg.norm(impact - euler_impact))
+        rows.append({
+            "method": "dopri5",
+            "tolerance": tol,
+            "steps": solver.n_steps,
+            "rhs_evaluations": solver.n_fev,
+            "stored_points": len(trajectory),
+            "impact": impact,
+            "flight_time": trajectory.t[-1],
+            "impact_deviation": deviation,
+            "within_tolerance": deviation <= impact_tolerance,
+            "elapsed": elapsed,
+        })
+    failed = [row["tolerance"] for row in rows if not row["within_tolerance"]]
+    if failed:
+        raise RuntimeError(
+            f"Точка падения Дормана–Принса отклоняется от Эйлера больше чем на {impact_tolerance} м "
+            f"при rtol = {', '.join(f'{tol:.0e}' for tol in failed)}:\n{format_accuracy_report(rows)}"
+        )
+    return rows
+
+
+def format_accuracy_report(rows: List[Dict]) -> str:
+    lines = [f"{'метод':<18}{'допуск':>9}{'шаги':>10}{'f(t,y)':>10}{'точки':>8}"
+             f"{'время полёта':>14}{'откл., м':>11}{'  в допуске':>12}{'сек':>9}"]
+    for row in rows:
+        tol = "-" if row["tolerance"] is None else f"{row['tolerance']:.0e}"
+        lines.append(
+            f"{row['method']:<18}{tol:>9}{row['steps']:>10}{row['rhs_evaluations']:>10}"
+            f"{row['stored_points']:>8}{row['flight_time']:>14.3f}{row['impact_deviation']:>11.2f}"
+            f"{'да' if row['within_tolerance'] else 'нет':>12}{row['elapsed']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Параметры, с которыми модель вызывается из Controller.new_calculate_trajectory
+    params = dict(
+        r0=(0.0, 0.0, 0.0), r_target=(5000.0, 1000.0, 0.0), v0=800.0,
+        theta0_deg=30.0, phi0_deg=10.0, mass=50.0, S=0.01, C_D=0.5, rho=1.225,
+        l_m=0.4, omega_spin_0=300.0, k_cp=0.1, k_guidance=0.5
+    )
+    print("Контроль ошибки по поступательному движению:")
+    print(format_accuracy_report(guided_flight_accuracy_report(params, tolerances=(1e-4, 1e-5, 1e-6))))
+    print()
+    print("Контроль ошибки по всем переменным, включая ориентацию:")
+    try:
+        print(format_accuracy_report(guided_flight_accuracy_report(
+            params, tolerances=(1e-3, 1e-5), attitude_error_control=True)))
+    except RuntimeError as e:
+        print(f"[!] {e}")
@@ -0,0 +1,158 @@
+import math
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Simulation.Cancellation import check_cancelled
+from Simulation.GuidedFlight import impact_point, simulate_guided_flight_euler
+
+# Подбираемые параметры: угол возвышения, азимут (градусы) и начальная скорость
+_UNKNOWNS = ("theta0_deg", "phi0_deg", "v0")
+
+
+def _impact_for(base_params: Dict, engine: Callable, candidate: Tuple[float, float, float]) -> np.ndarray:
+    """Точка падения для одного набора (theta0_deg, phi0_deg, v0); выполняется в процессе пула."""
+    params = dict(base_params)
+    params.update(zip(_UNKNOWNS, candidate))
+    trajectory = engine(**params)
+    return impact_point(trajectory, base_params["r_target"][2])
+
+
+class _Evaluator:
+    """Пакетно считает точки падения в пуле и ведёт учёт вычислений."""
+
+    def __init__(self, executor: Executor, base_params: Dict, engine: Callable,
+                 target: np.ndarray, cancel: Optional[Callable[[], bool]]):
+        self.executor = executor
+        self.function = partial(_impact_for, base_params, engine)
+        self.target = target
+        self.cancel = cancel
+        self.evaluations = 0
+
+    def __call__(self, candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param candidates: массив (k, 3)
+        :return: (точки падения (k, 3), промахи (k,))
+        """
+        check_cancelled(self.cancel)
+        workers = getattr(self.executor, "_max_workers", 1) or 1
+        chunksize = max(1, len(candidates) // (4 * workers))
+        impacts = np.array(list(self.executor.map(
+            self.function, [tuple(c) for c in candidates], chunksize=chunksize
+        )))
+        self.evaluations += len(candidates)
+        return impacts, np.linalg.norm(impacts - self.target, axis=1)
+
+
+def solve_launch_parameters(
+        r0: Sequence[float],
+        r_target: Sequence[float],
+        base_params: Dict,
+        theta_bounds: Tuple[float, float] = (1.0, 85.0),
+        phi_span: float = 45.0,
+        v0_bounds: Tuple[float, float] = (50.0, 1000.0),
+        grid: Tuple[int, int, int] = (12, 7, 8),
+        tolerance: float = 1.0,
+        max_iterations: int = 20,
+        engine: Callable = simulate_guided_flight_euler,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        cancel: Optional[Callable[[], bool]] = None
+) -> Dict:
+    """
+    Подбирает угол возвышения, азимут и начальную скорость, при которых
+    траектория управляемого полёта приходит в точку r_target.
+
+    1. Пристрелка: сетка grid по (theta, phi, v0) считается целиком в пуле процессов,
+       лучший узел берётся начальным приближением. Азимут перебирается в пределах
+       ±phi_span от направления на цель.
+    2. Уточнение методом Ньютона (Гаусса–Ньютона): якобиан точки падения по трём
+       параметрам оценивается конечными разностями, шаг — решение с минимальной
+       нормой (уравнений два, неизвестных три). Длина шага подбирается делением
+       пополам; все укороченные шаги считаются одним пакетом.
+
+    :param r0: точка старта
+    :param r_target: точка цели (например, NewGenerateTrajectoryOptions.get_end_point())
+    :param base_params: остальные аргументы движка (mass, S, C_D, rho, l_m,
+                        omega_spin_0, k_cp, k_guidance, ...)
+    :param tolerance: допустимый промах (м)
+    :param engine: функция расчёта траектории с аргументами как у simulate_guided_flight_euler
+    :param executor: готовый пул (ProcessPoolExecutor или ThreadPoolExecutor);
+                     если не задан, создаётся пул процессов на время решения
+    :param cancel: функция без аргументов; если она вернула True, поиск прерывается
+                   исключением ComputationCancelled
+    :return: словарь theta0_deg, phi0_deg, v0, impact, miss, converged, iterations, evaluations
+    """
+    r0 = np.asarray(r0, dtype=np.float64)
+    target = np.asarray(r_target, dtype=np.float64)
+    base = dict(base_params)
+    base.update(r0=tuple(r0), r_target=tuple(target))
+
+    lower = np.array([theta_bounds[0], -np.inf, v0_bounds[0]])
+    upper = np.array([theta_bounds[1], np.inf, v0_bounds[1]])
+    # Масштаб переменных: 1 градус ~ 10 м/с
+    scale = np.array([1.0, 1.0, 10.0])
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers,
+                                       mp_context=multiprocessing.get_context("spawn"))
+    try:
+        evaluate = _Evaluator(executor, base, engine, target, cancel)
+
+        # --- Пристрелка ---
+        bearing = math.degrees(math.atan2(target[1] - r0[1], target[0] - r0[0]))
+        thetas = np.linspace(theta_bounds[0], theta_bounds[1], grid[0])
+        phis = bearing + np.linspace(-phi_span, phi_span, grid[1])
+        speeds = np.linspace(v0_bounds[0], v0_bounds[1], grid[2])
+        candidates = np.stack(np.meshgrid(thetas, phis, speeds, indexing="ij"), axis=-1).reshape(-1, 3)
+        impacts, misses = evaluate(candidates)
+        best = int(np.argmin(misses))
+        x, impact, miss = candidates[best], impacts[best], misses[best]
+
+        # --- Уточнение Ньютоном с делением шага ---
+        steps = np.array([1.0, 0.5, 0.25, 0.125, 0.0625])
+        h = np.array([0.05, 0.05, 0.5])
+        iterations = 0
+        while miss > tolerance and iterations < max_iterations:
+            iterations += 1
+            probes = x + np.diag(h)
+            probe_impacts, _ = evaluate(probes)
+            jacobian = ((probe_impacts - impact)[:, :2] / h[:, None]).T * scale
+            residual = (target - impact)[:2]
+            delta = np.linalg.lstsq(jacobian, residual, rcond=None)[0] * scale
+            trial = np.clip(x + steps[:, None] * delta, lower, upper)
+            trial_impacts, trial_misses = evaluate(trial)
+            k = int(np.argmin(trial_misses))
+            if trial_misses[k] >= miss:
+                break
+            x, impact, miss = trial[k], trial_impacts[k], trial_misses[k]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return {
+        "theta0_deg": float(x[0]),
+        "phi0_deg": float((x[1] + 180.0) % 360.0 - 180.0),
+        "v0": float(x[2]),
+        "impact": impact,
+        "miss": float(miss),
+        "converged": bool(miss <= tolerance),
+        "iterations": iterations,
+        "evaluations": evaluate.evaluations,
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    params = dict(mass=50.0, S=0.01, C_D=0.5, rho=1.225, l_m=0.4,
+                  omega_spin_0=300.0, k_cp=0.1, k_guidance=0.5)
+    start = time.perf_counter()
+    result = solve_launch_parameters((0.0, 0.0, 0.0), (5000.0, 1000.0, 0.0), params)
+    print(f"[+] theta={result['theta0_deg']:.4f}° phi={result['phi0_deg']:.4f}° v0={result['v0']:.3f} м/с")
+    print(f"[+] Промах {result['miss']:.3f} м, итераций {result['iterations']}, "
+          f"расчётов траектории {result['evaluations']}, {time.perf_counter() - start:.2f} с")
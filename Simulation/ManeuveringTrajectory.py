@@ -0,0 +1,152 @@
+import numpy as np
+from typing import Callable, Iterator, Optional
+
+from Simulation.Cancellation import check_cancelled
+from Simulation.Terrain import Terrain
+from Simulation.Trajectory import Trajectory
+
+
+def iter_compute_trajectory(
+        distance: float,
+        v0: float,
+        angle_surface_deg: float,
+        angle_target_deg: float,
+        maneuverability: float = 0.05,
+        drag_coefficient: float = 0.01,
+        accel_phase: float = 2.0,  # время разгона до v0 (секунды)
+        g: float = 9.81,
+        dt: float = 0.1,
+        cancel: Optional[Callable[[], bool]] = None,
+        chunk_size: int = 1024,
+        terrain: Optional[Terrain] = None
+) -> Iterator[np.ndarray]:
+    """
+    Вычисляет траекторию от (0,0,0) до (distance, 0, 0) с маневрированием.
+    Добавлен разгон: в течение accel_phase секунд скорость возрастает от 0 до v0.
+
+    :param distance: расстояние до цели по оси X
+    :param v0: конечная скорость после разгона
+    :param angle_surface_deg: угол к горизонту (градусы)
+    :param angle_target_deg: угол отклонения в горизонтальной плоскости (градусы)
+    :param maneuverability: коэффициент маневренности
+    :param drag_coefficient: коэффициент сопротивления воздуха
+    :param accel_phase: длительность разгона в секундах
+    :param g: ускорение свободного падения
+    :param dt: шаг интегрирования
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    :param chunk_size: число точек в выдаваемом блоке
+    :param terrain: рельеф; если задан, полёт заканчивается под его поверхностью, а не под z = 0,
+                    и последняя точка (с её временем) переносится на пересечение шага с рельефом
+    :return: генератор блоков (k, 4) со столбцами t, x, y, z, k <= chunk_size
+    """
+
+    pos: np.ndarray = np.array([0.0, 0.0, 0.0])
+    end_point: np.ndarray = np.array([distance, 0.0, 0.0])
+    chunk = np.empty((chunk_size, 4))
+    chunk[0, 0] = 0.0
+    chunk[0, 1:] = pos
+    filled = 1
+
+    # Углы в радианах
+    theta: float = np.radians(angle_surface_deg)
+    phi: float = np.radians(angle_target_deg)
+
+    # Направление движения
+    dir_vec = np.array([
+        np.cos(theta) * np.cos(phi),
+        np.cos(theta) * np.sin(phi),
+        np.sin(theta)
+    ])
+
+    # Начальная скорость = 0
+    velocity: np.ndarray = np.zeros(3)
+
+    t = 0.0
+    step = 0
+    ground = 0.0
+    previous = pos.copy()
+    while pos[2] >= ground and np.linalg.norm(velocity) > 0.1 or t < accel_phase:
+        step += 1
+        if step % 1024 == 0:
+            check_cancelled(cancel)
+
+        if terrain is not None:
+            previous[:] = pos
+        pos += velocity * dt
+        if terrain is not None:
+            ground = terrain.height_at(pos[0], pos[1])
+        if filled == chunk_size:
+            yield chunk.copy()
+            filled = 0
+        row = chunk[filled]
+        row[0] = t + dt
+        row[1:] = pos
+        filled += 1
+
+        # --- Разгонная фаза ---
+        if t < accel_phase:
+            # линейный рост скорости от 0 до v0
+            target_speed = v0 * (t / accel_phase)
+            current_speed = np.linalg.norm(velocity)
+            dv = target_speed - current_speed
+            if dv > 0:
+                velocity += dir_vec * (dv / max(dt, 1e-9))
+        else:
+            # Гравитация
+            velocity[2] -= g * dt
+
+            # Сопротивление воздуха
+            speed = np.linalg.norm(velocity)
+            if speed > 0:
+                drag_force = drag_coefficient * velocity
+                velocity -= drag_force * dt
+
+            # Маневрирование
+            to_target = end_point - pos
+            dist_to_target = np.linalg.norm(to_target)
+            if dist_to_target > 1e-6:
+                to_target_unit = to_target / dist_to_target
+                v_unit = velocity / speed
+                correction_direction = to_target_unit - np.dot(to_target_unit, v_unit) * v_unit
+
+                if np.linalg.norm(correction_direction) > 1e-6:
+                    correction_unit = correction_direction / np.linalg.norm(correction_direction)
+                    correction = maneuverability * speed * correction_unit
+                    velocity += correction * dt
+
+        t += dt
+
+    if terrain is not None and pos[2] < ground and step:
+        # Точка пересечения внутри последнего шага
+        s = float(terrain.segment_crossing(previous, pos)[0])
+        row = chunk[filled - 1]
+        row[0] = t - dt + s * dt
+        row[1:] = previous + s * (pos - previous)
+    yield chunk[:filled].copy()
+
+
+def compute_trajectory(
+        distance: float,
+        v0: float,
+        angle_surface_deg: float,
+        angle_target_deg: float,
+        maneuverability: float = 0.05,
+        drag_coefficient: float = 0.01,
+        accel_phase: float = 2.0,
+        g: float = 9.81,
+        dt: float = 0.1,
+        cancel: Optional[Callable[[], bool]] = None,
+        terrain: Optional[Terrain] = None
+) -> Trajectory:
+    """
+    Траектория iter_compute_trajectory, собранная целиком.
+
+    :return: траектория (t, x, y, z)
+    """
+    trajectory = Trajectory()
+    for block in iter_compute_trajectory(distance, v0, angle_surface_deg, angle_target_deg,
+                                         maneuverability, drag_coefficient, accel_phase,
+                                         g=g, dt=dt, cancel=cancel, terrain=terrain):
+        trajectory.extend(block)
+    return trajectory
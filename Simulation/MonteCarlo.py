@@ -0,0 +1,296 @@
+import math
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from Simulation.Cancellation import check_cancelled
+from Simulation.Engines import ENGINES, run_forces
+from Simulation.Trajectory import Trajectory
+from Simulation.TrajectoryStore import StoreWriter, create_store
+
+# Разбросы, которые задают направление и модуль начальной скорости v0 (вектора)
+_LAUNCH_KEYS = ("speed", "elevation_deg", "azimuth_deg")
+
+
+class QuantileSketch:
+    """
+    Потоковая оценка квантилей неотрицательной величины с относительной точностью
+    relative_accuracy: значения раскладываются по логарифмическим корзинам
+    (как в DDSketch), хранятся только счётчики корзин.
+    Память — O(log(max / min) / relative_accuracy) независимо от числа значений.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005, min_value: float = 1e-9):
+        self.gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self._offset = 0
+        self._counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, values: Sequence[float]) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        self.count += len(values)
+        small = values <= self.min_value
+        self.zero_count += int(np.count_nonzero(small))
+        values = values[~small]
+        if not len(values):
+            return
+        keys = np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+        low, high = int(keys.min()), int(keys.max())
+        if not len(self._counts):
+            self._offset = low
+        if low < self._offset or high >= self._offset + len(self._counts):
+            new_offset = min(low, self._offset)
+            counts = np.zeros(max(high, self._offset + len(self._counts) - 1) - new_offset + 1, dtype=np.int64)
+            counts[self._offset - new_offset:self._offset - new_offset + len(self._counts)] = self._counts
+            self._counts, self._offset = counts, new_offset
+        self._counts += np.bincount(keys - self._offset, minlength=len(self._counts))
+
+    def quantile(self, q: float) -> float:
+        """Значение, ниже которого доля q (0..1) добавленных величин."""
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        key = int(np.searchsorted(np.cumsum(self._counts), rank - self.zero_count, side="right"))
+        # Середина корзины (gamma^(k-1), gamma^k] в смысле относительной ошибки
+        return 2.0 * self.gamma ** (key + self._offset) / (self.gamma + 1.0)
+
+
+class RunningMoments:
+    """Среднее и ковариация векторной величины, накапливаемые пакетами (формула Чана)."""
+
+    def __init__(self, dimension: int):
+        self.count = 0
+        self.mean = np.zeros(dimension)
+        self._m2 = np.zeros((dimension, dimension))
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        if not n:
+            return
+        batch_mean = values.mean(axis=0)
+        deviations = values - batch_mean
+        batch_m2 = deviations.T @ deviations
+        delta = batch_mean - self.mean
+        total = self.count + n
+        self.mean = self.mean + delta * (n / total)
+        self._m2 += batch_m2 + np.outer(delta, delta) * (self.count * n / total)
+        self.count = total
+
+    @property
+    def covariance(self) -> np.ndarray:
+        return self._m2 / max(self.count - 1, 1)
+
+
+def impact_ellipse(mean: np.ndarray, covariance: np.ndarray, probability: float = 0.5) -> Dict[str, float]:
+    """
+    Эллипс рассеивания точек падения в горизонтальной плоскости (нормальное приближение).
+
+    :param mean: средняя точка падения (x, y, ...)
+    :param covariance: ковариация, используется блок x-y
+    :param probability: доля точек внутри эллипса
+    :return: center_x, center_y, semi_major, semi_minor (м), angle_deg — угол большой оси от оси x (-90..90)
+    """
+    values, vectors = np.linalg.eigh(np.asarray(covariance)[:2, :2])
+    scale = math.sqrt(-2.0 * math.log(1.0 - probability))
+    major = vectors[:, 1]
+    return {
+        "center_x": float(mean[0]),
+        "center_y": float(mean[1]),
+        "semi_major": scale * math.sqrt(max(values[1], 0.0)),
+        "semi_minor": scale * math.sqrt(max(values[0], 0.0)),
+        "angle_deg": (math.degrees(math.atan2(major[1], major[0])) + 90.0) % 180.0 - 90.0,
+    }
+
+
+def _sample_parameters(rng: np.random.Generator, base_params: Dict, dispersions: Dict[str, float],
+                       n: int) -> Dict:
+    """
+    Параметры движка для пакета из n вариантов.
+
+    speed, elevation_deg, azimuth_deg возмущают вектор v0 в сферических координатах;
+    wind — стандартное отклонение постоянной добавки к ветру по каждой оси (м/с, скаляр или (3,));
+    остальные ключи — нормальная добавка к одноимённому параметру движка.
+    """
+    params = dict(base_params)
+    noise = {name: rng.standard_normal((n, 3) if name == "wind" else n) for name in dispersions}
+
+    if any(key in dispersions for key in _LAUNCH_KEYS):
+        v0 = np.asarray(base_params["v0"], dtype=np.float64).reshape(3)
+        speed = np.linalg.norm(v0)
+        elevation = math.degrees(math.asin(v0[2] / speed))
+        azimuth = math.degrees(math.atan2(v0[1], v0[0]))
+        speed = speed + dispersions.get("speed", 0.0) * noise.get("speed", 0.0)
+        elevation = np.radians(elevation + dispersions.get("elevation_deg", 0.0) * noise.get("elevation_deg", 0.0))
+        azimuth = np.radians(azimuth + dispersions.get("azimuth_deg", 0.0) * noise.get("azimuth_deg", 0.0))
+        params["v0"] = np.stack([
+            speed * np.cos(elevation) * np.cos(azimuth),
+            speed * np.cos(elevation) * np.sin(azimuth),
+            speed * np.sin(elevation),
+        ], axis=-1) * np.ones((n, 1))
+
+    for name, sigma in dispersions.items():
+        if name in _LAUNCH_KEYS:
+            continue
+        if name == "wind":
+            params["wind_offset"] = np.asarray(base_params.get("wind_offset", 0.0)) + np.asarray(sigma) * noise[name]
+        else:
+            params[name] = np.asarray(base_params[name], dtype=np.float64) + sigma * noise[name]
+    return params
+
+
+def _store_columns(dispersions: Dict[str, float]) -> List[str]:
+    """Столбцы хранилища: номер варианта и возмущённые параметры движка (векторы — по осям)."""
+    columns = ["sample"]
+    if any(key in dispersions for key in _LAUNCH_KEYS):
+        columns += ["v0_x", "v0_y", "v0_z"]
+    for name in dispersions:
+        if name == "wind":
+            columns += ["wind_offset_x", "wind_offset_y", "wind_offset_z"]
+        elif name not in _LAUNCH_KEYS:
+            columns.append(name)
+    return columns
+
+
+def _store_rows(params: Dict, columns: Sequence[str], first_sample: int, n: int) -> List[Dict[str, float]]:
+    table = {"sample": first_sample + np.arange(n)}
+    for column in columns[1:]:
+        name, _, axis = column.rpartition("_")
+        if axis in ("x", "y", "z") and name in params:
+            table[column] = np.asarray(params[name]).reshape(n, 3)[:, "xyz".index(axis)]
+        else:
+            table[column] = np.asarray(params[column]).reshape(n)
+    return [{column: float(values[i]) for column, values in table.items()} for i in range(n)]
+
+
+def run_monte_carlo(
+        base_params: Dict,
+        dispersions: Dict[str, float],
+        n_samples: int,
+        engine: str = "wind_guided",
+        batch_size: int = 2000,
+        keep_trajectories: int = 20,
+        seed: Optional[int] = None,
+        integrator: str = "rk4",
+        dt: Optional[float] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+        store_path: Optional[str] = None
+) -> Dict:
+    """
+    Рассеивание точек падения методом Монте-Карло на пакетном движке из Simulation.Engines.
+
+    Варианты считаются пакетами по batch_size тел; после каждого пакета
+    траектории отбрасываются, а в статистику попадают только точки и времена падения.
+    Память не зависит от n_samples: хранятся моменты, счётчики корзин квантилей
+    и первые keep_trajectories траекторий.
+
+    :param base_params: номинальные параметры движка
+    :param dispersions: стандартные отклонения: speed (м/с), elevation_deg, azimuth_deg (град) —
+                        для вектора v0; wind (м/с) — постоянный ветер по осям;
+                        любое другое имя — числовой параметр движка (например, m, C_D)
+    :param engine: ключ ENGINES
+    :param seed: зерно генератора для воспроизводимости
+    :param progress: вызывается как progress(готово, всего) после каждого пакета
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    :param store_path: каталог TrajectoryStore, куда пишутся все траектории вместе
+                       с возмущёнными параметрами (sample, v0_x.., wind_offset_x.., m, ...)
+    :return: samples; nominal_impact и reference (точка, от которой считается промах:
+             цель движка, если есть, иначе номинальная точка падения);
+             mean, covariance — точки падения; cep50, cep90 — радиусы (м) круга вокруг reference;
+             ellipse50, ellipse90 — результаты impact_ellipse;
+             flight_time_mean и flight_time_percentiles {5, 50, 95};
+             trajectories — сохранённые траектории
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный движок: {engine}")
+    factory = ENGINES[engine]
+    rng = np.random.default_rng(seed)
+
+    nominal_setup = factory(**base_params)
+    step = nominal_setup.dt if dt is None else dt
+    nominal = run_forces(nominal_setup.forces, nominal_setup.r0, nominal_setup.v0, nominal_setup.stop,
+                         dt=step, integrator=integrator, cancel=cancel)[0]
+    nominal_impact = nominal.xyz[-1].copy()
+    target = base_params.get("target")
+    reference = nominal_impact if target is None else np.asarray(target, dtype=np.float64).reshape(3)
+
+    impacts = RunningMoments(3)
+    miss_sketch = QuantileSketch()
+    time_sketch = QuantileSketch()
+    time_total = 0.0
+    trajectories: List[Trajectory] = []
+    writer = None
+    if store_path is not None:
+        columns = _store_columns(dispersions)
+        create_store(store_path, columns)
+        writer = StoreWriter(store_path)
+
+    done = 0
+    try:
+        while done < n_samples:
+            check_cancelled(cancel)
+            n = min(batch_size, n_samples - done)
+            params = _sample_parameters(rng, base_params, dispersions, n)
+            setup = factory(**params)
+            batch = run_forces(setup.forces, setup.r0, setup.v0, setup.stop,
+                               dt=step, integrator=integrator, cancel=cancel)
+            if writer is not None:
+                for trajectory, row in zip(batch, _store_rows(params, columns, done, n)):
+                    writer.append(trajectory, row)
+            ends = np.array([trajectory.data[-1] for trajectory in batch])
+
+            impacts.add(ends[:, 1:])
+            miss_sketch.add(np.hypot(ends[:, 1] - reference[0], ends[:, 2] - reference[1]))
+            time_sketch.add(ends[:, 0])
+            time_total += float(ends[:, 0].sum())
+            if len(trajectories) < keep_trajectories:
+                trajectories.extend(batch[:keep_trajectories - len(trajectories)])
+
+            done += n
+            if progress is not None:
+                progress(done, n_samples)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {
+        "samples": done,
+        "nominal_impact": nominal_impact,
+        "reference": reference,
+        "mean": impacts.mean,
+        "covariance": impacts.covariance,
+        "cep50": miss_sketch.quantile(0.5),
+        "cep90": miss_sketch.quantile(0.9),
+        "ellipse50": impact_ellipse(impacts.mean, impacts.covariance, 0.5),
+        "ellipse90": impact_ellipse(impacts.mean, impacts.covariance, 0.9),
+        "flight_time_mean": time_total / max(done, 1),
+        "flight_time_percentiles": {p: time_sketch.quantile(p / 100) for p in (5, 50, 95)},
+        "trajectories": trajectories,
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    base = dict(m=10.0, S=0.01, C_D=0.3, start=(0.0, 0.0, 0.0), target=(500.0, 200.0, 50.0),
+                v0=(70.7, 0.0, 70.7), wind_zones=[(0, 1000, (5.0, 0.0, 0.0))])
+    dispersions = dict(speed=2.0, elevation_deg=0.5, azimuth_deg=0.5, C_D=0.02, m=0.2, wind=1.0)
+
+    start = time.perf_counter()
+    result = run_monte_carlo(base, dispersions, 20000, seed=1,
+                             progress=lambda done, total: print(f"\r[+] {done}/{total}", end=""))
+    print(f"\n[+] {result['samples']} вариантов за {time.perf_counter() - start:.1f} с")
+    print(f"[+] Средняя точка падения: {np.round(result['mean'], 1)}")
+    print(f"[+] КВО: CEP50 = {result['cep50']:.1f} м, CEP90 = {result['cep90']:.1f} м")
+    ellipse = result["ellipse90"]
+    print(f"[+] Эллипс 90%: {ellipse['semi_major']:.1f} x {ellipse['semi_minor']:.1f} м, "
+          f"угол {ellipse['angle_deg']:.0f}°")
+    print(f"[+] Время полёта: {result['flight_time_percentiles']}")
@@ -0,0 +1,219 @@
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from numbers import Real
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from Simulation.Cancellation import ComputationCancelled
+from Simulation.GuidedFlight import impact_point
+from Simulation.SpatialIndex import closest_distance
+from Simulation.TrajectoryStore import StoreWriter, create_store
+
+# Столбцы общей таблицы метрик (одна строка float64 на вариант)
+_IMPACT = slice(0, 3)
+_FLIGHT_TIME = 3
+_MAX_ALTITUDE = 4
+_MISS = 5
+_POINTS = 6
+_CLOSEST = 7
+_COLUMNS = 8
+
+
+def _target_of(params: Dict) -> Optional[np.ndarray]:
+    """Точка цели движка: r_target (GuidedFlight) или target (WindGuidedTrajectory)."""
+    target = params.get("r_target", params.get("target"))
+    return None if target is None else np.asarray(target, dtype=np.float64)
+
+
+def _store_row(case: int, names: Sequence[str], values: Sequence[Sequence], combo: Sequence[int]) -> Dict:
+    """Строка таблицы параметров хранилища: номер варианта и значения (или индексы) параметров."""
+    row = {"case": case}
+    for i, (name, j) in enumerate(zip(names, combo)):
+        value = values[i][j]
+        row[name if isinstance(value, Real) else f"{name}_index"] = value if isinstance(value, Real) else j
+    return row
+
+
+def _run_cases(shm_name: str, n_cases: int, engine: Callable, base_params: Dict,
+               names: Sequence[str], values: Sequence[Sequence], cases: Sequence,
+               store_path: Optional[str] = None) -> int:
+    """
+    Считает варианты cases (строки индексов в сетке) и пишет метрики
+    прямо в общую таблицу; выполняется в процессе пула.
+    Траектории, если задан store_path, дописываются в часть хранилища этого процесса.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    writer = StoreWriter(store_path, part=str(os.getpid())) if store_path is not None else None
+    try:
+        table = np.ndarray((n_cases, _COLUMNS), dtype=np.float64, buffer=shm.buf)
+        for case, combo in cases:
+            params = dict(base_params)
+            params.update((name, values[i][j]) for i, (name, j) in enumerate(zip(names, combo)))
+            target = _target_of(params)
+            trajectory = engine(**params)
+
+            row = table[case]
+            z_level = target[2] if target is not None else trajectory.z[0]
+            row[_IMPACT] = impact_point(trajectory, z_level)
+            row[_FLIGHT_TIME] = trajectory.t[-1] - trajectory.t[0]
+            row[_MAX_ALTITUDE] = trajectory.z.max()
+            row[_MISS] = np.linalg.norm(row[_IMPACT] - target) if target is not None else np.nan
+            row[_POINTS] = len(trajectory)
+            if target is not None:
+                row[_CLOSEST] = closest_distance(trajectory, target)
+            if writer is not None:
+                writer.append(trajectory, _store_row(case, names, values, combo))
+        del table
+    finally:
+        if writer is not None:
+            writer.close()
+        shm.close()
+    return len(cases)
+
+
+def run_parameter_sweep(
+        engine: Callable,
+        base_params: Dict,
+        grid: Dict[str, Sequence],
+        max_workers: Optional[int] = None,
+        cases_per_task: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+        store_path: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Прогоняет движок по декартовой сетке параметров в пуле процессов.
+
+    Метрики варианты пишут в общую память (multiprocessing.shared_memory),
+    поэтому обратно в родительский процесс не пересылаются списки кортежей.
+
+    Движок — функция уровня модуля, возвращающая Trajectory, например
+    GuidedFlight.simulate_guided_flight_euler (его же вызывает
+    Model.simulate_guided_flight_with_strong_control) или
+    WindGuidedTrajectory.simulate_guided_trajectory.
+
+    :param base_params: неизменяемые аргументы движка
+    :param grid: имя аргумента -> список значений; значения могут быть и нечисловыми
+                 (например, варианты wind_zones)
+    :param cases_per_task: число вариантов в одной задаче пула; по умолчанию
+                           около 8 задач на процесс
+    :param progress: вызывается как progress(готово, всего) по мере завершения задач
+    :param cancel: функция без аргументов; если она вернула True, оставшиеся задачи
+                   снимаются и поднимается ComputationCancelled
+    :param store_path: каталог TrajectoryStore для самих траекторий (каждый процесс
+                       пула пишет свою часть); столбцы параметров — case и параметры сетки
+                       (для нечисловых — <имя>_index)
+    :return: столбцы длины N (в порядке C по осям сетки):
+             для числовых параметров — их значения, для прочих — <имя>_index;
+             impact (N, 3), flight_time, max_altitude, miss (NaN, если у движка нет цели),
+             closest_approach — наименьшее расстояние от ломаной траектории до цели (тоже NaN без цели),
+             points; а также shape — форма сетки
+    """
+    names = list(grid)
+    values = [list(grid[name]) for name in names]
+    shape = tuple(len(v) for v in values)
+    n_cases = int(np.prod(shape)) if shape else 1
+    combos = np.array(list(itertools.product(*(range(n) for n in shape))), dtype=np.int64).reshape(n_cases, -1)
+
+    context = multiprocessing.get_context("spawn")
+    workers = max_workers or multiprocessing.cpu_count()
+    if cases_per_task is None:
+        cases_per_task = max(1, n_cases // (8 * workers))
+
+    if store_path is not None:
+        create_store(store_path, ["case"] + [
+            name if all(isinstance(v, Real) for v in values[i]) else f"{name}_index"
+            for i, name in enumerate(names)
+        ])
+
+    shm = shared_memory.SharedMemory(create=True, size=n_cases * _COLUMNS * 8)
+    try:
+        table = np.ndarray((n_cases, _COLUMNS), dtype=np.float64, buffer=shm.buf)
+        table[:] = np.nan
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            pending = set()
+            for start in range(0, n_cases, cases_per_task):
+                cases = [(case, tuple(combos[case])) for case in range(start, min(start + cases_per_task, n_cases))]
+                pending.add(executor.submit(_run_cases, shm.name, n_cases, engine, base_params,
+                                            names, values, cases, store_path))
+            while pending:
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += future.result()
+                    if progress is not None:
+                        progress(done, n_cases)
+                if cancel is not None and cancel():
+                    for future in pending:
+                        future.cancel()
+                    raise ComputationCancelled()
+
+        result: Dict[str, np.ndarray] = {}
+        for i, name in enumerate(names):
+            if all(isinstance(v, Real) for v in values[i]):
+                result[name] = np.asarray(values[i], dtype=np.float64)[combos[:, i]]
+            else:
+                result[f"{name}_index"] = combos[:, i].copy()
+        result["impact"] = table[:, _IMPACT].copy()
+        result["flight_time"] = table[:, _FLIGHT_TIME].copy()
+        result["max_altitude"] = table[:, _MAX_ALTITUDE].copy()
+        result["miss"] = table[:, _MISS].copy()
+        result["closest_approach"] = table[:, _CLOSEST].copy()
+        result["points"] = table[:, _POINTS].astype(np.int64)
+        result["shape"] = np.array(shape, dtype=np.int64)
+        del table
+    finally:
+        shm.close()
+        shm.unlink()
+    return result
+
+
+def sweep_sensitivity(result: Dict[str, np.ndarray], metric: str = "miss") -> Dict[str, float]:
+    """
+    Чувствительность метрики к числовым параметрам сетки: средний модуль
+    частной производной d(metric)/d(параметр), оценённой конечными разностями по узлам сетки.
+
+    :param result: результат run_parameter_sweep
+    :param metric: flight_time, max_altitude, miss или closest_approach
+    :return: имя параметра -> средний |производная|
+    """
+    shape = tuple(int(n) for n in result["shape"])
+    values = result[metric].reshape(shape)
+    excluded = {"impact", "flight_time", "max_altitude", "miss", "closest_approach", "points", "shape"}
+    names: List[str] = [name for name in result if name not in excluded]
+    sensitivity = {}
+    for axis, name in enumerate(names):
+        if name.endswith("_index") or shape[axis] < 2:
+            continue
+        coordinates = result[name].reshape(shape)
+        axis_values = np.moveaxis(coordinates, axis, 0)[(slice(None),) + (0,) * (len(shape) - 1)]
+        gradient = np.gradient(values, axis_values, axis=axis)
+        sensitivity[name] = float(np.nanmean(np.abs(gradient)))
+    return sensitivity
+
+
+if __name__ == "__main__":
+    import time
+
+    from Simulation.GuidedFlight import simulate_guided_flight_euler
+
+    base = dict(r0=(0.0, 0.0, 0.0), r_target=(5000.0, 1000.0, 0.0), v0=312.0,
+                theta0_deg=15.5, phi0_deg=11.3, S=0.01, rho=1.225, l_m=0.4,
+                omega_spin_0=300.0, k_cp=0.1)
+    grid = dict(C_D=np.linspace(0.3, 0.7, 9), mass=np.linspace(30, 70, 9), k_guidance=np.linspace(0.1, 1.0, 10))
+
+    start = time.perf_counter()
+    result = run_parameter_sweep(
+        simulate_guided_flight_euler, base, grid,
+        progress=lambda done, total: print(f"\r[+] {done}/{total}", end="")
+    )
+    print(f"\n[+] {len(result['miss'])} вариантов за {time.perf_counter() - start:.2f} с")
+    print(f"[+] Промах: от {result['miss'].min():.1f} до {result['miss'].max():.1f} м")
+    print(f"[+] Сближение с целью: от {result['closest_approach'].min():.1f} "
+          f"до {result['closest_approach'].max():.1f} м")
+    for name, value in sweep_sensitivity(result).items():
+        print(f"[+] d(промах)/d({name}) ≈ {value:.3g}")
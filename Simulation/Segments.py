@@ -0,0 +1,223 @@
+import math
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from Simulation.Trajectory import Trajectory
+
+
+class Segment:
+    """
+    Участок траектории, заданный аналитически.
+
+    Положение считается сразу для массива моментов времени, отсчитанных
+    от начала участка, по начальному положению и курсу (радианы от оси X).
+    """
+
+    duration: float = 0.0
+
+    def positions(self, tau: np.ndarray, start: np.ndarray, heading: float) -> np.ndarray:
+        """
+        :param tau: моменты времени от начала участка, массив (k,)
+        :param start: начальное положение (3,)
+        :param heading: начальный курс, радианы
+        :return: положения (k, 3)
+        """
+        raise NotImplementedError
+
+    def end_heading(self, heading: float) -> float:
+        return heading
+
+
+class Straight(Segment):
+    """Прямолинейный участок с постоянной путевой скоростью и вертикальной скоростью climb_rate."""
+
+    def __init__(self, speed: float, distance: Optional[float] = None,
+                 duration: Optional[float] = None, climb_rate: float = 0.0):
+        """
+        :param speed: горизонтальная скорость (м/с)
+        :param distance: горизонтальная длина участка (м); задаётся она или duration
+        :param duration: длительность участка (с)
+        :param climb_rate: вертикальная скорость (м/с)
+        """
+        if speed <= 0:
+            raise ValueError("Скорость должна быть положительной")
+        if (distance is None) == (duration is None):
+            raise ValueError("Нужно задать либо distance, либо duration")
+        self.speed = speed
+        self.climb_rate = climb_rate
+        self.duration = distance / speed if duration is None else duration
+
+    def positions(self, tau, start, heading):
+        out = np.empty((tau.size, 3))
+        out[:, 0] = start[0] + self.speed * math.cos(heading) * tau
+        out[:, 1] = start[1] + self.speed * math.sin(heading) * tau
+        out[:, 2] = start[2] + self.climb_rate * tau
+        return out
+
+
+class Climb(Straight):
+    """Набор (или потеря) высоты с постоянной вертикальной скоростью."""
+
+    def __init__(self, speed: float, climb_rate: float, height: Optional[float] = None,
+                 duration: Optional[float] = None):
+        """
+        :param speed: горизонтальная скорость (м/с)
+        :param climb_rate: вертикальная скорость (м/с), отрицательная — снижение
+        :param height: изменение высоты (м); задаётся оно или duration
+        :param duration: длительность участка (с)
+        """
+        if height is not None:
+            if climb_rate == 0 or height / climb_rate < 0:
+                raise ValueError("Знак height должен совпадать со знаком climb_rate")
+            duration = height / climb_rate
+        super().__init__(speed, duration=duration, climb_rate=climb_rate)
+
+
+class Turn(Segment):
+    """Разворот с постоянным радиусом; положительный угол — против часовой стрелки (влево)."""
+
+    def __init__(self, speed: float, radius: float, angle_deg: float, climb_rate: float = 0.0):
+        """
+        :param speed: горизонтальная скорость (м/с)
+        :param radius: радиус разворота (м)
+        :param angle_deg: угол разворота (градусы)
+        :param climb_rate: вертикальная скорость (м/с)
+        """
+        if speed <= 0 or radius <= 0:
+            raise ValueError("Скорость и радиус должны быть положительными")
+        self.speed = speed
+        self.radius = radius
+        self.angle = math.radians(angle_deg)
+        self.climb_rate = climb_rate
+        self.duration = abs(self.angle) * radius / speed
+
+    def positions(self, tau, start, heading):
+        sign = 1.0 if self.angle >= 0 else -1.0
+        center_x = start[0] - sign * self.radius * math.sin(heading)
+        center_y = start[1] + sign * self.radius * math.cos(heading)
+        psi = heading + sign * self.speed / self.radius * tau
+        out = np.empty((tau.size, 3))
+        out[:, 0] = center_x + sign * self.radius * np.sin(psi)
+        out[:, 1] = center_y - sign * self.radius * np.cos(psi)
+        out[:, 2] = start[2] + self.climb_rate * tau
+        return out
+
+    def end_heading(self, heading):
+        return heading + self.angle
+
+
+class Hold(Segment):
+    """Неподвижность в текущей точке."""
+
+    def __init__(self, duration: float):
+        self.duration = duration
+
+    def positions(self, tau, start, heading):
+        return np.broadcast_to(start, (tau.size, 3)).copy()
+
+
+class SegmentTrajectory:
+    """
+    Траектория-сценарий из аналитических участков.
+
+    Участки добавляются цепочкой вызовов, например
+        SegmentTrajectory().straight(200, distance=5000).turn(200, 2000, 90).hold(60)
+    и вычисляются одним векторным проходом в любые моменты времени,
+    без накопления ошибки шага.
+    """
+
+    def __init__(self, start: Sequence[float] = (0.0, 0.0, 0.0), heading_deg: float = 0.0):
+        """
+        :param start: начальная точка (x, y, z)
+        :param heading_deg: начальный курс, градусы от оси X против часовой стрелки
+        """
+        self.segments: List[Segment] = []
+        self._starts: List[np.ndarray] = []
+        self._headings: List[float] = []
+        self._end = np.array(start, dtype=np.float64)
+        self._heading = math.radians(heading_deg)
+        self._duration = 0.0
+        self._boundaries = [0.0]
+
+    def add(self, segment: Segment) -> "SegmentTrajectory":
+        self.segments.append(segment)
+        self._starts.append(self._end)
+        self._headings.append(self._heading)
+        self._end = segment.positions(np.array([segment.duration]), self._end, self._heading)[0]
+        self._heading = segment.end_heading(self._heading)
+        self._duration += segment.duration
+        self._boundaries.append(self._duration)
+        return self
+
+    def straight(self, speed: float, distance: Optional[float] = None,
+                 duration: Optional[float] = None) -> "SegmentTrajectory":
+        return self.add(Straight(speed, distance=distance, duration=duration))
+
+    def climb(self, speed: float, climb_rate: float, height: Optional[float] = None,
+              duration: Optional[float] = None) -> "SegmentTrajectory":
+        return self.add(Climb(speed, climb_rate, height=height, duration=duration))
+
+    def turn(self, speed: float, radius: float, angle_deg: float,
+             climb_rate: float = 0.0) -> "SegmentTrajectory":
+        return self.add(Turn(speed, radius, angle_deg, climb_rate=climb_rate))
+
+    def hold(self, duration: float) -> "SegmentTrajectory":
+        return self.add(Hold(duration))
+
+    @property
+    def duration(self) -> float:
+        return self._duration
+
+    @property
+    def end_point(self) -> np.ndarray:
+        return self._end.copy()
+
+    def positions_at(self, times) -> np.ndarray:
+        """
+        Положения в произвольные моменты времени (вне [0, duration] — значение на границе).
+
+        :param times: моменты времени, массив (k,)
+        :return: массив (k, 3)
+        """
+        times = np.clip(np.asarray(times, dtype=np.float64).ravel(), 0.0, self._duration)
+        out = np.empty((times.size, 3))
+        if not self.segments:
+            out[:] = self._end
+            return out
+        boundaries = np.array(self._boundaries)
+        index = np.searchsorted(boundaries, times, side="right") - 1
+        np.clip(index, 0, len(self.segments) - 1, out=index)
+        for i, segment in enumerate(self.segments):
+            mask = index == i
+            if mask.any():
+                out[mask] = segment.positions(times[mask] - boundaries[i], self._starts[i], self._headings[i])
+        return out
+
+    def sample(self, step: float) -> Trajectory:
+        """
+        Траектория с равномерным шагом step; время считается как k * step,
+        последняя точка — ровно в конце сценария.
+        """
+        count = int(math.floor(self._duration / step + 1e-9)) + 1
+        times = np.arange(count) * step
+        if times[-1] < self._duration:
+            times = np.append(times, self._duration)
+        return Trajectory.from_columns(times, self.positions_at(times))
+
+    def sample_count(self, count: int) -> Trajectory:
+        """Траектория из count точек, равномерно распределённых по времени от 0 до duration."""
+        times = np.linspace(0.0, self._duration, count)
+        return Trajectory.from_columns(times, self.positions_at(times))
+
+
+if __name__ == "__main__":
+    scenario = (SegmentTrajectory(heading_deg=0)
+                .straight(200, distance=10000)
+                .climb(200, 10, height=1000)
+                .turn(200, 3000, 180)
+                .straight(200, duration=600)
+                .hold(120))
+    trajectory = scenario.sample(0.1)
+    print(f"[+] Длительность {scenario.duration:.1f} с, {len(trajectory)} точек")
+    print(f"[+] Конечная точка {scenario.end_point}")
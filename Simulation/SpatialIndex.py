@@ -0,0 +1,164 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from Simulation.Trajectory import Trajectory
+
+
+def _project_on_segments(a: np.ndarray, b: np.ndarray, point: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ближайшие к point точки отрезков [a, b] (массивы (k, 3)).
+
+    :return: доли s вдоль отрезков, сами точки (k, 3) и расстояния до point
+    """
+    ab = b - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s = np.where(length2 > 0, np.einsum('ij,ij->i', point - a, ab) / length2, 0.0)
+    s = np.clip(s, 0.0, 1.0)
+    closest = a + s[:, None] * ab
+    offsets = closest - point
+    return s, closest, np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+
+
+def closest_distance(trajectory: Trajectory, point: Sequence[float]) -> float:
+    """
+    Наименьшее расстояние от точки до ломаной траектории одним векторным проходом
+    по всем отрезкам, O(N) без построения дерева. Для единичного запроса (например,
+    метрики варианта в ParameterSweep) это дешевле TrajectoryIndex; для многих запросов
+    к одной траектории выгоднее индекс.
+    """
+    point = np.asarray(point, dtype=np.float64)
+    xyz = trajectory.xyz
+    if len(xyz) < 2:
+        return float(np.linalg.norm(xyz[0] - point))
+    return float(_project_on_segments(xyz[:-1], xyz[1:], point)[2].min())
+
+
+class TrajectoryIndex:
+    """
+    Индекс точек траектории для геометрических запросов: k-d дерево по координатам
+    (строится один раз, O(N log N)) и отсортированный по времени массив.
+
+    Ближайшая точка, точки в радиусе и ближайшее сближение с отрезками ломаной
+    находятся за O(log N + k), где k — число точек рядом с запросом;
+    положение в момент t — бинарным поиском по времени.
+    Индекс хранит свою копию точек и не меняется, если траектория дописывается.
+    """
+
+    def __init__(self, trajectory: Trajectory, leafsize: int = 16):
+        self.trajectory = trajectory.copy()
+        self.xyz = self.trajectory.xyz
+        self.t = self.trajectory.t
+        self.tree = cKDTree(self.xyz, leafsize=leafsize)
+        steps = np.diff(self.xyz, axis=0)
+        # Половина самого длинного отрезка: ближайшая точка ломаной не дальше ближайшей
+        # вершины, а у её отрезка одна из вершин ближе, чем на эту величину сверх того
+        self._half_segment = 0.5 * float(np.sqrt(np.einsum('ij,ij->i', steps, steps)).max()) if len(steps) else 0.0
+        # Направление монотонности по осям: 1 — не убывает, -1 — не возрастает, 0 — нет
+        self._monotonic = np.array([
+            1 if (column >= 0).all() else -1 if (column <= 0).all() else 0 for column in steps.T
+        ]) if len(steps) else np.ones(3, dtype=int)
+
+    def __len__(self) -> int:
+        return len(self.xyz)
+
+    def nearest(self, points: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ближайшие точки траектории.
+
+        :param points: точка (3,) или массив (m, 3)
+        :param k: число ближайших точек на запрос
+        :return: (distances, indices) в форме, которую возвращает cKDTree.query
+        """
+        return self.tree.query(np.asarray(points, dtype=np.float64), k=k)
+
+    def within(self, point: Sequence[float], radius: float) -> np.ndarray:
+        """Номера точек не дальше radius от point, по возрастанию (т. е. по времени)."""
+        return np.sort(np.asarray(self.tree.query_ball_point(np.asarray(point, dtype=np.float64), radius),
+                                  dtype=np.intp))
+
+    def closest_approach(self, point: Sequence[float]) -> Dict[str, object]:
+        """
+        Наименьшее расстояние от точки до ломаной траектории (а не только до её вершин).
+        Проверяются лишь отрезки, примыкающие к вершинам в радиусе
+        «расстояние до ближайшей вершины + половина длиннейшего отрезка».
+
+        :return: distance, position (3,), time, segment — номер отрезка [segment, segment + 1]
+        """
+        point = np.asarray(point, dtype=np.float64)
+        distance, nearest = self.tree.query(point)
+        if len(self) < 2:
+            return {"distance": float(distance), "position": self.xyz[nearest].copy(),
+                    "time": float(self.t[nearest]), "segment": 0}
+        vertices = np.asarray(self.tree.query_ball_point(point, distance + self._half_segment + 1e-9),
+                              dtype=np.intp)
+        segments = np.unique(np.clip(np.concatenate([vertices - 1, vertices]), 0, len(self) - 2))
+        s, closest, distances = _project_on_segments(self.xyz[segments], self.xyz[segments + 1], point)
+        best = int(np.argmin(distances))
+        segment = int(segments[best])
+        return {
+            "distance": float(distances[best]),
+            "position": closest[best],
+            "time": float(self.t[segment] + s[best] * (self.t[segment + 1] - self.t[segment])),
+            "segment": segment,
+        }
+
+    def at_time(self, times) -> np.ndarray:
+        """Положения (k, 3) в моменты times — бинарный поиск по времени и интерполяция."""
+        return self.trajectory.positions_at(np.atleast_1d(np.asarray(times, dtype=np.float64)))
+
+    def at_coordinate(self, value: float, axis: int = 0) -> np.ndarray:
+        """
+        Точки, где траектория проходит координату value по оси axis (0 — x, 1 — y, 2 — z).
+        Если координата вдоль траектории монотонна (например, x при полёте к цели),
+        отрезок находится бинарным поиском; иначе — проходом по всем отрезкам.
+
+        :return: массив (k, 4) строк t, x, y, z в порядке времени
+        """
+        column = self.trajectory.data[:, 1 + axis]
+        if len(column) < 2:
+            return self.trajectory.data[column == value].copy()
+        direction = self._monotonic[axis]
+        if direction:
+            ordered = column if direction > 0 else -column
+            target = value if direction > 0 else -value
+            if not ordered[0] <= target <= ordered[-1]:
+                return np.empty((0, 4))
+            i = np.array([min(int(np.searchsorted(ordered, target, side="right")) - 1, len(column) - 2)])
+        else:
+            side = column - value
+            i = np.nonzero((side[:-1] <= 0) & (side[1:] >= 0) | (side[:-1] >= 0) & (side[1:] <= 0))[0]
+        data = self.trajectory.data
+        span = column[i + 1] - column[i]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f = np.where(span != 0, (value - column[i]) / span, 0.0)
+        rows = data[i] + f[:, None] * (data[i + 1] - data[i])
+        # Точка в вершине попадает в два соседних отрезка
+        if len(rows) > 1:
+            rows = rows[np.concatenate([[True], np.diff(rows[:, 0]) > 0])]
+        return rows
+
+
+if __name__ == "__main__":
+    import time
+
+    from Simulation.GuidedFlight import simulate_guided_flight_euler
+
+    trajectory = simulate_guided_flight_euler(
+        r0=(0.0, 0.0, 0.0), r_target=(5000.0, 1000.0, 0.0), v0=800.0, theta0_deg=30.0, phi0_deg=10.0,
+        mass=50.0, S=0.01, C_D=0.5, rho=1.225, l_m=0.4, omega_spin_0=300.0, k_cp=0.1, k_guidance=0.5
+    )
+    start = time.perf_counter()
+    index = TrajectoryIndex(trajectory)
+    print(f"[+] Индекс по {len(index)} точкам построен за {(time.perf_counter() - start) * 1e3:.1f} мс")
+
+    target = np.array([5000.0, 1000.0, 0.0])
+    start = time.perf_counter()
+    for _ in range(1000):
+        approach = index.closest_approach(target)
+    print(f"[+] Сближение с целью: {approach['distance']:.2f} м в t = {approach['time']:.3f} с "
+          f"({(time.perf_counter() - start) * 1e3:.0f} мкс на запрос)")
+    print(f"[+] Траектория на x = 3000 м: {np.round(index.at_coordinate(3000.0), 2)}")
+    print(f"[+] Точек в 100 м от цели: {len(index.within(target, 100.0))}")
@@ -0,0 +1,193 @@
+import json
+import os
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from Simulation.BatchTrajectory import compute_trajectory_batch
+from Simulation.Cancellation import check_cancelled
+from Simulation.Trajectory import Trajectory
+
+# Параметры compute_trajectory, по которым строится сетка (порядок осей таблицы)
+AXES = ("distance", "v0", "angle_surface_deg", "angle_target_deg", "maneuverability", "drag_coefficient")
+
+# Выходы в каждом узле: имя -> форма значения
+_OUTPUTS = {"impact": (3,), "apex": (3,), "flight_time": (), "path": None}
+
+
+class SurrogateTable:
+    """
+    Заранее рассчитанная таблица результатов compute_trajectory на регулярной
+    (не обязательно равномерной) сетке параметров AXES.
+
+    В каждом узле хранятся точка падения, апогей, время полёта и грубая траектория
+    из path_points точек через равные доли времени полёта. Значения между узлами —
+    полилинейная интерполяция по 2^d соседним узлам; массивы отображаются в память,
+    поэтому запрос читает с диска только эти узлы.
+    """
+
+    def __init__(self, axes: Dict[str, np.ndarray], outputs: Dict[str, np.ndarray], dt: float):
+        self.axes = {name: np.asarray(axes[name], dtype=np.float64) for name in AXES}
+        self.outputs = outputs
+        self.dt = dt
+        self.shape = tuple(len(values) for values in self.axes.values())
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "SurrogateTable":
+        """
+        :param path: каталог, записанный build_surrogate
+        :param mmap: отображать массивы в память, а не читать целиком
+        """
+        with open(os.path.join(path, "surrogate.json")) as f:
+            header = json.load(f)
+        outputs = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in _OUTPUTS
+        }
+        return cls(header["axes"], outputs, header["dt"])
+
+    def contains(self, **params) -> bool:
+        """Лежат ли параметры внутри сетки (вне её значения берутся с границы)."""
+        return all(values[0] <= params[name] <= values[-1] for name, values in self.axes.items())
+
+    def _cell(self, params: Dict[str, float]):
+        """Срезы ячейки (по два узла на ось, один — для оси из одного узла) и веса узлов."""
+        slices, weights = [], []
+        for name, values in self.axes.items():
+            if len(values) == 1:
+                slices.append(slice(0, 1))
+                weights.append(np.ones(1))
+                continue
+            value = min(max(float(params[name]), values[0]), values[-1])
+            i = min(int(np.searchsorted(values, value, side="right")) - 1, len(values) - 2)
+            f = (value - values[i]) / (values[i + 1] - values[i])
+            slices.append(slice(i, i + 2))
+            weights.append(np.array([1.0 - f, f]))
+        weight = weights[0]
+        for w in weights[1:]:
+            weight = np.multiply.outer(weight, w)
+        return tuple(slices), weight
+
+    def query(self, **params) -> Dict[str, np.ndarray]:
+        """
+        Интерполированные выходы для параметров AXES.
+
+        :return: impact (3,), apex (3,), flight_time, path (path_points, 3)
+        """
+        cell, weight = self._cell(params)
+        return {
+            name: np.tensordot(weight, np.asarray(data[cell]), axes=weight.ndim)
+            for name, data in self.outputs.items()
+        }
+
+    def preview(self, **params) -> Trajectory:
+        """Грубая траектория (t, x, y, z) по таблице — для мгновенного предпросмотра."""
+        result = self.query(**params)
+        path = result["path"]
+        times = np.linspace(0.0, float(result["flight_time"]), len(path))
+        return Trajectory.from_columns(times, path)
+
+
+def _summarize(positions: np.ndarray, lengths: np.ndarray, path_points: int, dt: float) -> Dict[str, np.ndarray]:
+    """Выходы таблицы для пакета траекторий compute_trajectory_batch."""
+    n = len(lengths)
+    rows = np.arange(n)
+    last = lengths - 1
+    apex_index = np.argmax(np.where(np.arange(positions.shape[1])[None, :] < lengths[:, None],
+                                    positions[:, :, 2], -np.inf), axis=1)
+    # Точки через равные доли времени полёта: линейная интерполяция между шагами
+    s = np.linspace(0.0, 1.0, path_points)[None, :] * last[:, None]
+    i0 = np.minimum(s.astype(np.intp), np.maximum(last - 1, 0)[:, None])
+    f = (s - i0)[:, :, None]
+    i1 = np.minimum(i0 + 1, last[:, None])
+    path = positions[rows[:, None], i0] * (1.0 - f) + positions[rows[:, None], i1] * f
+    return {
+        "impact": positions[rows, last],
+        "apex": positions[rows, apex_index],
+        "flight_time": last * dt,
+        "path": path,
+    }
+
+
+def build_surrogate(
+        path: str,
+        axes: Dict[str, Sequence[float]],
+        path_points: int = 32,
+        accel_phase: float = 2.0,
+        g: float = 9.81,
+        dt: float = 0.1,
+        batch_size: int = 1024,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel: Optional[Callable[[], bool]] = None
+) -> SurrogateTable:
+    """
+    Рассчитывает таблицу пакетным движком compute_trajectory_batch и записывает её
+    в каталог path: по файлу .npy на выход (заполняются через отображение в память,
+    так что таблица может быть больше оперативной памяти) и surrogate.json с осями.
+
+    :param axes: имя из AXES -> возрастающие значения узлов
+    :param path_points: число точек грубой траектории в узле
+    :param batch_size: число узлов в одном пакете
+    :param progress: вызывается как progress(готово, всего) после каждого пакета
+    :param cancel: функция без аргументов; если она вернула True, расчёт прерывается
+                   исключением ComputationCancelled
+    """
+    missing = set(AXES) - set(axes)
+    if missing:
+        raise ValueError(f"Не заданы оси: {', '.join(sorted(missing))}")
+    grid = [np.asarray(axes[name], dtype=np.float64) for name in AXES]
+    shape = tuple(len(values) for values in grid)
+    n_nodes = int(np.prod(shape))
+
+    os.makedirs(path, exist_ok=True)
+    files = {}
+    for name, value_shape in _OUTPUTS.items():
+        value_shape = (path_points, 3) if value_shape is None else value_shape
+        files[name] = np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode="w+",
+                                                dtype=np.float64, shape=shape + value_shape)
+    flat = {name: array.reshape((n_nodes,) + array.shape[len(shape):]) for name, array in files.items()}
+
+    for start in range(0, n_nodes, batch_size):
+        check_cancelled(cancel)
+        nodes = np.arange(start, min(start + batch_size, n_nodes))
+        index = np.unravel_index(nodes, shape)
+        params = {name: grid[axis][index[axis]] for axis, name in enumerate(AXES)}
+        positions, lengths = compute_trajectory_batch(accel_phase=accel_phase, g=g, dt=dt, cancel=cancel, **params)
+        for name, values in _summarize(positions, lengths, path_points, dt).items():
+            flat[name][nodes] = values
+        if progress is not None:
+            progress(nodes[-1] + 1, n_nodes)
+
+    for array in files.values():
+        array.flush()
+    del flat, files
+    with open(os.path.join(path, "surrogate.json"), "w") as f:
+        json.dump({"axes": {name: values.tolist() for name, values in zip(AXES, grid)},
+                   "dt": dt, "accel_phase": accel_phase, "g": g}, f)
+    return SurrogateTable.load(path)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # Диапазоны полей страницы «Генерация траектории»
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else "surrogate"
+    start = time.perf_counter()
+    table = build_surrogate(
+        target_dir,
+        dict(distance=np.linspace(2000.0, 20000.0, 7), v0=np.linspace(200.0, 1000.0, 5),
+             angle_surface_deg=np.linspace(10.0, 80.0, 8), angle_target_deg=np.linspace(0.0, 90.0, 7),
+             # Результат сильно нелинеен по малым коэффициентам — узлы там гуще
+             maneuverability=[0.0, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0],
+             drag_coefficient=[0.0, 0.01, 0.02, 0.05, 0.1]),
+        progress=lambda done, total: print(f"\r[+] {done}/{total}", end="")
+    )
+    print(f"\n[+] Таблица {table.shape} построена за {time.perf_counter() - start:.1f} с")
+
+    params = dict(distance=8000.0, v0=800.0, angle_surface_deg=30.0, angle_target_deg=45.0,
+                  maneuverability=0.1, drag_coefficient=0.02)
+    start = time.perf_counter()
+    for _ in range(1000):
+        result = table.query(**params)
+    print(f"[+] Запрос: {(time.perf_counter() - start) * 1e3:.0f} мкс, точка падения {np.round(result['impact'], 1)}")
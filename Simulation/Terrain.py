@@ -0,0 +1,328 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from GPS.coord_transformation import a as WGS84_A, e2 as WGS84_E2
+
+
+class Terrain:
+    """
+    Рельеф: высоты на регулярной сетке heights[ix, iy] в осях траектории
+    (x — север, y — восток, z — вверх, см. trajectory_to_enu; начало — начало CoordinateSystem).
+
+    Высота в точке — билинейная интерполяция по четырём узлам, за пределами сетки
+    берётся значение на границе. Если сетка отображена в память (load с mmap=True),
+    узлы читаются квадратными плитками tile_size x tile_size, последние cache_tiles
+    плиток держатся в памяти (LRU): пакет точек одного шага обычно попадает
+    в одну-две плитки, и повторных обращений к диску нет.
+    """
+
+    def __init__(self, origin: Sequence[float], spacing: Sequence[float], heights: np.ndarray,
+                 offset: float = 0.0, earth_radius: Optional[float] = None,
+                 tile_size: int = 256, cache_tiles: int = 64):
+        """
+        :param origin: координаты (x, y) узла [0, 0] (м)
+        :param spacing: шаг сетки по x и y (м); отрицательный шаг — ось сетки направлена против оси
+        :param heights: массив (nx, ny) высот
+        :param offset: добавка к высотам (например, минус высота начала координат)
+        :param earth_radius: если задан, учитывается понижение поверхности
+                             относительно касательной плоскости (x² + y²) / 2R
+        :param tile_size: размер плитки для сетки, отображённой в память
+        :param cache_tiles: число плиток в кэше
+        """
+        if heights.ndim != 2:
+            raise ValueError("Ожидается массив высот формы (nx, ny)")
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.spacing = np.asarray(spacing, dtype=np.float64)
+        self.heights_table = heights
+        self.offset = float(offset)
+        self.earth_radius = earth_radius
+        self.path: Optional[str] = None
+        self._upper = np.array(heights.shape, dtype=np.float64) - 1.0
+        self._cell_limit = np.maximum(np.array(heights.shape) - 2, 0)
+        # Массив в памяти — одна плитка на всю сетку, без копирования
+        self._tile = tile_size if isinstance(heights, np.memmap) else max(heights.shape)
+        self._tile_columns = -(-heights.shape[1] // self._tile)
+        self._cache_tiles = max(int(cache_tiles), 1)
+        self._tiles: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def flat(cls, level: float = 0.0) -> "Terrain":
+        """Горизонтальная плоскость z = level."""
+        return cls((0.0, 0.0), (1.0, 1.0), np.full((1, 1), float(level)))
+
+    @classmethod
+    def from_geodetic(cls, raster: np.ndarray, lat_first: float, lon_first: float,
+                      dlat: float, dlon: float, coords, **kwargs) -> "Terrain":
+        """
+        Рельеф из растра в географических координатах (SRTM, GeoTIFF и т. п.),
+        привязанный к началу coords (CoordinateSystem с заданным set_origin).
+
+        Широта и долгота вблизи начала координат линейны по x и y (радиусы кривизны
+        эллипсоида WGS84 в точке начала), поэтому растр используется как есть,
+        без пересчёта: достаточно начала и шага сетки в метрах.
+        Погрешность такого приближения — доли метра на десятках километров.
+
+        :param raster: массив (строки — широта, столбцы — долгота) высот над эллипсоидом, м;
+                       может быть отображён в память; строки идут по оси x (север), столбцы — по y (восток)
+        :param lat_first: широта первой строки (градусы)
+        :param lon_first: долгота первого столбца (градусы)
+        :param dlat: шаг по широте (градусы; для растров «север сверху» отрицательный)
+        :param dlon: шаг по долготе (градусы)
+        """
+        lat0 = math.radians(coords.lat0)
+        w = 1.0 - WGS84_E2 * math.sin(lat0) ** 2
+        meridian = WGS84_A * (1.0 - WGS84_E2) / w ** 1.5
+        east = WGS84_A / math.sqrt(w) * math.cos(lat0)
+        origin = (math.radians(lat_first - coords.lat0) * meridian, math.radians(lon_first - coords.lon0) * east)
+        spacing = (math.radians(dlat) * meridian, math.radians(dlon) * east)
+        kwargs.setdefault("earth_radius", math.sqrt(meridian * WGS84_A / math.sqrt(w)))
+        return cls(origin, spacing, raster, offset=-float(coords.h0), **kwargs)
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет рельеф: высоты — в path (.npy), привязка — в соседний .json.
+        """
+        np.save(path, np.asarray(self.heights_table))
+        with open(os.path.splitext(path)[0] + ".json", "w") as f:
+            json.dump({"origin": self.origin.tolist(), "spacing": self.spacing.tolist(),
+                       "offset": self.offset, "earth_radius": self.earth_radius}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, **kwargs) -> "Terrain":
+        """
+        :param path: файл .npy, записанный save()
+        :param mmap: отображать высоты в память, а не читать целиком
+        """
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            header = json.load(f)
+        heights = np.load(path, mmap_mode="r" if mmap else None)
+        terrain = cls(header["origin"], header["spacing"], heights,
+                      offset=header.get("offset", 0.0), earth_radius=header.get("earth_radius"), **kwargs)
+        terrain.path = os.path.abspath(path)
+        return terrain
+
+    def _tile_data(self, key: int) -> np.ndarray:
+        """
+        Плитка key с перекрытием в один узел (чтобы соседи по ячейке были в той же плитке).
+        Рельеф может использоваться из нескольких потоков расчёта, поэтому кэш под блокировкой.
+        """
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                return tile
+            ti, tj = divmod(key, self._tile_columns)
+            size = self._tile
+            if size >= max(self.heights_table.shape):
+                tile = self.heights_table
+            else:
+                tile = np.array(self.heights_table[ti * size:(ti + 1) * size + 1, tj * size:(tj + 1) * size + 1],
+                                dtype=np.float64)
+            self._tiles[key] = tile
+            if len(self._tiles) > self._cache_tiles:
+                self._tiles.popitem(last=False)
+            return tile
+
+    def heights(self, x, y) -> np.ndarray:
+        """
+        Высоты рельефа в пакете точек.
+
+        :param x: массив координат x (любой формы)
+        :param y: массив координат y той же формы
+        :return: массив высот той же формы
+        """
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+        shape = x.shape
+        x, y = x.ravel(), y.ravel()
+        sx = np.clip((x - self.origin[0]) / self.spacing[0], 0.0, self._upper[0])
+        sy = np.clip((y - self.origin[1]) / self.spacing[1], 0.0, self._upper[1])
+        i0 = np.minimum(sx.astype(np.intp), self._cell_limit[0])
+        j0 = np.minimum(sy.astype(np.intp), self._cell_limit[1])
+        fx, fy = sx - i0, sy - j0
+        i1 = np.minimum(i0 + 1, int(self._upper[0]))
+        j1 = np.minimum(j0 + 1, int(self._upper[1]))
+
+        size = self._tile
+        keys = (i0 // size) * self._tile_columns + j0 // size
+        first = int(keys[0]) if keys.size else 0
+        if not keys.size or (keys == first).all():
+            # Частый случай: все точки в одной плитке (или сетка целиком в памяти)
+            tile = self._tile_data(first)
+            ti, tj = divmod(first, self._tile_columns)
+            i0, i1, j0, j1 = i0 - ti * size, i1 - ti * size, j0 - tj * size, j1 - tj * size
+            h00, h10, h01, h11 = tile[i0, j0], tile[i1, j0], tile[i0, j1], tile[i1, j1]
+        else:
+            h00, h10, h01, h11 = (np.empty(x.size) for _ in range(4))
+            # Точки группируются по плиткам: одна выборка на плитку
+            unique, inverse = np.unique(keys, return_inverse=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=len(unique)))])
+            for k, key in enumerate(unique.tolist()):
+                rows = order[bounds[k]:bounds[k + 1]]
+                tile = self._tile_data(key)
+                ti, tj = divmod(key, self._tile_columns)
+                a0, a1 = i0[rows] - ti * size, i1[rows] - ti * size
+                b0, b1 = j0[rows] - tj * size, j1[rows] - tj * size
+                h00[rows], h10[rows] = tile[a0, b0], tile[a1, b0]
+                h01[rows], h11[rows] = tile[a0, b1], tile[a1, b1]
+
+        z = (h00 * (1 - fx) + h10 * fx) * (1 - fy) + (h01 * (1 - fx) + h11 * fx) * fy + self.offset
+        if self.earth_radius:
+            z -= (x * x + y * y) / (2.0 * self.earth_radius)
+        return z.reshape(shape)
+
+    def height_at(self, x: float, y: float) -> float:
+        """Высота в одной точке, без создания массивов (для скалярных циклов и событий решателя)."""
+        sx = min(max((x - self.origin[0]) / self.spacing[0], 0.0), self._upper[0])
+        sy = min(max((y - self.origin[1]) / self.spacing[1], 0.0), self._upper[1])
+        i0 = min(int(sx), int(self._cell_limit[0]))
+        j0 = min(int(sy), int(self._cell_limit[1]))
+        fx, fy = sx - i0, sy - j0
+        i1 = min(i0 + 1, int(self._upper[0]))
+        j1 = min(j0 + 1, int(self._upper[1]))
+        size = self._tile
+        ti, tj = i0 // size, j0 // size
+        tile = self._tile_data(ti * self._tile_columns + tj)
+        i0, i1, j0, j1 = i0 - ti * size, i1 - ti * size, j0 - tj * size, j1 - tj * size
+        z = float((tile[i0, j0] * (1 - fx) + tile[i1, j0] * fx) * (1 - fy)
+                  + (tile[i0, j1] * (1 - fx) + tile[i1, j1] * fx) * fy) + self.offset
+        if self.earth_radius:
+            z -= (x * x + y * y) / (2.0 * self.earth_radius)
+        return z
+
+    def clearance(self, positions: np.ndarray) -> np.ndarray:
+        """Высота точек (k, 3) над рельефом; отрицательная — под землёй."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        return positions[:, 2] - self.heights(positions[:, 0], positions[:, 1])
+
+    def segment_crossing(self, start: np.ndarray, end: np.ndarray, tolerance: float = 1e-3,
+                         max_iterations: int = 60) -> np.ndarray:
+        """
+        Доля отрезков [start, end] (k, 3), на которой они уходят под рельеф.
+        Корень высоты над рельефом ищется по всем отрезкам сразу методом ложного положения
+        (модификация Illinois): на гладком рельефе хватает нескольких итераций,
+        на изломах сетки скорость не хуже бисекции.
+        Если начало уже под рельефом или конец над ним, возвращается 1.
+
+        :param tolerance: допустимая высота над рельефом или под ним в найденной точке, м
+        :return: массив (k,) долей 0..1
+        """
+        start = np.asarray(start, dtype=np.float64).reshape(-1, 3)
+        end = np.asarray(end, dtype=np.float64).reshape(-1, 3)
+        result = np.ones(len(start))
+        f_lo, f_hi = self.clearance(start), self.clearance(end)
+        active = np.nonzero((f_lo >= 0) & (f_hi < 0))[0]
+        start, delta, f_lo, f_hi = start[active], end[active] - start[active], f_lo[active], f_hi[active]
+        lo, hi = np.zeros(len(active)), np.ones(len(active))
+        side = np.zeros(len(active), dtype=np.int8)
+        for _ in range(max_iterations):
+            if not active.size:
+                break
+            s = (lo * f_hi - hi * f_lo) / (f_hi - f_lo)
+            f = self.clearance(start + s[:, None] * delta)
+            result[active] = s
+            done = (np.abs(f) <= tolerance) | (hi - lo <= 1e-12)
+            above = f >= 0
+            # Illinois: если граница сдвигается с одной стороны дважды подряд, вес другой уменьшается вдвое
+            f_hi = np.where(above & (side == 1), 0.5 * f_hi, f_hi)
+            f_lo = np.where(~above & (side == -1), 0.5 * f_lo, f_lo)
+            lo, f_lo = np.where(above, s, lo), np.where(above, f, f_lo)
+            hi, f_hi = np.where(above, hi, s), np.where(above, f_hi, f)
+            side = np.where(above, 1, -1).astype(np.int8)
+            keep = ~done
+            active, start, delta = active[keep], start[keep], delta[keep]
+            lo, hi, f_lo, f_hi, side = lo[keep], hi[keep], f_lo[keep], f_hi[keep], side[keep]
+        return result
+
+    def __getstate__(self):
+        """
+        Для передачи в процессы пула (InverseSolver, ParameterSweep): рельеф из файла
+        передаётся путём и заново отображается в память, кэш плиток и блокировка не передаются.
+        """
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_tiles"] = OrderedDict()
+        if self.path is not None and isinstance(self.heights_table, np.memmap):
+            state["heights_table"] = None
+        return state
+
+    def __setstate__(self, state):
+        if state["heights_table"] is None:
+            state["heights_table"] = np.load(state["path"], mmap_mode="r")
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def cache_key(self) -> Tuple:
+        if self.path is not None:
+            stat = os.stat(self.path)
+            content = (self.path, stat.st_size, stat.st_mtime_ns)
+        else:
+            content = hashlib.sha1(np.ascontiguousarray(self.heights_table).tobytes()).hexdigest()
+        return ("Terrain", tuple(self.origin.tolist()), tuple(self.spacing.tolist()),
+                self.offset, self.earth_radius, content)
+
+    def __repr__(self) -> str:
+        nx, ny = self.heights_table.shape
+        return f"Terrain({nx}x{ny}, шаг {self.spacing[0]:g} x {self.spacing[1]:g} м)"
+
+
+def clip_blocks(blocks: Iterable[np.ndarray], terrain: Terrain) -> Iterator[np.ndarray]:
+    """
+    Обрезает поток блоков (k, 4) со столбцами t, x, y, z на первой точке под рельефом
+    (первая точка траектории не проверяется — это точка старта).
+    Последняя точка переносится на пересечение отрезка с рельефом, время — пропорционально.
+    Когда блоки перестают запрашиваться, прекращается и расчёт, который их выдаёт.
+    """
+    previous = None
+    for block in blocks:
+        if not len(block):
+            continue
+        checked = block if previous is not None else block[1:]
+        below = np.nonzero(terrain.clearance(checked[:, 1:]) < 0)[0]
+        if not below.size:
+            previous = block[-1]
+            yield block
+            continue
+        k = below[0] + (len(block) - len(checked))
+        before = block[k - 1] if k > 0 else previous
+        result = block[:k + 1].copy()
+        s = terrain.segment_crossing(before[1:], block[k, 1:])[0]
+        result[-1] = before + s * (block[k] - before)
+        yield result
+        return
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from Simulation.BatchTrajectory import compute_trajectory_batch
+
+    # Холмистая местность 40 x 40 км с шагом 30 м (как SRTM), отображённая в память
+    x = np.arange(0.0, 40000.0, 30.0)
+    heights = 300.0 * np.sin(x[:, None] / 3000.0) ** 2 * np.cos(x[None, :] / 5000.0) ** 2
+    path = os.path.join(tempfile.mkdtemp(), "terrain.npy")
+    Terrain((-20000.0, -20000.0), (30.0, 30.0), heights).save(path)
+    terrain = Terrain.load(path)
+
+    points = np.random.default_rng(0).uniform(-20000.0, 20000.0, (100000, 2))
+    start = time.perf_counter()
+    terrain.heights(points[:, 0], points[:, 1])
+    print(f"[+] 100000 высот за {(time.perf_counter() - start) * 1e3:.0f} мс ({terrain})")
+
+    distances = np.linspace(2000.0, 20000.0, 500)
+    for surface in (None, terrain):
+        start = time.perf_counter()
+        positions, lengths = compute_trajectory_batch(distances, 800.0, 30.0, np.linspace(-40.0, 40.0, 500),
+                                                      0.1, 0.02, terrain=surface)
+        impact = positions[-1, lengths[-1] - 1]
+        print(f"[+] {'Рельеф' if surface else 'Плоскость z = 0'}: {len(distances)} траекторий "
+              f"за {(time.perf_counter() - start) * 1e3:.0f} мс, последняя падает в {np.round(impact, 1)}")
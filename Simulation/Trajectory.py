@@ -0,0 +1,211 @@
+import numpy as np
+from typing import Generator, Iterable, Iterator, Sequence
+
+
+class Trajectory:
+    """
+    Траектория в виде непрерывного массива (N, 4) float64 со столбцами t, x, y, z.
+
+    Буфер выделяется заранее и растёт удвоением, поэтому добавление точки
+    не создаёт новых Python-объектов. Свойства t, x, y, z и xyz возвращают
+    представления (view) без копирования данных.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._data: np.ndarray = np.empty((max(int(capacity), 1), 4), dtype=np.float64)
+        self._size: int = 0
+
+    @classmethod
+    def from_array(cls, data: np.ndarray) -> "Trajectory":
+        """
+        Оборачивает готовый массив (N, 4) со столбцами t, x, y, z без копирования.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[1] != 4:
+            raise ValueError(f"Ожидался массив (N, 4), получен {data.shape}")
+        trajectory = cls.__new__(cls)
+        trajectory._data = data
+        trajectory._size = data.shape[0]
+        return trajectory
+
+    @classmethod
+    def from_columns(cls, t: Sequence[float], xyz: np.ndarray) -> "Trajectory":
+        """
+        Собирает траекторию из вектора времени (N,) и координат (N, 3).
+        """
+        xyz = np.asarray(xyz, dtype=np.float64).reshape(-1, 3)
+        data = np.empty((xyz.shape[0], 4), dtype=np.float64)
+        data[:, 0] = t
+        data[:, 1:] = xyz
+        return cls.from_array(data)
+
+    @classmethod
+    def from_points(cls, points: Iterable[Sequence[float]], dt: float = 0.1) -> "Trajectory":
+        """
+        Собирает траекторию из последовательности точек (x, y, z).
+        Точкам без времени присваивается t = i * dt.
+        """
+        xyz = np.asarray(list(points), dtype=np.float64).reshape(-1, 3)
+        return cls.from_columns(np.arange(xyz.shape[0]) * dt, xyz)
+
+    def _reserve(self, capacity: int) -> None:
+        if capacity <= self._data.shape[0]:
+            return
+        new_capacity = max(capacity, 2 * self._data.shape[0])
+        data = np.empty((new_capacity, 4), dtype=np.float64)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, t: float, position: Sequence[float]) -> None:
+        """Добавляет точку position = (x, y, z) в момент времени t."""
+        if self._size == self._data.shape[0]:
+            self._reserve(self._size + 1)
+        row = self._data[self._size]
+        row[0] = t
+        row[1:] = position
+        self._size += 1
+
+    def extend(self, block: np.ndarray) -> None:
+        """Добавляет блок строк (k, 4) со столбцами t, x, y, z."""
+        block = np.asarray(block, dtype=np.float64).reshape(-1, 4)
+        end = self._size + block.shape[0]
+        self._reserve(end)
+        self._data[self._size:end] = block
+        self._size = end
+
+    def trim(self) -> None:
+        """Освобождает неиспользуемый хвост буфера."""
+        if self._data.shape[0] != self._size:
+            self._data = self._data[:self._size].copy()
+
+    def copy(self) -> "Trajectory":
+        return Trajectory.from_array(self.data.copy())
+
+    def _locate(self, times: np.ndarray):
+        """Номер отрезка [t_i, t_i+1] и доля внутри него для каждого момента (за краями — концы)."""
+        t = self.t
+        i = np.clip(np.searchsorted(t, times, side="right") - 1, 0, max(len(t) - 2, 0))
+        if len(t) < 2:
+            return i, np.zeros_like(times)
+        span = t[i + 1] - t[i]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            f = np.where(span > 0, (times - t[i]) / span, 0.0)
+        return i, np.clip(f, 0.0, 1.0)
+
+    def positions_at(self, times: Sequence[float]) -> np.ndarray:
+        """
+        Координаты (k, 3) в моменты times — линейная интерполяция по меткам времени точек.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        i, f = self._locate(times)
+        xyz = self.xyz
+        j = np.minimum(i + 1, len(xyz) - 1)
+        return xyz[i] + f[:, None] * (xyz[j] - xyz[i])
+
+    def velocities(self) -> np.ndarray:
+        """Скорости (N, 3) в точках траектории: разности второго порядка по неравномерной сетке t."""
+        if len(self) < 2:
+            return np.zeros((len(self), 3))
+        t, xyz = self.t, self.xyz
+        keep = np.concatenate([[True], np.diff(t) > 0])
+        velocity = np.gradient(xyz[keep], t[keep], axis=0, edge_order=1)
+        return velocity[np.cumsum(keep) - 1]
+
+    def velocities_at(self, times: Sequence[float]) -> np.ndarray:
+        """Скорости (k, 3) в моменты times — интерполяция velocities() по времени."""
+        times = np.asarray(times, dtype=np.float64)
+        i, f = self._locate(times)
+        velocity = self.velocities()
+        j = np.minimum(i + 1, len(velocity) - 1)
+        return velocity[i] + f[:, None] * (velocity[j] - velocity[i])
+
+    def resample(self, step: float) -> "Trajectory":
+        """
+        Траектория на равномерной сетке t0, t0 + step, ... не дальше последней метки времени;
+        последняя точка — ровно в конце траектории, как в SegmentTrajectory.sample.
+        """
+        if len(self) == 0:
+            return Trajectory(1)
+        t0, t_end = self.t[0], self.t[-1]
+        count = int(np.floor((t_end - t0) / step + 1e-9)) + 1
+        times = t0 + np.arange(count) * step
+        if times[-1] < t_end:
+            times = np.append(times, t_end)
+        return Trajectory.from_columns(times, self.positions_at(times))
+
+    @property
+    def data(self) -> np.ndarray:
+        """Представление (N, 4) заполненной части буфера."""
+        return self._data[:self._size]
+
+    @property
+    def t(self) -> np.ndarray:
+        return self._data[:self._size, 0]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._data[:self._size, 1]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._data[:self._size, 2]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self._data[:self._size, 3]
+
+    @property
+    def xyz(self) -> np.ndarray:
+        """Представление (N, 3) координат."""
+        return self._data[:self._size, 1:]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        """
+        Целый индекс возвращает точку (x, y, z), срез — новую траекторию
+        поверх того же буфера.
+        """
+        if isinstance(index, slice):
+            return Trajectory.from_array(self.data[index])
+        return self.xyz[index]
+
+    def __iter__(self):
+        return iter(self.xyz)
+
+    def __repr__(self) -> str:
+        return f"Trajectory(points={self._size}, capacity={self._data.shape[0]})"
+
+
+def rechunk(blocks: Iterator[np.ndarray], chunk_size: int) -> Generator[np.ndarray, None, object]:
+    """
+    Перекладывает поток блоков (k, 4) произвольной длины в блоки ровно по chunk_size строк
+    (последний может быть короче). Значение, возвращённое исходным генератором,
+    возвращается дальше.
+    """
+    buffer = np.empty((chunk_size, 4))
+    filled = 0
+    iterator = iter(blocks)
+    while True:
+        try:
+            block = next(iterator)
+        except StopIteration as stop:
+            result = stop.value
+            break
+        start = 0
+        while start < len(block):
+            take = min(chunk_size - filled, len(block) - start)
+            buffer[filled:filled + take] = block[start:start + take]
+            filled += take
+            start += take
+            if filled == chunk_size:
+                yield buffer.copy()
+                filled = 0
+    if filled:
+        yield buffer[:filled].copy()
+    return result
@@ -0,0 +1,254 @@
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from Simulation.Trajectory import Trajectory
+
+
+def _canonical(value):
+    """
+    Приводит значение параметра к стабильному hashable-представлению.
+    Объект без cache_key() — ошибка: его repr не гарантирует, что равные
+    по содержанию объекты дадут один ключ, а разные — разные.
+    """
+    if value is None or isinstance(value, (str, bytes)):
+        return value
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return 0.0 if value == 0.0 else value
+    if isinstance(value, np.ndarray):
+        return tuple(_canonical(v) for v in value.ravel().tolist())
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _canonical(v)) for k, v in value.items()))
+    if hasattr(value, "cache_key"):
+        return value.cache_key()
+    raise TypeError(f"Параметр типа {type(value).__name__} нельзя использовать в ключе кэша: "
+                    f"нужен метод cache_key()")
+
+
+def engine_name(engine: Union[str, Callable]) -> str:
+    if isinstance(engine, str):
+        return engine
+    return f"{engine.__module__}.{engine.__qualname__}"
+
+
+def _code_digest(code) -> str:
+    """Хеш байт-кода вместе с константами и именами (вложенные функции — рекурсивно)."""
+    digest = hashlib.sha1(code.co_code)
+    for const in code.co_consts:
+        digest.update((_code_digest(const) if inspect.iscode(const) else repr(const)).encode("utf-8"))
+    digest.update(repr(code.co_names).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _engine_modules(module_name: str) -> List[str]:
+    """
+    Модуль движка и все модули его пакета, от которых он зависит (транзитивно):
+    импортированные модули и модули импортированных из них функций и классов.
+    """
+    package = module_name.split(".")[0] + "."
+    found, pending = set(), [module_name]
+    while pending:
+        name = pending.pop()
+        module = sys.modules.get(name)
+        if name in found or module is None:
+            continue
+        found.add(name)
+        for value in vars(module).values():
+            dependency = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+            if isinstance(dependency, str) and dependency.startswith(package) and dependency not in found:
+                pending.append(dependency)
+    return sorted(found)
+
+
+def _module_digest(name: str) -> str:
+    """Хеш исходного файла модуля; без исходника (собранный exe) — хеш кода его функций и методов."""
+    module = sys.modules[name]
+    try:
+        with open(inspect.getsourcefile(module) or "", "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (OSError, TypeError):
+        pass
+    digest = hashlib.sha1()
+    for attribute, value in sorted(vars(module).items()):
+        if getattr(value, "__module__", None) != name:
+            continue
+        members = [value] if inspect.isfunction(value) else \
+            [member for _, member in sorted(vars(value).items())] if inspect.isclass(value) else []
+        for member in members:
+            code = getattr(inspect.unwrap(member), "__code__", None) if callable(member) else None
+            if code is not None:
+                digest.update(f"{attribute}:{_code_digest(code)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def engine_version(engine: Union[str, Callable]) -> str:
+    """
+    Версия движка для ключа кэша: хеш исходников его модуля и всех модулей пакета,
+    от которых тот зависит (Engines -> Forces, Atmosphere, DormandPrince...).
+    Любая правка модели, в том числе во вспомогательных функциях и ядрах, делает
+    старые записи, в том числе на диске, недостижимыми. Вычисляется один раз за запуск.
+    """
+    if isinstance(engine, str):
+        return ""
+    digest = hashlib.sha1()
+    for name in _engine_modules(engine.__module__):
+        digest.update(f"{name}:{_module_digest(name)}\n".encode("utf-8"))
+    code = getattr(inspect.unwrap(engine), "__code__", None)
+    if code is not None:
+        digest.update(_code_digest(code).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TrajectoryCache:
+    """
+    Кэш рассчитанных траекторий по ключу «движок + параметры».
+
+    В памяти хранится LRU-набор в пределах max_bytes; если задан directory,
+    каждая траектория дополнительно сохраняется сжатым .npz и переживает перезапуск.
+    Файлы на диске занимают не больше max_disk_bytes: лишние удаляются, начиная
+    с самых старых по времени изменения (чтение из кэша обновляет это время).
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, directory: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._items: "OrderedDict[str, Trajectory]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(engine: Union[str, Callable], params: Dict) -> str:
+        """
+        Ключ кэша. Для функции-движка параметры сопоставляются с её сигнатурой
+        и дополняются значениями по умолчанию (dt, g и т. д.), поэтому явный
+        и неявный вызов с одинаковыми значениями дают один ключ.
+        В ключ входит версия движка (engine_version), поэтому после изменения
+        его кода сохранённые траектории не используются.
+        """
+        params = {k: v for k, v in params.items() if k != "cancel"}
+        if callable(engine):
+            signature = inspect.signature(engine)
+            bound = signature.bind_partial(**params)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != "cancel"}
+        canonical = (engine_name(engine), engine_version(engine), _canonical(params))
+        return hashlib.sha1(repr(canonical).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _remember(self, key: str, trajectory: Trajectory) -> None:
+        size = trajectory.nbytes
+        if key in self._items:
+            self._bytes -= self._items.pop(key).nbytes
+        if size > self.max_bytes:
+            return
+        self._items[key] = trajectory
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def get(self, engine: Union[str, Callable], params: Dict) -> Optional[Trajectory]:
+        key = self.make_key(engine, params)
+        with self._lock:
+            trajectory = self._items.get(key)
+            if trajectory is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return trajectory
+
+        if self.directory and os.path.isfile(self._path(key)):
+            try:
+                with np.load(self._path(key)) as stored:
+                    trajectory = Trajectory.from_array(stored["data"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[!] Повреждённая запись кэша {key}: {e}")
+            else:
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass
+                with self._lock:
+                    self._remember(key, trajectory)
+                    self.hits += 1
+                return trajectory
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, engine: Union[str, Callable], params: Dict, trajectory: Trajectory) -> None:
+        key = self.make_key(engine, params)
+        trajectory.trim()
+        with self._lock:
+            self._remember(key, trajectory)
+
+        if self.directory:
+            path = self._path(key)
+            tmp_path = path + ".tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.savez_compressed(f, data=trajectory.data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[!] Не удалось сохранить траекторию в кэш: {e}")
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        """Удаляет самые старые (по mtime) файлы, пока каталог не уложится в max_disk_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_disk_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self, disk: bool = False) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+        if disk and self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, name))
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._items)
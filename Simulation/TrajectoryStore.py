@@ -0,0 +1,231 @@
+import json
+import os
+import uuid
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Simulation.Trajectory import Trajectory
+
+_HEADER = "store.json"
+_POINTS = "points.bin"
+_INDEX = "index.bin"
+_PARAMS = "params.bin"
+
+
+def create_store(path: str, param_names: Sequence[str], dtype: str = "float32") -> None:
+    """
+    Создаёт пустое хранилище траекторий в каталоге path.
+
+    :param param_names: столбцы таблицы параметров (по одному float64 на траекторию)
+    :param dtype: тип точек t, x, y, z: float32 (вдвое компактнее, ~1 мм на 20 км) или float64
+    """
+    if np.dtype(dtype) not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise ValueError(f"Неподдерживаемый тип точек: {dtype}")
+    os.makedirs(path, exist_ok=True)
+    header = os.path.join(path, _HEADER)
+    if os.path.exists(header):
+        with open(header) as f:
+            existing = json.load(f)
+        if existing["params"] != list(param_names) or existing["dtype"] != np.dtype(dtype).name:
+            raise ValueError(f"В {path} уже есть хранилище с другими столбцами или типом точек")
+        return
+    with open(header, "w") as f:
+        json.dump({"params": list(param_names), "dtype": np.dtype(dtype).name}, f)
+
+
+class StoreWriter:
+    """
+    Дописывает траектории в свою часть хранилища (подкаталог part-<имя>).
+    У каждого процесса своя часть, поэтому писатели не мешают друг другу
+    и блокировки не нужны.
+
+    Точки копятся в буфере и сбрасываются в файл блоками; запись индекса идёт
+    после записи точек, так что оборванная запись оставляет согласованный префикс.
+    """
+
+    def __init__(self, path: str, part: Optional[str] = None, buffer_points: int = 1 << 18):
+        with open(os.path.join(path, _HEADER)) as f:
+            header = json.load(f)
+        self.param_names: List[str] = header["params"]
+        self.dtype = np.dtype(header["dtype"])
+        self.directory = os.path.join(path, f"part-{part or f'{os.getpid()}-{uuid.uuid4().hex[:8]}'}")
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._points = open(os.path.join(self.directory, _POINTS), "ab")
+        self._index = open(os.path.join(self.directory, _INDEX), "ab")
+        self._params = open(os.path.join(self.directory, _PARAMS), "ab")
+        self._offset = self._points.tell() // (4 * self.dtype.itemsize)
+
+        self._buffer = np.empty((buffer_points, 4), dtype=self.dtype)
+        self._filled = 0
+        self._pending_index: List[Tuple[int, int]] = []
+        self._pending_params: List[np.ndarray] = []
+
+    def append(self, trajectory: Trajectory, params: Optional[Dict[str, float]] = None) -> None:
+        """
+        :param params: значения столбцов таблицы параметров; отсутствующие — NaN
+        """
+        data = trajectory.data
+        n = len(data)
+        if self._filled + n > len(self._buffer):
+            self.flush()
+        if n > len(self._buffer):
+            self._points.write(np.ascontiguousarray(data, dtype=self.dtype).tobytes())
+        else:
+            self._buffer[self._filled:self._filled + n] = data
+            self._filled += n
+        self._pending_index.append((self._offset, n))
+        self._offset += n
+        row = np.full(len(self.param_names), np.nan)
+        for i, name in enumerate(self.param_names):
+            if params is not None and name in params:
+                row[i] = params[name]
+        self._pending_params.append(row)
+
+    def flush(self) -> None:
+        if self._filled:
+            self._points.write(self._buffer[:self._filled].tobytes())
+            self._filled = 0
+        self._points.flush()
+        if self._pending_index:
+            self._params.write(np.array(self._pending_params, dtype=np.float64).tobytes())
+            self._params.flush()
+            self._index.write(np.array(self._pending_index, dtype=np.int64).tobytes())
+            self._index.flush()
+            self._pending_index.clear()
+            self._pending_params.clear()
+
+    def close(self) -> None:
+        self.flush()
+        for f in (self._points, self._index, self._params):
+            f.close()
+
+    def __enter__(self) -> "StoreWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TrajectoryStore:
+    """
+    Чтение хранилища траекторий: все части отображаются в память, траектория k
+    читается с диска отдельно от остальных.
+
+    Раскладка каталога: store.json (столбцы параметров, тип точек) и подкаталоги
+    part-*, в каждом — points.bin (строки t, x, y, z подряд), index.bin
+    (пары int64 смещение, число точек) и params.bin (строки float64 параметров).
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, _HEADER)) as f:
+            header = json.load(f)
+        self.path = path
+        self.param_names: List[str] = header["params"]
+        self.dtype = np.dtype(header["dtype"])
+
+        parts = sorted(name for name in os.listdir(path) if name.startswith("part-"))
+        self._points: List[np.ndarray] = []
+        part_ids, offsets, lengths, params = [], [], [], []
+        width = len(self.param_names)
+        for part_id, name in enumerate(parts):
+            directory = os.path.join(path, name)
+            size = os.path.getsize(os.path.join(directory, _POINTS)) // (4 * self.dtype.itemsize)
+            points = np.memmap(os.path.join(directory, _POINTS), dtype=self.dtype, mode="r",
+                               shape=(size, 4)) if size else np.empty((0, 4), dtype=self.dtype)
+            index = np.fromfile(os.path.join(directory, _INDEX), dtype=np.int64).reshape(-1, 2)
+            table = np.fromfile(os.path.join(directory, _PARAMS), dtype=np.float64)
+            table = table[:len(table) // width * width].reshape(-1, width) if width else \
+                np.empty((len(index), 0))
+            # Берём только полностью записанные траектории
+            count = min(len(index), len(table))
+            complete = index[:count, 0] + index[:count, 1] <= size
+            count = int(np.argmin(complete)) if not complete.all() else count
+            self._points.append(points)
+            part_ids.append(np.full(count, part_id, dtype=np.int64))
+            offsets.append(index[:count, 0])
+            lengths.append(index[:count, 1])
+            params.append(table[:count])
+
+        self._part = np.concatenate(part_ids) if part_ids else np.empty(0, dtype=np.int64)
+        self._offsets = np.concatenate(offsets) if offsets else np.empty(0, dtype=np.int64)
+        self.lengths = np.concatenate(lengths) if lengths else np.empty(0, dtype=np.int64)
+        self._params = np.concatenate(params) if params else np.empty((0, width))
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, k: int) -> Trajectory:
+        """Траектория k (читается только её блок точек)."""
+        if k < 0:
+            k += len(self)
+        start = self._offsets[k]
+        block = self._points[self._part[k]][start:start + self.lengths[k]]
+        return Trajectory.from_array(np.array(block, dtype=np.float64))
+
+    def params(self, k: int) -> Dict[str, float]:
+        return dict(zip(self.param_names, self._params[k].tolist()))
+
+    @property
+    def parameters(self) -> Dict[str, np.ndarray]:
+        """Таблица параметров по столбцам (N,)."""
+        return {name: self._params[:, i] for i, name in enumerate(self.param_names)}
+
+    @property
+    def nbytes(self) -> int:
+        """Объём точек на диске."""
+        return sum(points.nbytes for points in self._points)
+
+    def _rows(self, position: np.ndarray) -> np.ndarray:
+        """Строки (t, x, y, z) с номерами offset + position[k] для всех траекторий, по частям."""
+        result = np.empty((len(self), 4))
+        for part_id, points in enumerate(self._points):
+            mask = self._part == part_id
+            if mask.any():
+                result[mask] = points[self._offsets[mask] + position[mask]]
+        return result
+
+    def first_points(self) -> np.ndarray:
+        """Начальные точки (N, 4) всех траекторий — без чтения остальных точек."""
+        return self._rows(np.zeros(len(self), dtype=np.int64))
+
+    def last_points(self) -> np.ndarray:
+        """Конечные точки (N, 4) — например, точки падения для анализа рассеивания."""
+        return self._rows(self.lengths - 1)
+
+    def iter_trajectories(self, indices: Optional[Sequence[int]] = None) -> Iterator[Trajectory]:
+        """Последовательный проход по траекториям без загрузки хранилища в память."""
+        for k in (range(len(self)) if indices is None else indices):
+            yield self[k]
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import time
+
+    from Simulation.Engines import simulate_engine
+
+    directory = tempfile.mkdtemp()
+    try:
+        create_store(directory, ["distance", "angle_target_deg"])
+        distances = np.linspace(2000.0, 20000.0, 2000)
+        angles = np.linspace(-40.0, 40.0, 2000)
+        trajectories = simulate_engine("maneuvering", distance=distances, v0=800.0, angle_surface_deg=30.0,
+                                       angle_target_deg=angles, maneuverability=0.1, drag_coefficient=0.02)
+        start = time.perf_counter()
+        with StoreWriter(directory) as writer:
+            for trajectory, distance, angle in zip(trajectories, distances, angles):
+                writer.append(trajectory, {"distance": distance, "angle_target_deg": angle})
+        print(f"[+] Записано {len(trajectories)} траекторий за {(time.perf_counter() - start) * 1e3:.0f} мс")
+
+        store = TrajectoryStore(directory)
+        start = time.perf_counter()
+        trajectory = store[1234]
+        print(f"[+] Траектория 1234: {len(trajectory)} точек за {(time.perf_counter() - start) * 1e6:.0f} мкс, "
+              f"параметры {store.params(1234)}")
+        print(f"[+] Точки падения: {store.last_points().shape}, "
+              f"на диске {store.nbytes / 2 ** 20:.1f} МБ")
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,345 @@
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.optimize import brentq
+from scipy.sparse import block_diag
+from functools import lru_cache
+from typing import Tuple, List, Optional, Sequence, Union
+
+from Simulation.Atmosphere import AtmosphereTable, LayeredWind, WindField
+from Simulation.Terrain import Terrain
+from Simulation.Trajectory import Trajectory
+
+# Атмосферные параметры модели по умолчанию
+RHO_0: float = 1.225             # плотность воздуха на уровне моря, кг/м³
+H: float = 8500.0                # масштабная высота атмосферы, м
+
+
+@lru_cache(maxsize=None)
+def _default_atmosphere(rho_0: float, H: float) -> AtmosphereTable:
+    """Таблица экспоненциальной атмосферы, строится один раз на пару (rho_0, H)."""
+    return AtmosphereTable.exponential(rho_0, H)
+
+
+class WindGuidedDynamics:
+    """
+    Правая часть модели управляемого тела с сопротивлением, ветром и боковой
+    коррекцией в сторону цели. Состояние — (x, y, z, vx, vy, vz).
+
+    rhs векторизован: принимает состояние (6,) или столбцы (6, k) и считает
+    все столбцы одними операциями над массивами (режим solve_ivp vectorized=True).
+    jac — аналитическая матрица Якоби (6, 6) для неявных методов (Radau, BDF, LSODA).
+
+    target и v0_mag могут быть заданы для каждого столбца отдельно ((3, k) и (k,)) —
+    так считается пакет тел одной системой.
+    """
+
+    def __init__(self, m: float, S: float, C_D: float, target, v0_mag,
+                 g: float = 9.81, k_c: float = 2.0, p: float = 2,
+                 atmosphere: Optional[AtmosphereTable] = None,
+                 wind: Union[WindField, LayeredWind, None] = None):
+        self.k_drag = 0.5 * C_D * S / m
+        self.target = np.asarray(target, dtype=np.float64).reshape(3, -1)
+        self.v0_mag = np.asarray(v0_mag, dtype=np.float64)
+        self.g = g
+        self.k_c = k_c
+        self.p = p
+        self.atmosphere = atmosphere if atmosphere is not None else _default_atmosphere(RHO_0, H)
+        self.wind = wind if wind is not None else LayeredWind(None)
+
+    def rhs(self, t: float, Y: np.ndarray) -> np.ndarray:
+        Y = np.asarray(Y, dtype=np.float64)
+        return self.derivatives(Y.reshape(6, -1)).reshape(Y.shape)
+
+    def derivatives(self, states: np.ndarray, target: Optional[np.ndarray] = None,
+                    v0_mag: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        :param states: столбцы состояний (6, k)
+        :param target: цели по столбцам (3, k); по умолчанию self.target
+        :param v0_mag: модули начальной скорости по столбцам (k,); по умолчанию self.v0_mag
+        :return: производные (6, k)
+        """
+        target = self.target if target is None else target
+        v0_mag = self.v0_mag if v0_mag is None else v0_mag
+        pos, vel = states[:3], states[3:]
+        out = np.empty_like(states)
+        out[:3] = vel
+
+        # Аэродинамическое сопротивление по скорости относительно воздуха
+        v_rel = vel - self.wind.at(pos.T).T
+        v_rel_mag = np.sqrt(np.einsum('ik,ik->k', v_rel, v_rel))
+        rho = self.atmosphere.density(pos[2])
+        acc = -(self.k_drag * rho * v_rel_mag) * v_rel
+
+        # Сила тяжести
+        acc[2] -= self.g
+
+        # Корректирующее боковое ускорение, направленное в сторону цели
+        v_mag = np.sqrt(np.einsum('ik,ik->k', vel, vel))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            v_dir = vel / v_mag
+            d_target = target - pos
+            d_proj = d_target - np.einsum('ik,ik->k', d_target, v_dir) * v_dir
+            d_proj_norm = np.sqrt(np.einsum('ik,ik->k', d_proj, d_proj))
+            scale = np.minimum(1.0, (v_mag / v0_mag) ** self.p)
+            a_corr = (self.k_c * scale / d_proj_norm) * d_proj
+        active = (v_mag > 1e-2) & (d_proj_norm > 1e-6)
+        acc += np.where(active, a_corr, 0.0)
+
+        out[3:] = acc
+        return out
+
+    def _wind_gradient(self, position: np.ndarray) -> np.ndarray:
+        """Матрица d(wind)/d(pos) (3, 3); для сетки — центральными разностями по интерполяции."""
+        if not isinstance(self.wind, WindField):
+            return np.zeros((3, 3))
+        h = 1e-3 * self.wind.spacing
+        probes = np.concatenate([position + np.diag(h), position - np.diag(h)])
+        values = self.wind.at(probes)
+        return ((values[:3] - values[3:]) / (2 * h)[:, None]).T
+
+    def jac(self, t: float, y: np.ndarray, column: int = 0) -> np.ndarray:
+        """
+        Аналитическая матрица Якоби правой части для одного состояния.
+
+        :param column: номер тела (столбца target/v0_mag) для пакетного режима
+        """
+        pos, vel = np.asarray(y[:3], dtype=np.float64), np.asarray(y[3:6], dtype=np.float64)
+        J = np.zeros((6, 6))
+        J[:3, 3:] = np.eye(3)
+
+        # Сопротивление: a = -k rho(z) |v_rel| v_rel, v_rel = v - w(pos)
+        v_rel = vel - self.wind.at(pos[None, :])[0]
+        v_rel_mag = float(np.sqrt(v_rel @ v_rel))
+        rho = float(self.atmosphere.density(pos[2]))
+        if v_rel_mag > 0:
+            d_drag_d_vrel = -self.k_drag * rho * (v_rel_mag * np.eye(3) + np.outer(v_rel, v_rel) / v_rel_mag)
+        else:
+            d_drag_d_vrel = np.zeros((3, 3))
+        J[3:, 3:] += d_drag_d_vrel
+        J[3:, :3] -= d_drag_d_vrel @ self._wind_gradient(pos)
+        J[3:, 2] += -self.k_drag * float(self.atmosphere.density_gradient(pos[2])) * v_rel_mag * v_rel
+
+        # Коррекция: a = c(|v|) * n, n = P d / |P d|, P = I - u u^T, d = target - pos
+        v_mag = float(np.sqrt(vel @ vel))
+        if v_mag > 1e-2:
+            target = self.target[:, column if self.target.shape[1] > 1 else 0]
+            v0_mag = float(self.v0_mag.reshape(-1)[column if self.v0_mag.size > 1 else 0])
+            u = vel / v_mag
+            d = target - pos
+            d_dot_u = float(d @ u)
+            d_proj = d - d_dot_u * u
+            d_proj_norm = float(np.sqrt(d_proj @ d_proj))
+            if d_proj_norm > 1e-6:
+                n = d_proj / d_proj_norm
+                ratio = (v_mag / v0_mag) ** self.p
+                c = self.k_c * min(1.0, ratio)
+                dn_d_dproj = (np.eye(3) - np.outer(n, n)) / d_proj_norm
+                P = np.eye(3) - np.outer(u, u)
+                J[3:, :3] += c * dn_d_dproj @ (-P)
+                dproj_dv = -(np.outer(u, d) + d_dot_u * np.eye(3)) @ P / v_mag
+                J[3:, 3:] += c * dn_d_dproj @ dproj_dv
+                if ratio < 1.0:
+                    J[3:, 3:] += np.outer(n, self.k_c * self.p * ratio / v_mag * u)
+        return J
+
+
+def _jacobian_option(method: str, jac) -> dict:
+    """Якобиан нужен только неявным методам; явным solve_ivp выдаёт на него предупреждение."""
+    return {} if method in ("RK45", "RK23", "DOP853") else {"jac": jac}
+
+
+def _sampled_trajectory(sol, t_end: float, y_end: np.ndarray, rows: slice, sample_dt: Optional[float]) -> Trajectory:
+    """Траектория одного тела: точки с шагом sample_dt по плотному выводу плюс точка события."""
+    if sample_dt is None:
+        mask = sol.t < t_end
+        times, xyz = sol.t[mask], sol.y[rows][:3, mask].T
+    else:
+        times = np.arange(int(np.ceil(t_end / sample_dt))) * sample_dt
+        xyz = sol.sol(times)[rows][:3].T if times.size else np.empty((0, 3))
+    return Trajectory.from_columns(np.append(times, t_end), np.vstack([xyz, y_end[:3]]))
+
+
+def simulate_guided_trajectory(
+    m: float,                         # масса тела, кг
+    S: float,                         # лобовая площадь, м²
+    C_D: float,                       # коэффициент аэродинамического сопротивления
+    start: Tuple[float, float, float],  # начальная точка (x, y, z)
+    target: Tuple[float, float, float], # точка назначения (x, y, z)
+    v0: Tuple[float, float, float],     # начальная скорость (vx, vy, vz)
+    g: float = 9.81,                  # ускорение свободного падения, м/с²
+    wind_zones: Optional[List[Tuple[float, float, Tuple[float, float, float]]]] = None,
+    k_c: float = 2.0,                 # максимальное корректирующее ускорение, м/с²
+    p: float = 2,                     # степень убывания управляющего ускорения
+    atmosphere: Optional[AtmosphereTable] = None,  # таблица атмосферы; по умолчанию rho_0 * exp(-z / H)
+    wind_field: Optional[WindField] = None,        # сеточный ветер; если задан, wind_zones не используются
+    method: str = "RK45",             # метод solve_ivp; для жёстких режимов — Radau, BDF, LSODA
+    rtol: float = 1e-6,
+    atol: float = 1e-8,
+    max_step: float = np.inf,         # ограничение шага; точность задают rtol/atol
+    sample_dt: Optional[float] = 0.05,  # шаг выдачи точек по плотному выводу; None — точки решателя
+    t_max: float = 1e3,
+    terrain: Optional[Terrain] = None   # рельеф; полёт заканчивается и при столкновении с ним
+) -> Trajectory:
+    """
+    Симулирует траекторию управляемого тела с аэродинамическим торможением,
+    корректировкой направления и учётом ветра. Возвращает траекторию (t, x, y, z)
+    центра масс до достижения высоты целевой точки.
+
+    Правая часть векторизована, для неявных методов передаётся аналитический якобиан.
+    Шаг решателя выбирается по точности, а точки с шагом sample_dt берутся из
+    плотного вывода; последняя точка — момент достижения высоты цели
+    или столкновения с рельефом, смотря что раньше.
+    """
+    dynamics = WindGuidedDynamics(
+        m, S, C_D, target, np.linalg.norm(v0), g=g, k_c=k_c, p=p, atmosphere=atmosphere,
+        wind=wind_field if wind_field is not None else LayeredWind(wind_zones)
+    )
+    target_z = float(target[2])
+
+    def reach_target_altitude(t: float, Y: np.ndarray) -> float:
+        """
+        Условие завершения симуляции: когда тело достигает высоты целевой точки.
+        """
+        return Y[2] - target_z
+    reach_target_altitude.terminal = True
+    reach_target_altitude.direction = -1
+    events = [reach_target_altitude]
+
+    if terrain is not None:
+        def hit_terrain(t: float, Y: np.ndarray) -> float:
+            return Y[2] - terrain.height_at(Y[0], Y[1])
+        hit_terrain.terminal = True
+        hit_terrain.direction = -1
+        events.append(hit_terrain)
+
+    sol = solve_ivp(
+        fun=dynamics.rhs,
+        t_span=(0, t_max),          # большое время, реальное завершение — через event
+        y0=np.array([*start, *v0], dtype=np.float64),
+        method=method,
+        **_jacobian_option(method, dynamics.jac),
+        vectorized=True,
+        events=events,
+        dense_output=sample_dt is not None,
+        max_step=max_step,
+        rtol=rtol,
+        atol=atol,
+    )
+
+    hits = [k for k, times in enumerate(sol.t_events) if times.size]
+    if hits:
+        first = min(hits, key=lambda k: sol.t_events[k][0])
+        t_end, y_end = sol.t_events[first][0], sol.y_events[first][0]
+    else:
+        t_end, y_end = sol.t[-1], sol.y[:, -1]
+    return _sampled_trajectory(sol, t_end, y_end, slice(0, 6), sample_dt)
+
+
+def simulate_guided_trajectory_batch(
+    m: float,
+    S: float,
+    C_D: float,
+    starts: Sequence[Sequence[float]],   # начальные точки (N, 3)
+    targets: Sequence[Sequence[float]],  # точки назначения (3,) или (N, 3)
+    v0s: Sequence[Sequence[float]],      # начальные скорости (N, 3)
+    g: float = 9.81,
+    wind_zones: Optional[List[Tuple[float, float, Tuple[float, float, float]]]] = None,
+    k_c: float = 2.0,
+    p: float = 2,
+    atmosphere: Optional[AtmosphereTable] = None,
+    wind_field: Optional[WindField] = None,
+    method: str = "RK45",
+    rtol: float = 1e-6,
+    atol: float = 1e-8,
+    sample_dt: float = 0.05,
+    t_max: float = 1e3,
+    terrain: Optional[Terrain] = None
+) -> List[Trajectory]:
+    """
+    Пакетный вариант simulate_guided_trajectory: N начальных условий интегрируются
+    одной системой размера 6N (одна правая часть на все тела, общий шаг).
+    Момент достижения высоты цели ищется для каждого тела отдельно,
+    расчёт останавливается, когда цели достигли все.
+    Если задан рельеф terrain, траектория тела обрывается на первом столкновении с ним,
+    если оно раньше снижения до высоты цели.
+
+    Для неявных методов якобиан блочно-диагональный и передаётся разреженным.
+
+    :return: список траекторий (t, x, y, z) в порядке начальных условий
+    """
+    starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+    v0s = np.asarray(v0s, dtype=np.float64).reshape(-1, 3)
+    n = starts.shape[0]
+    targets = np.broadcast_to(np.asarray(targets, dtype=np.float64), (n, 3))
+    target_z = targets[:, 2].copy()
+
+    dynamics = WindGuidedDynamics(
+        m, S, C_D, targets.T, np.linalg.norm(v0s, axis=1), g=g, k_c=k_c, p=p, atmosphere=atmosphere,
+        wind=wind_field if wind_field is not None else LayeredWind(wind_zones)
+    )
+
+    # Состояние хранится по компонентам: Y.reshape(6, N)[c, i] — компонента c тела i
+    def rhs(t: float, Y: np.ndarray) -> np.ndarray:
+        if Y.ndim == 1:
+            return dynamics.rhs(t, Y.reshape(6, n)).ravel()
+        # Несколько пробных состояний системы (конечные разности неявных методов)
+        k = Y.shape[1]
+        states = Y.reshape(6, n * k)
+        return dynamics.derivatives(
+            states, np.repeat(dynamics.target, k, axis=1), np.repeat(dynamics.v0_mag, k)
+        ).reshape(6 * n, k)
+
+    order = np.arange(6 * n).reshape(6, n).T.ravel()  # номера переменных тела i подряд
+
+    def jac(t: float, Y: np.ndarray):
+        per_body = Y.reshape(6, n).T
+        blocks = block_diag([dynamics.jac(t, per_body[i], column=i) for i in range(n)], format="csc")
+        # Переставляем из «по телам» в «по компонентам»
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(6 * n)
+        return blocks[inverse][:, inverse]
+
+    def last_landed(t: float, Y: np.ndarray) -> float:
+        return np.max(Y[2 * n:3 * n] - target_z)
+    last_landed.terminal = True
+    last_landed.direction = -1
+
+    sol = solve_ivp(
+        fun=rhs,
+        t_span=(0, t_max),
+        y0=np.concatenate([starts.T, v0s.T]).ravel(),
+        method=method,
+        **_jacobian_option(method, jac),
+        vectorized=True,
+        events=last_landed,
+        dense_output=True,
+        rtol=rtol,
+        atol=atol,
+    )
+
+    # Момент падения каждого тела — по плотному выводу: последний переход z через уровень цели сверху вниз
+    times = np.append(np.arange(int(np.ceil(sol.t[-1] / sample_dt))) * sample_dt, sol.t[-1])
+    states = sol.sol(times)
+    z = states[2 * n:3 * n] - target_z[:, None]
+    if terrain is not None:
+        clearance = states[2 * n:3 * n] - terrain.heights(states[:n], states[n:2 * n])
+    trajectories = []
+    for i in range(n):
+        rows = np.arange(6) * n + i
+        crossing = np.nonzero((z[i, :-1] > 0) & (z[i, 1:] <= 0))[0]
+        if crossing.size:
+            k = crossing[-1]
+            t_end = brentq(lambda t: sol.sol(t)[2 * n + i] - target_z[i], times[k], times[k + 1], xtol=1e-12)
+        else:
+            t_end = sol.t[-1]
+        if terrain is not None:
+            hit = np.nonzero((clearance[i, :-1] > 0) & (clearance[i, 1:] <= 0))[0]
+            if hit.size and times[hit[0]] < t_end:
+                k = hit[0]
+
+                def above_terrain(t: float) -> float:
+                    y = sol.sol(t)
+                    return y[2 * n + i] - terrain.height_at(y[i], y[n + i])
+                t_end = min(t_end, brentq(above_terrain, times[k], times[k + 1], xtol=1e-12))
+        trajectories.append(_sampled_trajectory(sol, t_end, sol.sol(t_end)[rows], rows, sample_dt))
+    return trajectories
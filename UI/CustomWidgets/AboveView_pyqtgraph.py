@@ -1,5 +1,6 @@
 
 
+from Simulation.Trajectory import Trajectory
 from UI.CustomWidgets.View_pyqtgraph import ViewPyqtgraph
 
 
@@ -9,10 +10,5 @@ class AboveViewPyqtgraph(ViewPyqtgraph):
         self.set_axis_labels(x_label='X', y_label='Y')
         self.set_plot_title('Вид сверху')
 
-    def update_trajectory(self, trajectory: list[tuple[float, float, float]]):
-        new_x = []
-        new_y = []
-        for item in trajectory:
-            new_x.append(item[0])
-            new_y.append(item[1])
-        self.curve.setData(new_x, new_y)
+    def columns(self, trajectory: Trajectory):
+        return trajectory.x, trajectory.y
@@ -0,0 +1,62 @@
+from typing import Tuple
+
+import numpy as np
+
+from Simulation.Trajectory import Trajectory
+
+# При потоковой отрисовке каждые столько точек закрепляются отдельным элементом и больше не передаются
+STREAM_SEGMENT_POINTS = 4096
+
+
+class StreamingSegments:
+    """
+    Потоковая отрисовка растущей траектории: каждые STREAM_SEGMENT_POINTS точек
+    закрепляются отдельным элементом сцены один раз, заново передаётся только хвост,
+    поэтому вся потоковая отрисовка — O(N), а не O(N²).
+
+    Виджет вызывает _init_segments() в конструкторе и задаёт:
+    _stream_columns — столбцы траектории для отрисовки,
+    _make_segment / _remove_segment — создание и удаление закреплённого участка,
+    _set_tail — данные растущего хвоста, begin_trajectory — очистку перед новой траекторией.
+    """
+
+    def _init_segments(self):
+        self._segments = []
+        self._frozen = 0
+        self._streamed = None
+
+    def _clear_segments(self):
+        for segment in self._segments:
+            self._remove_segment(segment)
+        self._segments.clear()
+        self._frozen = 0
+        self._streamed = None
+
+    def _stream_columns(self, trajectory: Trajectory) -> Tuple[np.ndarray, ...]:
+        raise NotImplementedError
+
+    def _make_segment(self, *columns):
+        raise NotImplementedError
+
+    def _remove_segment(self, segment):
+        raise NotImplementedError
+
+    def _set_tail(self, *columns):
+        raise NotImplementedError
+
+    def extend_trajectory(self, trajectory: Trajectory):
+        """
+        Дорисовывает растущую траекторию: передаются только точки после последнего
+        закреплённого участка. Готовая траектория (update_trajectory) заменяет участки целиком.
+        """
+        if trajectory is not self._streamed:
+            self.begin_trajectory()
+            self._streamed = trajectory
+        columns = self._stream_columns(trajectory)
+        n = len(columns[0])
+        while n - self._frozen > STREAM_SEGMENT_POINTS:
+            end = self._frozen + STREAM_SEGMENT_POINTS
+            # Участок включает последнюю точку предыдущего, чтобы линия не прерывалась
+            self._segments.append(self._make_segment(*(column[self._frozen:end + 1] for column in columns)))
+            self._frozen = end
+        self._set_tail(*(column[self._frozen:] for column in columns))
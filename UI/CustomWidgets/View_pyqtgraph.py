@@ -1,8 +1,16 @@
 from abc import abstractmethod
 
+import numpy as np
+
+from PyQt6.QtCore import Qt
 from pyqtgraph import PlotWidget, mkPen
 
-class ViewPyqtgraph(PlotWidget):
+from Simulation.Decimation import minmax_envelope
+from Simulation.Trajectory import Trajectory
+from UI.CustomWidgets.StreamingSegments import StreamingSegments
+
+
+class ViewPyqtgraph(StreamingSegments, PlotWidget):
     def __init__(self, parent):
         super().__init__(parent=parent)
         # Убираем фон (белый цвет)
@@ -20,6 +28,10 @@ class ViewPyqtgraph(PlotWidget):
         self.setMenuEnabled(False)
 
         self.curve = self.plot(pen=mkPen(color='b', width=2))
+        # Закреплённые участки потоковой траектории; self.curve — её растущий хвост
+        self._init_segments()
+        # Предварительная траектория (по таблице) — пунктиром, пока идёт точный расчёт
+        self.preview_curve = self.plot(pen=mkPen(color=(128, 128, 128), width=1, style=Qt.PenStyle.DashLine))
 
     def set_axis_labels(self, x_label="", y_label=""):
         """Установить подписи осей X и Y."""
@@ -32,6 +44,49 @@ class ViewPyqtgraph(PlotWidget):
 
 
 
+    def _decimated(self, horizontal, vertical):
+        """Прореживание до нескольких точек на пиксель ширины (огибающая минимумов и максимумов, пики сохраняются)."""
+        bins = max(self.width(), 1)
+        if len(horizontal) > 4 * bins:
+            indices = minmax_envelope(np.column_stack([horizontal, vertical]), bins)
+            return horizontal[indices], vertical[indices]
+        return horizontal, vertical
+
+    def set_curve(self, horizontal, vertical):
+        """Выводит кривую целиком, прореженную до нескольких точек на пиксель ширины."""
+        self._clear_segments()
+        self.curve.setData(*self._decimated(horizontal, vertical))
+
     @abstractmethod
-    def update_trajectory(self, trajectory: list[tuple[float, float, float]]):
+    def columns(self, trajectory: Trajectory):
+        """Пара столбцов траектории (по горизонтали, по вертикали) для этого вида."""
         pass
+
+    def update_trajectory(self, trajectory: Trajectory):
+        self.set_curve(*self.columns(trajectory))
+
+    def preview_trajectory(self, trajectory):
+        """Показывает предварительную траекторию; None убирает её."""
+        if trajectory is None:
+            self.preview_curve.setData([], [])
+        else:
+            self.preview_curve.setData(*self.columns(trajectory))
+
+    def begin_trajectory(self):
+        """Очищает график перед потоковой отрисовкой."""
+        self._clear_segments()
+        self.curve.setData([], [])
+
+    def _stream_columns(self, trajectory: Trajectory):
+        return self.columns(trajectory)
+
+    def _make_segment(self, horizontal, vertical):
+        segment = self.plot(pen=self.curve.opts['pen'])
+        segment.setData(*self._decimated(horizontal.copy(), vertical.copy()))
+        return segment
+
+    def _remove_segment(self, segment):
+        self.removeItem(segment)
+
+    def _set_tail(self, horizontal, vertical):
+        self.curve.setData(horizontal, vertical)
@@ -1,11 +1,22 @@
 import numpy as np
+from PyQt6.QtCore import QEvent, Qt
 from PyQt6.QtGui import QColor
-from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtWidgets import QToolTip, QWidget, QVBoxLayout
 from PyQt6 import QtGui
 from PyQt6 import QtWidgets
 from pyqtgraph.opengl import GLViewWidget, GLLinePlotItem, GLGridItem
 import pyqtgraph.opengl as gl
 from pyqtgraph.opengl import GLScatterPlotItem
+from scipy.spatial import cKDTree
+
+from Simulation.Decimation import douglas_peucker
+from Simulation.Trajectory import Trajectory
+from UI.CustomWidgets.StreamingSegments import StreamingSegments
+
+# Готовая траектория длиннее этого числа точек выводится упрощённой (Дуглас–Пекер)
+MAX_DISPLAY_POINTS = 5000
+# Точка траектории подсвечивается, если курсор ближе этого числа пикселей
+PICK_RADIUS_PX = 8
 
 def rollingUp(value:float):
     if value == 0:
@@ -17,7 +28,7 @@ def rollingUp(value:float):
     rounded = round(x / 10 ** power) * 10 ** power
     return sign * rounded
 
-class Widget3D(QWidget):
+class Widget3D(StreamingSegments, QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         grid_step = 10000
@@ -37,6 +48,11 @@ class Widget3D(QWidget):
 
         self.plot_item = gl.GLLinePlotItem()
         self.view.addItem(self.plot_item)
+        # Закреплённые участки потоковой траектории; plot_item — её растущий хвост
+        self._init_segments()
+        # Предварительная траектория (по таблице), пока идёт точный расчёт
+        self.preview_item = gl.GLLinePlotItem()
+        self.view.addItem(self.preview_item)
         self.label_items = []
 
         self._init_grid()
@@ -47,6 +63,18 @@ class Widget3D(QWidget):
         self.view.addItem(self.current_position_marker)
         self.current_position_marker.setVisible(False)
 
+        # Наведение курсора: точки готовой траектории (строки t, x, y, z) и их экранный индекс.
+        # Проекция и k-d дерево по экранным координатам пересчитываются только при смене камеры
+        self._pick_rows = None
+        self._screen_tree = None
+        self._screen_rows = None
+        self._screen_key = None
+        self.hover_marker = GLScatterPlotItem(pos=np.zeros((1, 3)), size=10, color=(1, 1, 0, 1))
+        self.view.addItem(self.hover_marker)
+        self.hover_marker.setVisible(False)
+        self.view.setMouseTracking(True)
+        self.view.installEventFilter(self)
+
     def update_position_marker(self, position: tuple[float, float, float]):
         """
         Обновляет положение тела (точки) в 3D-сцене.
@@ -60,6 +88,65 @@ class Widget3D(QWidget):
     def stop_translation(self):
         self.current_position_marker.setVisible(False)
 
+    def set_pick_points(self, rows):
+        """Точки (k, 4) со столбцами t, x, y, z, доступные для наведения; None — отключить."""
+        self._pick_rows = rows
+        self._screen_key = None
+        self.hover_marker.setVisible(False)
+
+    def _screen_index(self):
+        """k-d дерево по экранным координатам точек для текущей камеры."""
+        width, height = self.view.width(), self.view.height()
+        viewport = (0, 0, width, height)
+        matrix = self.view.projectionMatrix(viewport, viewport) * self.view.viewMatrix()
+        key = (tuple(matrix.data()), width, height)
+        if key != self._screen_key:
+            mvp = np.array(matrix.data(), dtype=np.float64).reshape(4, 4).T
+            clip = self._pick_rows[:, 1:] @ mvp[:3, :3].T + mvp[:3, 3]
+            w = self._pick_rows[:, 1:] @ mvp[3, :3] + mvp[3, 3]
+            visible = np.nonzero(w > 0)[0]
+            ndc = clip[visible, :2] / w[visible, None]
+            screen = np.column_stack([(ndc[:, 0] + 1) * 0.5 * width, (1 - ndc[:, 1]) * 0.5 * height])
+            self._screen_tree = cKDTree(screen) if len(visible) else None
+            self._screen_rows = visible
+            self._screen_key = key
+        return self._screen_tree
+
+    def pick(self, x: float, y: float):
+        """
+        Точка траектории под курсором (x, y — координаты в окне сцены).
+        :return: строка (t, x, y, z) или None, если ближе PICK_RADIUS_PX точек нет
+        """
+        if self._pick_rows is None or not len(self._pick_rows):
+            return None
+        tree = self._screen_index()
+        if tree is None:
+            return None
+        distance, k = tree.query((x, y), distance_upper_bound=PICK_RADIUS_PX)
+        if not np.isfinite(distance):
+            return None
+        return self._pick_rows[self._screen_rows[k]]
+
+    def eventFilter(self, obj, event):
+        if obj is self.view:
+            if event.type() == QEvent.Type.MouseMove and event.buttons() == Qt.MouseButton.NoButton:
+                position = event.position()
+                row = self.pick(position.x(), position.y())
+                if row is None:
+                    self.hover_marker.setVisible(False)
+                    QToolTip.hideText()
+                else:
+                    self.hover_marker.setData(pos=row[None, 1:].astype(np.float32))
+                    self.hover_marker.setVisible(True)
+                    QToolTip.showText(
+                        self.view.mapToGlobal(position.toPoint()),
+                        f"t = {row[0]:.2f} с\nx = {row[1]:.1f} м\ny = {row[2]:.1f} м\nz = {row[3]:.1f} м",
+                        self.view
+                    )
+            elif event.type() == QEvent.Type.Leave:
+                self.hover_marker.setVisible(False)
+        return super().eventFilter(obj, event)
+
     def _init_grid(self):
         # Сетка по X, Y, Z
         for axis in ['x', 'y', 'z']:
@@ -86,18 +173,59 @@ class Widget3D(QWidget):
         self._init_grid()
 
 
-    def update_trajectory(self, trajectory: list[tuple[float, float, float]]):
+    def preview_trajectory(self, trajectory):
+        """Показывает предварительную траекторию; None убирает её."""
+        if trajectory is None:
+            self.preview_item.setVisible(False)
+            return
+        self.preview_item.setData(pos=trajectory.xyz.astype(np.float32), color=QColor(128, 128, 128), width=1)
+        self.preview_item.setVisible(True)
+
+    def begin_trajectory(self):
+        self._clear_segments()
+        self.set_pick_points(None)
+        self.plot_item.setData(pos=np.empty((0, 3), dtype=np.float32), color=QColor(255, 0, 0), width=2)
+
+    def _stream_columns(self, trajectory: Trajectory):
+        return (trajectory.xyz,)
+
+    def _make_segment(self, xyz):
+        segment = gl.GLLinePlotItem(pos=xyz.astype(np.float32), color=QColor(255, 0, 0), width=2)
+        self.view.addItem(segment)
+        return segment
+
+    def _remove_segment(self, segment):
+        self.view.removeItem(segment)
+
+    def _set_tail(self, xyz):
+        self.plot_item.setData(pos=xyz.astype(np.float32), color=QColor(255, 0, 0), width=2)
+
+    def update_trajectory(self, trajectory: Trajectory):
         # if self.plot_item:
         #     self.view.removeItem(self.plot_item)
-        distance = abs(trajectory[-1][0]-trajectory[0][0])
+        if len(trajectory) == 0:
+            self.begin_trajectory()
+            return
+        distance = abs(trajectory.x[-1]-trajectory.x[0])
         step = rollingUp(distance//10)
         self.set_grid_params(step, step*11)
         # print(step)
         self.view.setCameraPosition(distance=distance*3)
 
 
-        trajectory = np.array(trajectory, dtype=np.float32)
-        self.plot_item.setData(pos=trajectory, color=QColor(255, 0, 0), width=2)
+        if len(trajectory) > MAX_DISPLAY_POINTS:
+            # Допуск — доля размера сцены, заметная разве что при сильном увеличении
+            extent = float(np.ptp(trajectory.xyz, axis=0).max())
+            indices = douglas_peucker(trajectory.xyz, extent * 1e-4)
+            self._clear_segments()
+            self.plot_item.setData(pos=trajectory.xyz[indices].astype(np.float32),
+                                   color=QColor(255, 0, 0), width=2)
+            self.set_pick_points(trajectory.data[indices].copy())
+            return
+
+        self._clear_segments()
+        self.plot_item.setData(pos=trajectory.xyz.astype(np.float32), color=QColor(255, 0, 0), width=2)
+        self.set_pick_points(trajectory.data.copy())
         # pts = np.vstack([x, y, z]).T
         # self.plot_item = gl.GLLinePlotItem(pos=pts, color=color, width=2.0, antialias=True)
         # self.view.addItem(self.plot_item)
@@ -1,3 +1,5 @@
+import multiprocessing
+import os
 import sys
 
 from PyQt6 import QtWidgets
@@ -8,12 +10,19 @@ from MVC.Model import Model
 from MVC.View import View
 
 if __name__ == "__main__":
+    # Дочерние процессы пулов (InverseSolver, ParameterSweep) в собранном exe не должны запускать GUI
+    multiprocessing.freeze_support()
 
     app = QtWidgets.QApplication(sys.argv)
     icon = QtGui.QIcon("Resources/Pictures/surprize_icon.ico")
     app.setWindowIcon(icon)
 
-    model = Model()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    model = Model(cache_dir=os.path.join(base_dir, "cache"))
+    # Таблица предпросмотра строится заранее: python -m Simulation.Surrogate surrogate
+    model.load_surrogate(os.path.join(base_dir, "surrogate"))
+    # Рельеф (Terrain.save); без него полёт заканчивается на плоскости z = 0
+    model.load_terrain(os.path.join(base_dir, "terrain.npy"))
     view = View()
     main_form  = QtWidgets.QMainWindow()
     view.setupUi(main_form)